@@ -0,0 +1,192 @@
+"""Scaling benchmark of the main stages of dcaspt2_input_generator.
+
+A synthetic sum_dirac_dfcoef output is created for each number of rows,
+and the following stages are run in the same order as the application runs them.
+
+    load_output                 TableData.load_sum_dirac_dfcoef + validate (TableWidget.load_output)
+    create_table                sort by energy, default CAS(4,8) and reset of the model (TableWidget.create_table)
+    resize_columns              TableWidget.resize_columns
+    paint                       render the visible cells of the table once
+    onTableWidgetColorChanged   update the summary (WidgetController.onTableWidgetColorChanged)
+    change_orbital_space        assign half of the rows to ras3 (TableModel.set_rows_space)
+    change_scattered_rows       assign every 10th row (disjoint ranges) to active (TableModel.set_rows_space)
+    save_input                  create the DIRAC-CASPT2 input (Document.create_input)
+    create_ras_str              create_ras_str for every other row (the worst case of the ras string)
+
+The time is the median of --repeat runs. The peak memory is measured in another run with tracemalloc,
+so it is the peak of the Python allocations in the stage (memory allocated by Qt is not included).
+
+Usage:
+    python benchmarks/scaling.py --rows 1000 10000 50000 --irreps E1g,E1u --ao-columns 4
+    python benchmarks/scaling.py --json > baseline.json
+    python benchmarks/scaling.py --baseline baseline.json  # exit with 1 if a stage is slower than the baseline
+"""
+
+import argparse
+import json
+import os
+import statistics
+import sys
+import tempfile
+import time
+import tracemalloc
+from pathlib import Path
+from typing import Callable, Dict, List, Tuple
+
+os.environ.setdefault("QT_QPA_PLATFORM", "offscreen")
+# Benchmark the source tree of this repository, not the installed package
+sys.path.insert(0, str(Path(__file__).resolve().parent.parent / "src"))
+
+from PySide6.QtWidgets import QApplication
+from synthetic_sum_dirac_dfcoef import write_synthetic_sum_dirac_dfcoef
+
+from dcaspt2_input_generator.cli import write_error, write_line
+from dcaspt2_input_generator.components.document import Document
+from dcaspt2_input_generator.core.interval_set import IntervalSet
+from dcaspt2_input_generator.core.table_data import OrbitalSpace
+from dcaspt2_input_generator.utils.utils import create_ras_str
+
+STAGES = [
+    "load_output",
+    "create_table",
+    "resize_columns",
+    "paint",
+    "onTableWidgetColorChanged",
+    "change_orbital_space",
+    "change_scattered_rows",
+    "save_input",
+    "create_ras_str",
+]
+
+
+def create_stages(file_path: Path) -> "List[Tuple[str, Callable[[], object]]]":
+    """Return the stages that run on a new document (tab)."""
+    document = Document()
+    document.resize(1200, 800)
+    table_widget = document.table_widget
+    table_data = document.table_data
+
+    def load_output():
+        table_data.load_sum_dirac_dfcoef(file_path)
+        table_data.validate()
+
+    def change_orbital_space():
+        rows = IntervalSet()
+        rows.add_range(len(table_data.mo_data) // 4, len(table_data.mo_data) * 3 // 4 - 1)
+        table_widget.table_model.set_rows_space(rows, OrbitalSpace.ras3)
+
+    def change_scattered_rows():
+        rows = IntervalSet()
+        for row in range(0, len(table_data.mo_data), 10):
+            rows.add(row)
+        table_widget.table_model.set_rows_space(rows, OrbitalSpace.active)
+
+    def run_create_ras_str():
+        return create_ras_str(list(range(1, len(table_data.mo_data) + 1, 2)))
+
+    return [
+        ("load_output", load_output),
+        ("create_table", table_widget.create_table),
+        ("resize_columns", table_widget.resize_columns),
+        ("paint", table_widget.grab),
+        ("onTableWidgetColorChanged", document.widget_controller.onTableWidgetColorChanged),
+        ("change_orbital_space", change_orbital_space),
+        ("change_scattered_rows", change_scattered_rows),
+        ("save_input", document.create_input),
+        ("create_ras_str", run_create_ras_str),
+    ]
+
+
+def measure_time(file_path: Path) -> Dict[str, float]:
+    result: Dict[str, float] = {}
+    for name, stage in create_stages(file_path):
+        start = time.perf_counter()
+        stage()
+        result[name] = time.perf_counter() - start
+    return result
+
+
+def measure_peak_memory(file_path: Path) -> Dict[str, int]:
+    result: Dict[str, int] = {}
+    stages = create_stages(file_path)
+    tracemalloc.start()
+    try:
+        for name, stage in stages:
+            tracemalloc.reset_peak()
+            base, _ = tracemalloc.get_traced_memory()
+            stage()
+            _, peak = tracemalloc.get_traced_memory()
+            result[name] = peak - base
+    finally:
+        tracemalloc.stop()
+    return result
+
+
+def run_benchmark(rows: int, irreps: List[str], ao_columns: int, repeat: int) -> "Dict[str, Dict[str, float]]":
+    with tempfile.TemporaryDirectory() as tmp_dir:
+        file_path = Path(tmp_dir) / "synthetic.out"
+        write_synthetic_sum_dirac_dfcoef(file_path, rows=rows, irreps=irreps, ao_columns=ao_columns)
+        times = [measure_time(file_path) for _ in range(repeat)]
+        peak_memory = measure_peak_memory(file_path)
+    return {
+        name: {"time": statistics.median(t[name] for t in times), "peak_memory": peak_memory[name]} for name in STAGES
+    }
+
+
+def print_results(results: "Dict[str, Dict[str, Dict[str, float]]]") -> None:
+    for key, stages in results.items():
+        write_line(f"\n{key}")
+        write_line(f"{'stage':<28} {'time (ms)':>12} {'peak memory (MB)':>18}")
+        for name, value in stages.items():
+            write_line(f"{name:<28} {value['time'] * 1000:>12.2f} {value['peak_memory'] / 1024**2:>18.2f}")
+
+
+def compare_with_baseline(results: "Dict[str, Dict[str, Dict[str, float]]]", baseline_path: Path, threshold: float):
+    """Return the stages that are slower than threshold * (the time of the baseline)."""
+    with open(baseline_path, encoding="utf-8") as f:
+        baseline = json.load(f)
+    regressions: List[str] = []
+    for key, stages in results.items():
+        for name, value in stages.items():
+            if key not in baseline or name not in baseline[key]:
+                continue
+            base_time = baseline[key][name]["time"]
+            if value["time"] > base_time * threshold:
+                regressions.append(f"{key} {name}: {base_time * 1000:.2f} ms -> {value['time'] * 1000:.2f} ms")
+    return regressions
+
+
+def main() -> int:
+    parser = argparse.ArgumentParser(description="Measure the time and the peak memory of each stage.")
+    parser.add_argument("--rows", type=int, nargs="+", default=[1000, 5000, 20000], help="Numbers of rows")
+    parser.add_argument("--irreps", default="E1g,E1u", help="Comma separated irreps (e.g. E1g,E1u or E1)")
+    parser.add_argument("--ao-columns", type=int, nargs="+", default=[4], help="Numbers of AO columns per row")
+    parser.add_argument("--repeat", type=int, default=3, help="Number of runs to measure the time. Default: 3")
+    parser.add_argument("--json", action="store_true", help="Print the results as JSON (can be used as --baseline)")
+    parser.add_argument("--baseline", type=Path, help="JSON results to compare with")
+    parser.add_argument("--threshold", type=float, default=1.5, help="Allowed slowdown from baseline. Default: 1.5")
+    args = parser.parse_args()
+    # QApplication parses the Qt options in sys.argv, don't pass the arguments of this script
+    sys.argv = sys.argv[:1]
+    app = QApplication(sys.argv)  # noqa: F841 (the widgets need QApplication)
+    irreps = args.irreps.split(",")
+    results: Dict[str, Dict[str, Dict[str, float]]] = {}
+    for ao_columns in args.ao_columns:
+        for rows in args.rows:
+            key = f"irreps={args.irreps} rows={rows} ao_columns={ao_columns}"
+            results[key] = run_benchmark(rows, irreps, ao_columns, args.repeat)
+
+    if args.json:
+        write_line(json.dumps(results, indent=4))
+    else:
+        print_results(results)
+    if args.baseline is not None:
+        regressions = compare_with_baseline(results, args.baseline, args.threshold)
+        for regression in regressions:
+            write_error(f"REGRESSION {regression}")
+        return 1 if regressions else 0
+    return 0
+
+
+if __name__ == "__main__":
+    sys.exit(main())
@@ -0,0 +1,121 @@
+"""Startup latency benchmark of dcaspt2_input_generator.
+
+Each launch runs in a fresh interpreter (the same as a user starting the application) and measures
+the time from the interpreter start until the first paint event of the main window.
+
+Usage:
+    python benchmarks/startup.py [--repeat N] [--platform offscreen] [--json]
+
+The application directory is created in a temporary HOME directory, so the result does not depend on
+the settings.json of the user. Use --platform xcb (or leave QT_QPA_PLATFORM unset) to include the cost
+of a real display connection, e.g. over X-forwarding.
+"""
+
+import argparse
+import json
+import os
+import statistics
+import subprocess
+import sys
+import tempfile
+import time
+from pathlib import Path
+
+# The script run in the child interpreter.
+# It follows dcaspt2_input_generator:main until the window is shown and exits at the first paint event.
+CHILD_SCRIPT = """
+import json, sys, time
+t_start = time.perf_counter()
+from dcaspt2_input_generator.dcaspt2_input_generator import MainApp
+from dcaspt2_input_generator.utils.args import get_args
+t_import = time.perf_counter()
+args = get_args()
+app = MainApp()
+t_window = time.perf_counter()
+
+from PySide6.QtCore import QEvent, QObject, QTimer
+
+class FirstPaintFilter(QObject):
+    t_paint = None
+
+    def eventFilter(self, obj, event):
+        if event.type() == QEvent.Type.Paint and self.t_paint is None:
+            self.t_paint = time.perf_counter()
+            QTimer.singleShot(0, app.app.quit)
+        return False
+
+paint_filter = FirstPaintFilter()
+for widget in [app.window, *app.window.findChildren(QObject)]:
+    widget.installEventFilter(paint_filter)
+app.window.update()
+QTimer.singleShot(10000, app.app.quit)  # Give up if the window is never painted
+app.app.exec_()
+app.delete_unneeded_files()
+t_paint = paint_filter.t_paint if paint_filter.t_paint is not None else float("nan")
+print(json.dumps({
+    "import": t_import - t_start,
+    "window": t_window - t_import,
+    "first_paint": t_paint - t_window,
+    "in_process": t_paint - t_start,
+}))
+"""
+
+PHASES = ["interpreter", "import", "window", "first_paint", "total"]
+
+
+def run_once(env: "dict[str, str]") -> "dict[str, float]":
+    t_launch = time.perf_counter()
+    proc = subprocess.run(  # noqa: S603 (runs this interpreter with the fixed CHILD_SCRIPT)
+        [sys.executable, "-c", CHILD_SCRIPT], env=env, capture_output=True, text=True, check=True, timeout=60
+    )
+    total = time.perf_counter() - t_launch
+    result = json.loads(proc.stdout.strip().splitlines()[-1])
+    result["total"] = total
+    # Time spent before the first line of the child script (interpreter startup and site imports)
+    result["interpreter"] = total - result.pop("in_process")
+    return result
+
+
+def create_env(home: Path, platform: str) -> "dict[str, str]":
+    env = dict(os.environ)
+    env["HOME"] = str(home)
+    env.pop("XDG_CONFIG_HOME", None)
+    if platform:
+        env["QT_QPA_PLATFORM"] = platform
+    src_dir = Path(__file__).resolve().parent.parent / "src"
+    env["PYTHONPATH"] = os.pathsep.join([str(src_dir), env.get("PYTHONPATH", "")]).rstrip(os.pathsep)
+    return env
+
+
+def main() -> None:
+    parser = argparse.ArgumentParser(description="Measure the startup latency until the first paint.")
+    parser.add_argument("--repeat", type=int, default=10, help="Number of launches. Default: 10")
+    parser.add_argument("--warmup", type=int, default=1, help="Number of launches not measured. Default: 1")
+    parser.add_argument(
+        "--platform",
+        default=os.environ.get("QT_QPA_PLATFORM", "offscreen"),
+        help="QT_QPA_PLATFORM of the launched application. Default: $QT_QPA_PLATFORM or offscreen",
+    )
+    parser.add_argument("--json", action="store_true", help="Print the raw results as JSON")
+    args = parser.parse_args()
+
+    with tempfile.TemporaryDirectory() as home:
+        env = create_env(Path(home), args.platform)
+        for _ in range(args.warmup):
+            run_once(env)
+        results = [run_once(env) for _ in range(args.repeat)]
+
+    if args.json:
+        sys.stdout.write(json.dumps(results, indent=4) + "\n")
+        return
+    # dcaspt2_input_generator is imported only in the child interpreters, so the output is written with sys.stdout
+    # instead of the write_line helper of dcaspt2_input_generator.cli
+    sys.stdout.write(f"python: {sys.version.split()[0]}, platform: {args.platform}, repeat: {args.repeat}\n")
+    sys.stdout.write(f"{'phase':<12} {'median (ms)':>12} {'min (ms)':>10} {'max (ms)':>10}\n")
+    for phase in PHASES:
+        values = [r[phase] * 1000 for r in results]
+        sys.stdout.write(f"{phase:<12} {statistics.median(values):>12.1f} {min(values):>10.1f} {max(values):>10.1f}\n")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,109 @@
+"""Create a synthetic sum_dirac_dfcoef output for benchmarks.
+
+The file has the same format as `sum_dirac_dfcoef -d 3 -c` writes, so it can be loaded by
+dcaspt2_input_generator without running DIRAC and sum_dirac_dfcoef.
+
+Usage:
+    python benchmarks/synthetic_sum_dirac_dfcoef.py -o synthetic.out --rows 10000 --irreps E1g,E1u --ao-columns 4
+"""
+
+import argparse
+import random
+from pathlib import Path
+from typing import List, Optional, Sequence
+
+# Point group written in the header for the irreps (E1g/E1u: D2h, C2h and Ci. E1: C2v, C2 and Cs.)
+DEFAULT_POINT_GROUP = {("E1g", "E1u"): "D2h", ("E1",): "C2v"}
+ATOMS = ["U", "O", "N", "Ar", "Xe", "Au"]
+AZIMUTHAL_LABELS = ["s", "px", "py", "pz", "dxx", "dxy", "dyy", "fxxx", "fxyz", "fzzz"]
+SYMMETRY_LABELS = ["Ag", "B1g", "B2g", "B3g", "Au", "B1u", "B2u", "B3u"]
+
+
+def create_ao_labels(num: int, rng: random.Random) -> List[str]:
+    labels = [f"{sym}{atom}{azimuthal}" for atom in ATOMS for sym in SYMMETRY_LABELS for azimuthal in AZIMUTHAL_LABELS]
+    rng.shuffle(labels)
+    return labels[:num]
+
+
+def create_percentages(num: int, rng: random.Random) -> List[float]:
+    # Sorted in descending order and the sum is 100 like the output of sum_dirac_dfcoef
+    weights = sorted((rng.random() + 1e-3 for _ in range(num)), reverse=True)
+    total = sum(weights)
+    return [w / total * 100 for w in weights]
+
+
+def write_synthetic_sum_dirac_dfcoef(
+    file_path: Path,
+    *,
+    rows: int,
+    irreps: Sequence[str] = ("E1g", "E1u"),
+    ao_columns: int = 4,
+    occupied_ratio: float = 0.2,
+    point_group: Optional[str] = None,
+    seed: int = 0,
+) -> None:
+    """Write the sum_dirac_dfcoef output with the given number of rows (Kramers pairs).
+
+    Args:
+        rows: The total number of rows. The rows are distributed evenly to the irreps.
+        irreps: The irreducible representations. (e.g.) ("E1g", "E1u") or ("E1",)
+        ao_columns: The number of AO (AO type, percentage) pairs per row.
+        occupied_ratio: The ratio of the closed shell rows in each irrep.
+        point_group: The point group in the header. Default: D2h for E1g/E1u, C2v for E1.
+        seed: The seed of the random numbers, the same arguments always create the same file.
+    """
+    if rows < len(irreps):
+        msg = f"rows must be larger than or equal to the number of irreps. rows: {rows}, irreps: {irreps}"
+        raise ValueError(msg)
+    rng = random.Random(seed)  # noqa: S311 (reproducible synthetic data, not used for security)
+    if point_group is None:
+        point_group = DEFAULT_POINT_GROUP.get(tuple(irreps), "C1")
+    ao_labels = create_ao_labels(max(ao_columns * 4, 1), rng)
+
+    rows_per_irrep = [rows // len(irreps) + (1 if idx < rows % len(irreps) else 0) for idx in range(len(irreps))]
+    closed_per_irrep = [max(1, int(n * occupied_ratio)) for n in rows_per_irrep]
+    electron_num = 2 * sum(closed_per_irrep)
+
+    with open(file_path, mode="w", encoding="utf-8") as f:
+        f.write(f"electron_num {electron_num} point_group {point_group} moltra_scheme default\n")
+        f.write(" ".join(f"{irrep} 1..{n}" for irrep, n in zip(irreps, rows_per_irrep)) + " \n")
+        f.write(
+            " ".join(
+                f"{irrep} closed {closed} open 0 virtual {n - closed}"
+                for irrep, n, closed in zip(irreps, rows_per_irrep, closed_per_irrep)
+            )
+            + " \n"
+        )
+        f.write("\n")
+        for irrep, n, closed in zip(irreps, rows_per_irrep, closed_per_irrep):
+            # Occupied orbitals have negative energies and virtual orbitals have positive energies
+            energies = sorted(rng.uniform(-100.0, -0.1) for _ in range(closed))
+            energies += sorted(rng.uniform(0.01, 100.0) for _ in range(n - closed))
+            for mo_number, energy in enumerate(energies, start=1):
+                row = [irrep, str(mo_number), f"{energy:.3f}"]
+                for label, percentage in zip(rng.sample(ao_labels, ao_columns), create_percentages(ao_columns, rng)):
+                    row.extend([label, f"{percentage:.3f}"])
+                f.write(" ".join(row) + "\n")
+
+
+def main() -> None:
+    parser = argparse.ArgumentParser(description="Create a synthetic sum_dirac_dfcoef output for benchmarks.")
+    parser.add_argument("-o", "--output", type=Path, required=True, help="Output file path")
+    parser.add_argument("--rows", type=int, default=10000, help="Number of rows (Kramers pairs). Default: 10000")
+    parser.add_argument("--irreps", default="E1g,E1u", help="Comma separated irreps (e.g. E1g,E1u or E1)")
+    parser.add_argument("--ao-columns", type=int, default=4, help="Number of AO columns per row. Default: 4")
+    parser.add_argument("--point-group", default=None, help="Point group. Default: D2h for E1g,E1u and C2v for E1")
+    parser.add_argument("--seed", type=int, default=0, help="Seed of the random numbers. Default: 0")
+    args = parser.parse_args()
+    write_synthetic_sum_dirac_dfcoef(
+        args.output,
+        rows=args.rows,
+        irreps=args.irreps.split(","),
+        ao_columns=args.ao_columns,
+        point_group=args.point_group,
+        seed=args.seed,
+    )
+
+
+if __name__ == "__main__":
+    main()
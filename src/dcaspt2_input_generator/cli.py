@@ -0,0 +1,310 @@
+# This script provides the command line interface to create the DIRAC-CASPT2 input without GUI.
+# Never import PySide6 from this script, so that it can be used on the machine without display.
+import argparse
+import subprocess
+import sys
+import tempfile
+from pathlib import Path
+from typing import TYPE_CHECKING, Dict, Optional
+
+from dcaspt2_input_generator.core.file_format import (
+    SESSION_FORMAT,
+    SUM_DIRAC_DFCOEF_FORMAT,
+    TABLE_DATA_BINARY_FORMAT,
+    UNKNOWN_FORMAT,
+    probe_file,
+)
+from dcaspt2_input_generator.core.table_data import OrbitalSpace, TableData
+from dcaspt2_input_generator.core.table_data_binary import load_table_data_binary
+from dcaspt2_input_generator.utils.tracing import trace_span
+from dcaspt2_input_generator.utils.utils import parse_ras_str
+
+# The other modules (e.g. active_space, resource_estimate, active_space_sweep, sum_dirac_dfcoef_pool)
+# are imported in the command which uses them, so that each command starts in a few tens of milliseconds.
+# ruff: noqa: PLC0415
+if TYPE_CHECKING:
+    from dcaspt2_input_generator.core.resource_estimate import ResourceCalibration
+    from dcaspt2_input_generator.utils.settings import Settings
+
+
+def write_line(line: str) -> None:
+    sys.stdout.write(f"{line}\n")
+
+
+def write_error(message: str) -> None:
+    sys.stderr.write(f"ERROR: {message}\n")
+
+
+def load_table_data(file_path: Path, num_process: int, *, use_pool: bool = False) -> TableData:
+    table_data = TableData()
+    probe = probe_file(file_path)
+    if probe.format_name == SUM_DIRAC_DFCOEF_FORMAT:
+        table_data.load_sum_dirac_dfcoef(file_path)
+    elif probe.format_name == TABLE_DATA_BINARY_FORMAT:
+        load_table_data_binary(table_data, file_path)
+    elif probe.format_name == SESSION_FORMAT:
+        from dcaspt2_input_generator.core.session import SESSION_MAGIC
+
+        # Only the table of the session is used, the orbital spaces are set by the options
+        load_table_data_binary(table_data, file_path, magic=SESSION_MAGIC)
+    elif probe.format_name == UNKNOWN_FORMAT:
+        msg = (
+            "The file is not a DIRAC output, a sum_dirac_dfcoef output, a binary table file or a session file."
+            f" path: {file_path}"
+        )
+        raise ValueError(msg)
+    else:
+        # file_path is DIRAC output, run sum_dirac_dfcoef to get the sum_dirac_dfcoef output
+        # (or use the cached result if the same DIRAC output has already been analysed)
+        from dcaspt2_input_generator.core.sum_dirac_dfcoef_cache import create_sum_dirac_dfcoef_cache
+        from dcaspt2_input_generator.core.sum_dirac_dfcoef_pool import get_sum_dirac_dfcoef_pool
+        from dcaspt2_input_generator.core.sum_dirac_dfcoef_runner import (
+            SUM_DIRAC_DFCOEF_ANALYSIS_OPTIONS,
+            check_sum_dirac_dfcoef_version,
+            run_sum_dirac_dfcoef,
+        )
+
+        pool = get_sum_dirac_dfcoef_pool(num_process) if use_pool else None
+        version = pool.check_version() if pool is not None else check_sum_dirac_dfcoef_version()
+        cache = create_sum_dirac_dfcoef_cache()
+        cache_key = cache.create_key(file_path, version, SUM_DIRAC_DFCOEF_ANALYSIS_OPTIONS)
+        cached_path = cache.get(cache_key)
+        if cached_path is not None:
+            table_data.load_sum_dirac_dfcoef(cached_path)
+        elif pool is not None:
+            with trace_span("sum_dirac_dfcoef run", dirac_output=str(file_path), mode="pool"):
+                result = pool.submit(file_path).result()
+            table_data.load_sum_dirac_dfcoef_rows(result.header_rows, result.rows)
+            with tempfile.TemporaryDirectory() as tmp_dir:
+                sum_dirac_dfcoef_path = Path(tmp_dir) / "sum_dirac_dfcoef.out"
+                result.write(sum_dirac_dfcoef_path)
+                cache.store(cache_key, sum_dirac_dfcoef_path)
+        else:
+            with tempfile.TemporaryDirectory() as tmp_dir:
+                sum_dirac_dfcoef_path = Path(tmp_dir) / "sum_dirac_dfcoef.out"
+                run_sum_dirac_dfcoef(file_path, sum_dirac_dfcoef_path, num_process)
+                table_data.load_sum_dirac_dfcoef(sum_dirac_dfcoef_path)
+                cache.store(cache_key, sum_dirac_dfcoef_path)
+    table_data.validate()
+    with trace_span("sort by energy"):
+        table_data.mo_data.sort_by_energy()
+    return table_data
+
+
+def parse_strategy_params(args: "argparse.Namespace") -> Dict[str, str]:
+    # --cas gives the default parameters of the count strategy, --strategy-param KEY=VALUE overwrites them
+    values: Dict[str, str] = {}
+    if args.strategy == "count":
+        values.update(zip(("electrons", "spinors"), map(str, args.cas)))
+    for param in args.strategy_params or []:
+        key, sep, value = param.partition("=")
+        if not sep:
+            msg = f"--strategy-param must be KEY=VALUE: {param}"
+            raise ValueError(msg)
+        values[key.strip()] = value
+    return values
+
+
+def set_spaces(table_data: TableData, args: "argparse.Namespace") -> None:
+    from dcaspt2_input_generator.core.active_space import create_active_space, get_active_space_strategy
+
+    strategy = get_active_space_strategy(args.strategy)
+    params = strategy.parse_parameters(parse_strategy_params(args))
+    spaces = create_active_space(table_data, strategy.name, params)
+    assigned_rows = set()
+    for space in OrbitalSpace:
+        rows_str = getattr(args, space.name)
+        if rows_str is None:
+            continue
+        for row in parse_ras_str(rows_str):
+            if row > len(spaces):
+                msg = f"--{space.name.replace('_', '-')}: row {row} is out of range. The number of rows: {len(spaces)}"
+                raise ValueError(msg)
+            if row in assigned_rows:
+                msg = f"row {row} is specified in more than one orbital space option."
+                raise ValueError(msg)
+            assigned_rows.add(row)
+            spaces[row - 1] = space
+    table_data.reset_spaces(spaces)
+
+
+def load_table_and_spaces(
+    args: "argparse.Namespace", settings: "Settings", *, with_spaces: bool = True
+) -> Optional[TableData]:
+    # Load the table given by -i and set the orbital spaces given by the options (None if it has failed)
+    file_path = Path(args.input).expanduser().resolve()
+    if not file_path.exists():
+        write_error(f"The file cannot be found. path: {file_path}")
+        return None
+    num_process = args.parallel if args.parallel is not None else settings.multi_process_input.multi_process_num
+    try:
+        table_data = load_table_data(file_path, num_process, use_pool=settings.sum_dirac_dfcoef_run_mode.use_pool())
+        if with_spaces:
+            set_spaces(table_data, args)
+    except subprocess.CalledProcessError as e:
+        stderr = e.stderr.decode() if isinstance(e.stderr, bytes) else e.stderr
+        write_error(f"sum_dirac_dfcoef has failed. Is this DIRAC output file?\npath: {file_path}\n{stderr}")
+        return None
+    except Exception as e:
+        write_error(str(e))
+        return None
+    return table_data
+
+
+def generate(args: "argparse.Namespace") -> int:
+    from dcaspt2_input_generator.core.dcaspt2_input import create_dcaspt2_input
+    from dcaspt2_input_generator.utils.settings import get_settings
+
+    settings = get_settings()
+    table_data = load_table_and_spaces(args, settings)
+    if table_data is None:
+        return 1
+
+    with trace_span("create input"):
+        output = create_dcaspt2_input(
+            table_data,
+            table_data.spaces,
+            total_symmetry=args.totsym if args.totsym is not None else settings.input.total_symmetry,
+            dirac_ver=args.diracver if args.diracver is not None else settings.input.dirac_ver,
+            ras1_max_hole=args.ras1_max_hole if args.ras1_max_hole is not None else settings.input.ras1_max_hole,
+            ras3_max_electron=(
+                args.ras3_max_electron if args.ras3_max_electron is not None else settings.input.ras3_max_electron
+            ),
+        )
+    with trace_span("input save"):
+        if args.output is None:
+            sys.stdout.write(output)
+        else:
+            with open(Path(args.output).expanduser(), mode="w") as f:
+                f.write(output)
+    return 0
+
+
+def load_calibration(args: "argparse.Namespace") -> "Optional[ResourceCalibration]":
+    # --calibration FILE, or the calibration in the settings directory if it exists
+    from dcaspt2_input_generator.core.resource_estimate import load_resource_calibration
+    from dcaspt2_input_generator.utils.dir_info import dir_info
+
+    if args.calibration is not None:
+        return load_resource_calibration(Path(args.calibration).expanduser())
+    elif dir_info.resource_calibration_path.exists():
+        return load_resource_calibration(dir_info.resource_calibration_path)
+    return None
+
+
+def estimate(args: "argparse.Namespace") -> int:
+    from dcaspt2_input_generator.core.resource_estimate import (
+        CalculationSize,
+        estimate_resources,
+        format_bytes,
+        format_seconds,
+        parse_bytes,
+    )
+    from dcaspt2_input_generator.utils.settings import get_settings
+
+    settings = get_settings()
+    try:
+        node_memory = parse_bytes(args.node_memory) if args.node_memory is not None else None
+        calibration = load_calibration(args)
+    except (OSError, ValueError) as e:
+        write_error(str(e))
+        return 1
+    table_data = load_table_and_spaces(args, settings)
+    if table_data is None:
+        return 1
+
+    size = CalculationSize.from_table(
+        table_data,
+        ras1_max_hole=args.ras1_max_hole if args.ras1_max_hole is not None else settings.input.ras1_max_hole,
+        ras3_max_electron=(
+            args.ras3_max_electron if args.ras3_max_electron is not None else settings.input.ras3_max_electron
+        ),
+    )
+    resource_estimate = estimate_resources(size, calibration)
+    write_line(
+        f"Point group: {size.point_group or 'unknown'}, ninact: {size.ninact},"
+        f" nact: {size.nact} (ras1: {size.nras1}, ras2: {size.nras2}, ras3: {size.nras3}),"
+        f" nsec: {size.nsec}, nelec: {size.nelec}"
+    )
+    write_line(f"CI determinants: {resource_estimate.determinants}")
+    write_line(f"{'subprogram':<12}{'peak memory':>16}{'integral files':>18}{'relative cost':>16}{'time':>12}")
+    for subprogram in resource_estimate.subprograms:
+        seconds = "-" if subprogram.seconds is None else format_seconds(subprogram.seconds)
+        write_line(
+            f"{subprogram.name:<12}{format_bytes(subprogram.peak_memory):>16}"
+            f"{format_bytes(subprogram.integral_file_size):>18}{subprogram.relative_cost:>16.3g}{seconds:>12}"
+        )
+    write_line(
+        f"Estimated max memory size: {format_bytes(resource_estimate.peak_memory)}"
+        f" ({resource_estimate.peak_subprogram})"
+    )
+    if node_memory is not None:
+        fits = resource_estimate.fits_in_memory(node_memory)
+        write_line(f"Node memory: {format_bytes(node_memory)}, {'fits' if fits else 'does not fit'}")
+        if not fits:
+            return 2
+    return 0
+
+
+def calibrate(args: "argparse.Namespace") -> int:
+    from dcaspt2_input_generator.core.resource_estimate import (
+        calibrate_resources,
+        read_timing_log,
+        save_resource_calibration,
+    )
+    from dcaspt2_input_generator.utils.dir_info import dir_info
+
+    output_path = Path(args.output).expanduser() if args.output is not None else dir_info.resource_calibration_path
+    try:
+        calibration = calibrate_resources(read_timing_log(Path(args.input).expanduser()))
+        save_resource_calibration(calibration, output_path)
+    except (OSError, ValueError) as e:
+        write_error(str(e))
+        return 1
+    for name, subprogram in calibration.subprograms.items():
+        seconds_per_cost = "-" if subprogram.seconds_per_cost is None else f"{subprogram.seconds_per_cost:.3g}"
+        write_line(
+            f"{name}: {subprogram.records} records, seconds per cost: {seconds_per_cost},"
+            f" memory scale: {subprogram.memory_scale:.3f}"
+        )
+    write_line(f"The calibration is saved to {output_path}")
+    return 0
+
+
+def sweep(args: "argparse.Namespace") -> int:
+    from dcaspt2_input_generator.core.active_space_sweep import load_sweep_grid, run_sweep
+    from dcaspt2_input_generator.core.resource_estimate import parse_bytes
+    from dcaspt2_input_generator.utils.settings import get_settings
+
+    settings = get_settings()
+    try:
+        node_memory = parse_bytes(args.node_memory) if args.node_memory is not None else None
+        calibration = load_calibration(args)
+        grid = load_sweep_grid(
+            Path(args.grid).expanduser(),
+            ras1_max_hole=settings.input.ras1_max_hole,
+            ras3_max_electron=settings.input.ras3_max_electron,
+            total_symmetry=settings.input.total_symmetry,
+        )
+    except (OSError, ValueError) as e:
+        write_error(str(e))
+        return 1
+    table_data = load_table_and_spaces(args, settings, with_spaces=False)
+    if table_data is None:
+        return 1
+
+    num_process = args.parallel if args.parallel is not None else settings.multi_process_input.multi_process_num
+    summary = run_sweep(
+        table_data,
+        grid,
+        Path(args.output_dir).expanduser(),
+        dirac_ver=args.diracver if args.diracver is not None else settings.input.dirac_ver,
+        num_process=num_process,
+        calibration=calibration,
+        node_memory=node_memory,
+    )
+    for result in summary.results:
+        if result.error:
+            write_error(f"variant {result.variant.index}: {result.error}")
+    write_line(f"{summary.num_inputs} inputs ({summary.num_errors} errors). The manifest is {summary.manifest_path}")
+    return 0 if summary.num_errors == 0 else 1
@@ -0,0 +1,102 @@
+from typing import Dict, List, Optional
+
+from PySide6.QtCore import Signal
+from PySide6.QtGui import QAction
+from PySide6.QtWidgets import (
+    QComboBox,
+    QDialog,
+    QFormLayout,
+    QHBoxLayout,
+    QLabel,
+    QLineEdit,
+    QPushButton,
+    QStackedWidget,
+    QVBoxLayout,
+    QWidget,
+)
+
+from dcaspt2_input_generator.core.active_space import ActiveSpaceStrategy, get_active_space_strategies
+
+
+# ActiveSpaceStrategyDialog selects the active space strategy and its parameters
+# and applies it to the table of the current tab.
+# The parameter inputs of each strategy are shown in a QStackedWidget page.
+class ActiveSpaceStrategyDialog(QDialog):
+    strategy_applied = Signal()
+
+    def __init__(self):
+        super().__init__()
+        self.init_UI()
+
+    def init_UI(self):  # noqa: N802 (the same name as the other widgets)
+        self.setWindowTitle("Active space strategy")
+        self.resize(450, 150)
+        self.strategies: List[ActiveSpaceStrategy] = get_active_space_strategies()
+        self.strategy_combo_box = QComboBox()
+        self.description_label = QLabel()
+        self.parameter_pages = QStackedWidget()
+        self.parameter_inputs: List[Dict[str, QLineEdit]] = []
+        for strategy in self.strategies:
+            self.strategy_combo_box.addItem(strategy.name)
+            form_layout = QFormLayout()
+            inputs: Dict[str, QLineEdit] = {}
+            for parameter in strategy.parameters:
+                line_edit = QLineEdit(str(parameter.default))
+                line_edit.setToolTip(parameter.help)
+                form_layout.addRow(f"{parameter.name} ({parameter.help})", line_edit)
+                inputs[parameter.name] = line_edit
+            page = QWidget()
+            page.setLayout(form_layout)
+            self.parameter_pages.addWidget(page)
+            self.parameter_inputs.append(inputs)
+        self.strategy_combo_box.currentIndexChanged.connect(self.onStrategyChanged)
+        self.onStrategyChanged(0)
+
+        self.apply_button = QPushButton("Apply")
+        self.apply_button.clicked.connect(self.strategy_applied)
+        self.close_button = QPushButton("Close")
+        self.close_button.clicked.connect(self.close)
+        button_layout = QHBoxLayout()
+        button_layout.addWidget(self.apply_button)
+        button_layout.addWidget(self.close_button)
+
+        layout = QVBoxLayout()
+        layout.addWidget(self.strategy_combo_box)
+        layout.addWidget(self.description_label)
+        layout.addWidget(self.parameter_pages)
+        layout.addLayout(button_layout)
+        self.setLayout(layout)
+
+    def onStrategyChanged(self, idx: int):  # noqa: N802 (the same name as the other widgets)
+        self.parameter_pages.setCurrentIndex(idx)
+        self.description_label.setText(self.strategies[idx].description)
+
+    def get_strategy(self) -> ActiveSpaceStrategy:
+        return self.strategies[self.strategy_combo_box.currentIndex()]
+
+    def get_parameter_values(self) -> Dict[str, str]:
+        inputs = self.parameter_inputs[self.strategy_combo_box.currentIndex()]
+        return {name: line_edit.text() for name, line_edit in inputs.items()}
+
+
+class ActiveSpaceStrategyDialogAction(QAction):
+    strategy_applied = Signal()
+
+    def __init__(self):
+        super().__init__()
+        self.init_UI()
+
+    def init_UI(self):  # noqa: N802 (the same name as the other widgets)
+        # The dialog is created when it is opened for the first time to reduce the startup time
+        self.active_space_strategy_dialog: Optional[ActiveSpaceStrategyDialog] = None
+        self.setText("Active space strategy")
+        self.triggered.connect(self.openActiveSpaceStrategyDialog)
+
+    def get_dialog(self) -> ActiveSpaceStrategyDialog:
+        if self.active_space_strategy_dialog is None:
+            self.active_space_strategy_dialog = ActiveSpaceStrategyDialog()
+            self.active_space_strategy_dialog.strategy_applied.connect(self.strategy_applied)
+        return self.active_space_strategy_dialog
+
+    def openActiveSpaceStrategyDialog(self):  # noqa: N802 (the same name as the other widgets)
+        self.get_dialog().exec()
@@ -1,8 +1,12 @@
-from dcaspt2_input_generator.utils.settings import settings
+from typing import Optional
+
 from PySide6.QtCore import Signal
 from PySide6.QtGui import QAction
 from PySide6.QtWidgets import QButtonGroup, QDialog, QRadioButton, QVBoxLayout, QWidget
 
+from dcaspt2_input_generator.components.data import colors
+from dcaspt2_input_generator.utils.settings import get_settings
+
 
 class ColorSettingsDialog(QDialog):
     color_settings_changed = Signal()
@@ -13,9 +17,10 @@ class ColorSettingsDialog(QDialog):
 
     def init_UI(self):
         self.buttonGroup = QButtonGroup(self)
-        for idx, color in enumerate(settings.color_theme.theme_list):
+        for idx, color in enumerate(get_settings().color_theme.theme_list):
             button = QRadioButton(color, self)
-            if idx == 0:
+            # The current theme may be changed before the dialog is created (e.g. restoring a session)
+            if color == colors.color_type:
                 button.setChecked(True)
             self.buttonGroup.addButton(button)
             self.buttonGroup.setId(button, idx)
@@ -41,14 +46,23 @@ class ColorSettingsDialog(QDialog):
 
 
 class ColorSettingsDialogAction(QAction):
+    color_settings_changed = Signal()
+
     def __init__(self):
         super().__init__()
         self.init_UI()
 
     def init_UI(self):
-        self.color_settings_dialog = ColorSettingsDialog()
+        # The dialog is created when it is opened for the first time to reduce the startup time
+        self.color_settings_dialog: Optional[ColorSettingsDialog] = None
         self.setText("Color Settings")
         self.triggered.connect(self.openColorSettingsDialog)
 
+    def get_dialog(self) -> ColorSettingsDialog:
+        if self.color_settings_dialog is None:
+            self.color_settings_dialog = ColorSettingsDialog()
+            self.color_settings_dialog.color_settings_changed.connect(self.color_settings_changed)
+        return self.color_settings_dialog
+
     def openColorSettingsDialog(self):
-        self.color_settings_dialog.exec()
+        self.get_dialog().exec()
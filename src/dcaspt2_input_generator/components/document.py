@@ -0,0 +1,346 @@
+import os
+import shutil
+import tempfile
+from pathlib import Path
+from typing import Dict, Optional, Tuple
+
+from PySide6.QtCore import QThreadPool, Signal
+from PySide6.QtWidgets import QPushButton, QVBoxLayout, QWidget
+
+from dcaspt2_input_generator.components.sum_dirac_dfcoef_process import (
+    SumDiracDfcoefPoolJob,
+    SumDiracDfcoefPreparation,
+    SumDiracDfcoefProcess,
+    SumDiracDfcoefProgressWidget,
+    SumDiracDfcoefRunPlan,
+)
+from dcaspt2_input_generator.components.table_query_bar import TableQueryBar
+from dcaspt2_input_generator.components.table_summary import TableSummary
+from dcaspt2_input_generator.components.table_widget import TableWidget
+from dcaspt2_input_generator.controller.widget_controller import WidgetController
+from dcaspt2_input_generator.core.dcaspt2_input import create_dcaspt2_input
+from dcaspt2_input_generator.core.dirac_output_preview import read_dirac_output_preview
+from dcaspt2_input_generator.core.file_format import SUM_DIRAC_DFCOEF_FORMAT, TABLE_DATA_BINARY_FORMAT, probe_file
+from dcaspt2_input_generator.core.session import Session, write_session
+from dcaspt2_input_generator.core.sum_dirac_dfcoef_cache import create_sum_dirac_dfcoef_cache
+from dcaspt2_input_generator.core.sum_dirac_dfcoef_pool import SumDiracDfcoefRows, get_sum_dirac_dfcoef_pool
+from dcaspt2_input_generator.core.table_data import OrbitalSpace, TableData
+from dcaspt2_input_generator.core.table_data_binary import (
+    TABLE_DATA_BINARY_SUFFIX,
+    create_sum_dirac_dfcoef_rows,
+    write_table_data_binary,
+)
+from dcaspt2_input_generator.utils.dir_info import dir_info
+from dcaspt2_input_generator.utils.settings import get_settings
+from dcaspt2_input_generator.utils.tracing import trace_span
+from dcaspt2_input_generator.utils.utils import debug_print
+
+
+def create_scratch_file_path() -> Path:
+    """Create a unique scratch file for the sum_dirac_dfcoef output,
+    so that documents and application instances never overwrite each other's results."""
+    fd, path = tempfile.mkstemp(prefix="sum_dirac_dfcoef_", suffix=".out", dir=dir_info.scratch_dir)
+    os.close(fd)
+    return Path(path)
+
+
+def remove_file(path: Optional[Path]) -> None:
+    if path is None:
+        return
+    try:
+        os.remove(path)
+    except OSError:
+        pass
+
+
+# Document holds the state of one molecule (one tab of MainWindow).
+# TableData, the orbital spaces, the user input and the sum_dirac_dfcoef job are not shared between documents,
+# so several outputs can be loaded and analysed at the same time.
+# Layout of the document:
+# While sum_dirac_dfcoef is running, the table shows the preview read directly from the DIRAC output
+# (energies and the default orbital spaces) and the AO columns are filled when sum_dirac_dfcoef has finished.
+# TableQueryBar (query to select the rows of the table)
+# TableWidget (table)
+# SumDiracDfcoefProgressWidget (shown only while sum_dirac_dfcoef is running)
+# TableSummary (summary and user input)
+# Save button
+class Document(QWidget):
+    title_changed = Signal(str)
+    error_occurred = Signal(str)
+
+    def __init__(self, parent=None):
+        super().__init__(parent)
+        self.table_data = TableData()
+        self.title = "New"
+        # The sum_dirac_dfcoef output or the binary table file of the current table (used for saving the table)
+        self.sum_dirac_dfcoef_path: Optional[Path] = None
+        # The scratch files created by this document. They are removed when the document is closed.
+        self.scratch_path: Optional[Path] = None
+        self.running_scratch_path: Optional[Path] = None
+        self.running_dirac_output: Optional[Path] = None
+        self.cache_key: Optional[str] = None
+        # The orbital spaces of the preview just after it is loaded, None if the table is not a preview
+        self.preview_spaces: Optional[bytes] = None
+        self.init_UI()
+
+    def init_UI(self):  # noqa: N802 (the same name as the other widgets)
+        self.table_widget = TableWidget(self.table_data)
+        self.table_query_bar = TableQueryBar(self.table_widget)
+        self.table_summary = TableSummary()
+        self.widget_controller = WidgetController(self.table_summary, self.table_widget)
+        self.save_button = QPushButton("Save")
+
+        # Set task runner
+        self.sum_dirac_dfcoef_preparation = SumDiracDfcoefPreparation(self)
+        self.sum_dirac_dfcoef_process = SumDiracDfcoefProcess(self)
+        self.sum_dirac_dfcoef_pool_job = SumDiracDfcoefPoolJob(self)
+        self.progress_widget = SumDiracDfcoefProgressWidget(self)
+        # Connect the progress widget first, so that it is hidden before the result is handled
+        self.progress_widget.connect_preparation(self.sum_dirac_dfcoef_preparation)
+        self.progress_widget.connect_job(self.sum_dirac_dfcoef_process)
+        self.progress_widget.connect_job(self.sum_dirac_dfcoef_pool_job)
+        self.sum_dirac_dfcoef_process.succeeded.connect(self.on_sum_dirac_dfcoef_succeeded)
+        self.sum_dirac_dfcoef_pool_job.succeeded.connect(self.on_sum_dirac_dfcoef_pool_succeeded)
+        self.sum_dirac_dfcoef_preparation.prepared.connect(self.on_sum_dirac_dfcoef_prepared)
+        for job in (self.sum_dirac_dfcoef_preparation, self.sum_dirac_dfcoef_process, self.sum_dirac_dfcoef_pool_job):
+            job.failed.connect(self.on_sum_dirac_dfcoef_failed)
+            job.canceled.connect(self.on_sum_dirac_dfcoef_canceled)
+
+        layout = QVBoxLayout()
+        layout.setContentsMargins(0, 0, 0, 0)
+        layout.addWidget(self.table_query_bar)
+        layout.addWidget(self.table_widget)
+        layout.addWidget(self.progress_widget)
+        layout.addWidget(self.table_summary)
+        layout.addWidget(self.save_button)
+        self.setLayout(layout)
+
+    def is_empty(self) -> bool:
+        return len(self.table_data.mo_data) == 0 and not self.is_running()
+
+    def is_running(self) -> bool:
+        return (
+            self.sum_dirac_dfcoef_preparation.is_running()
+            or self.sum_dirac_dfcoef_process.is_running()
+            or self.sum_dirac_dfcoef_pool_job.is_running()
+        )
+
+    def set_title(self, title: str):
+        self.title = title
+        self.title_changed.emit(title)
+
+    def create_input(self) -> str:
+        user_input = self.table_summary.user_input
+        with trace_span("create input"):
+            return create_dcaspt2_input(
+                self.table_data,
+                self.table_data.spaces,
+                total_symmetry=user_input.totsym_number.get_value(),
+                dirac_ver=user_input.dirac_ver_number.get_value(),
+                ras1_max_hole=user_input.ras1_max_hole_number.get_value(),
+                ras3_max_electron=user_input.ras3_max_electron_number.get_value(),
+            )
+
+    def load_sum_dirac_dfcoef(self, file_path: Path):
+        """Load the sum_dirac_dfcoef output synchronously.
+
+        Raises:
+            Exception: If the file is not a correct sum_dirac_dfcoef output.
+        """
+        self.cancel_sum_dirac_dfcoef()
+        self.table_widget.reload(file_path)
+        self.preview_spaces = None
+        remove_file(self.scratch_path)
+        self.scratch_path = None
+        self.sum_dirac_dfcoef_path = file_path
+        self.set_title(file_path.name)
+
+    def load_table_data_binary(self, file_path: Path):
+        """Load the binary table file.
+
+        Raises:
+            Exception: If the file is not a correct binary table file.
+        """
+        self.cancel_sum_dirac_dfcoef()
+        self.table_widget.load_binary(file_path)
+        self.preview_spaces = None
+        remove_file(self.scratch_path)
+        self.scratch_path = None
+        self.sum_dirac_dfcoef_path = file_path
+        self.set_title(file_path.name)
+
+    def load_session(self, file_path: Path) -> Session:
+        """Load the session file (the table, the orbital spaces and the user input).
+        The color theme of the returned session is applied by MainWindow, because it is shared by all documents.
+
+        Raises:
+            Exception: If the file is not a correct session file.
+        """
+        self.cancel_sum_dirac_dfcoef()
+        session = self.table_widget.restore_session(file_path)
+        self.table_summary.user_input.set_input_values(session.user_input)
+        self.preview_spaces = None
+        remove_file(self.scratch_path)
+        self.scratch_path = None
+        self.sum_dirac_dfcoef_path = file_path
+        self.set_title(session.title or file_path.name)
+        return session
+
+    def can_save_table(self) -> bool:
+        # The preview has no AO columns, so it is not saved
+        return self.sum_dirac_dfcoef_path is not None and self.sum_dirac_dfcoef_path.exists()
+
+    def save_session(self, file_path: Path, color_theme: str):
+        session = Session(
+            title=self.title,
+            user_input=self.table_summary.user_input.get_input_values(),
+            color_theme=color_theme,
+            column_widths=self.table_widget.get_column_widths(),
+        )
+        write_session(file_path, self.table_data, session)
+
+    def save_table(self, file_path: Path):
+        """Save the current table as the binary table file if the suffix is TABLE_DATA_BINARY_SUFFIX,
+        otherwise as the sum_dirac_dfcoef output."""
+        source_path = self.sum_dirac_dfcoef_path
+        if source_path is None:
+            msg = "The table is not loaded from a sum_dirac_dfcoef output or a binary table file."
+            raise ValueError(msg)
+        source_format = probe_file(source_path).format_name
+        if file_path.suffix == TABLE_DATA_BINARY_SUFFIX:
+            if source_format == TABLE_DATA_BINARY_FORMAT:
+                shutil.copy(source_path, file_path)
+            else:
+                write_table_data_binary(self.table_data, file_path)
+        elif source_format == SUM_DIRAC_DFCOEF_FORMAT:
+            shutil.copy(source_path, file_path)
+        else:
+            create_sum_dirac_dfcoef_rows(self.table_data).write(file_path)
+
+    def run_sum_dirac_dfcoef(self, dirac_output: Path):
+        """Run sum_dirac_dfcoef in the background and load the result when it has finished.
+        The version check and the cache lookup also run in the background (SumDiracDfcoefPreparation),
+        an error of them (e.g. too old sum_dirac_dfcoef) is reported by error_occurred."""
+        # Cancel the previous run if it is still running
+        self.cancel_sum_dirac_dfcoef()
+        settings = get_settings()
+        pool = None
+        if settings.sum_dirac_dfcoef_run_mode.use_pool():
+            pool = get_sum_dirac_dfcoef_pool(settings.multi_process_input.multi_process_num)
+        self.running_dirac_output = dirac_output
+        self.progress_widget.start(dirac_output)
+        self.sum_dirac_dfcoef_preparation.start(dirac_output, pool, create_sum_dirac_dfcoef_cache())
+        # sum_dirac_dfcoef is running in another process, show the preview in the meantime
+        self.load_preview(dirac_output)
+        self.title_changed.emit(f"{dirac_output.name} (running)")
+
+    def on_sum_dirac_dfcoef_prepared(self, plan: SumDiracDfcoefRunPlan):
+        self.running_scratch_path = create_scratch_file_path()
+        if plan.cached_path is not None:
+            # The same DIRAC output has already been analysed, skip running sum_dirac_dfcoef
+            try:
+                shutil.copyfile(plan.cached_path, self.running_scratch_path)
+            except OSError as e:
+                # The entry may be evicted by another instance after the lookup, or the cache may not be readable
+                debug_print(f"Cannot read the cached sum_dirac_dfcoef output, run sum_dirac_dfcoef instead: {e}")
+            else:
+                self.progress_widget.finish()
+                self.on_sum_dirac_dfcoef_succeeded(self.running_scratch_path)
+                return
+        self.cache_key = plan.cache_key
+        if plan.pool is not None:
+            self.sum_dirac_dfcoef_pool_job.start(plan.pool, plan.dirac_output)
+        else:
+            num_process = max(1, get_settings().multi_process_input.multi_process_num)
+            self.sum_dirac_dfcoef_process.start(plan.dirac_output, self.running_scratch_path, num_process)
+
+    def load_preview(self, dirac_output: Path):
+        """Show the energies and the default orbital spaces read directly from the DIRAC output.
+        Nothing is changed if the DIRAC output cannot be read, then the table is shown when sum_dirac_dfcoef finishes.
+        """
+        try:
+            preview = read_dirac_output_preview(dirac_output)
+        except Exception as e:
+            debug_print(f"Cannot read the preview of {dirac_output}: {e}")
+            return
+        try:
+            self.table_widget.load_rows(preview.header_rows, preview.rows)
+        except Exception as e:
+            debug_print(f"Cannot load the preview of {dirac_output}: {e}")
+            # table_data may be loaded partially, show an empty table instead
+            self.table_data.reset()
+            self.table_widget.table_model.reset_table()
+            self.preview_spaces = None
+            return
+        self.preview_spaces = bytes(self.table_data.spaces)
+        self.sum_dirac_dfcoef_path = None
+        self.set_title(f"{dirac_output.name} (preview)")
+
+    def get_edited_preview_spaces(self) -> Optional[Dict[Tuple[str, int], OrbitalSpace]]:
+        """Return the orbital spaces of the preview if the user has changed them, otherwise None"""
+        if self.preview_spaces is None or bytes(self.table_data.spaces) == self.preview_spaces:
+            return None
+        return self.table_data.get_spaces_by_mo()
+
+    def cancel_sum_dirac_dfcoef(self):
+        self.sum_dirac_dfcoef_preparation.cancel()
+        self.sum_dirac_dfcoef_process.cancel()
+        self.sum_dirac_dfcoef_pool_job.cancel()
+
+    def on_sum_dirac_dfcoef_pool_succeeded(self, result: SumDiracDfcoefRows):
+        # Write the result, it is used for saving and caching the sum_dirac_dfcoef output
+        if self.running_scratch_path is not None:
+            result.write(self.running_scratch_path)
+        self.finish_sum_dirac_dfcoef(lambda: self.table_widget.load_rows(result.header_rows, result.rows))
+
+    def on_sum_dirac_dfcoef_succeeded(self, output_path: Path):
+        self.finish_sum_dirac_dfcoef(lambda: self.table_widget.reload(output_path))
+
+    def finish_sum_dirac_dfcoef(self, load_table):
+        dirac_output = self.running_dirac_output
+        preview_spaces = self.get_edited_preview_spaces()
+        try:
+            load_table()
+        except Exception as e:
+            self.on_sum_dirac_dfcoef_failed(
+                f"An unexpected error has ocurred while loading the sum_dirac_dfcoef output.\n\
+file_path: {dirac_output}\n\n\ndetails: {e}"
+            )
+            return
+        self.preview_spaces = None
+        if preview_spaces is not None and not self.table_widget.restore_spaces(preview_spaces):
+            debug_print("The orbitals of the preview and sum_dirac_dfcoef are not same, use the default orbital spaces")
+        if self.cache_key is not None and self.running_scratch_path is not None:
+            # Store the result, so the same DIRAC output is not analysed again.
+            # Copying the output and evicting the old entries can take a while (e.g. a shared cache directory),
+            # so they run in a thread of QThreadPool. store skips silently if the scratch file is removed meanwhile.
+            cache = create_sum_dirac_dfcoef_cache()
+            cache_key, output_path = self.cache_key, self.running_scratch_path
+            QThreadPool.globalInstance().start(lambda: cache.store(cache_key, output_path))
+        # The previous result is no longer used
+        remove_file(self.scratch_path)
+        self.scratch_path = self.running_scratch_path
+        self.sum_dirac_dfcoef_path = self.running_scratch_path
+        self.running_scratch_path = None
+        self.cache_key = None
+        if dirac_output is not None:
+            self.set_title(dirac_output.name)
+
+    def on_sum_dirac_dfcoef_failed(self, err_msg: str):
+        self.on_sum_dirac_dfcoef_canceled()
+        self.error_occurred.emit(err_msg)
+
+    def on_sum_dirac_dfcoef_canceled(self):
+        remove_file(self.running_scratch_path)
+        self.running_scratch_path = None
+        self.cache_key = None
+        self.title_changed.emit(self.title)
+
+    def close_document(self):
+        """Kill sum_dirac_dfcoef if it is still running and remove the scratch files"""
+        self.cancel_sum_dirac_dfcoef()
+        remove_file(self.running_scratch_path)
+        remove_file(self.scratch_path)
+        self.running_scratch_path = None
+        self.scratch_path = None
+        self.sum_dirac_dfcoef_path = None
@@ -1,29 +1,40 @@
-import subprocess
-import sys
 from pathlib import Path
+from typing import List
 
-from PySide6.QtCore import QProcess, QSettings, Qt
+from PySide6.QtCore import QSettings, Qt
 from PySide6.QtGui import QDragEnterEvent, QDropEvent, QKeyEvent
-from PySide6.QtWidgets import QFileDialog, QMainWindow, QMessageBox, QPushButton, QVBoxLayout, QWidget
+from PySide6.QtWidgets import QFileDialog, QMainWindow, QMessageBox, QTabWidget, QVBoxLayout, QWidget
 
-from dcaspt2_input_generator.components.data import colors, table_data
+from dcaspt2_input_generator.components.data import colors
+from dcaspt2_input_generator.components.document import Document
 from dcaspt2_input_generator.components.menu_bar import MenuBar
-from dcaspt2_input_generator.components.table_summary import TableSummary
+from dcaspt2_input_generator.components.table_summary import UserInput
 from dcaspt2_input_generator.components.table_widget import TableWidget
+from dcaspt2_input_generator.controller.active_space_controller import ActiveSpaceController
 from dcaspt2_input_generator.controller.color_settings_controller import ColorSettingsController
 from dcaspt2_input_generator.controller.multi_process_controller import MultiProcessController
 from dcaspt2_input_generator.controller.save_default_settings_controller import SaveDefaultSettingsController
-from dcaspt2_input_generator.controller.widget_controller import WidgetController
-from dcaspt2_input_generator.utils.dir_info import dir_info
-from dcaspt2_input_generator.utils.settings import settings
-from dcaspt2_input_generator.utils.utils import create_ras_str, debug_print
+from dcaspt2_input_generator.controller.sweep_controller import SweepController
+from dcaspt2_input_generator.core.file_format import (
+    DIRAC_OUTPUT_FORMAT,
+    SESSION_FORMAT,
+    SUM_DIRAC_DFCOEF_FORMAT,
+    TABLE_DATA_BINARY_FORMAT,
+    probe_file,
+)
+from dcaspt2_input_generator.core.session import SESSION_SUFFIX
+from dcaspt2_input_generator.core.sum_dirac_dfcoef_pool import shutdown_sum_dirac_dfcoef_pool
+from dcaspt2_input_generator.core.table_data_binary import TABLE_DATA_BINARY_SUFFIX
+from dcaspt2_input_generator.utils.settings import get_settings
+from dcaspt2_input_generator.utils.tracing import trace_span
+from dcaspt2_input_generator.utils.utils import debug_print
 
 
 # Layout for the main window
 # File, Settings, About (menu bar)
-# message, AnimatedToggle (button)
-# TableWidget (table)
-# InputLayout (layout): inactive, active, secondary
+# QTabWidget: one Document (TableWidget, TableSummary, Save button) per tab
+# Each document has its own TableData and sum_dirac_dfcoef job,
+# so several outputs can be loaded and analysed at the same time.
 class MainWindow(QMainWindow):
     def __init__(self, parent=None):
         super().__init__(parent)
@@ -39,237 +50,164 @@ class MainWindow(QMainWindow):
         # Add drag and drop functionality
         self.setAcceptDrops(True)
 
-        # Set task runner
-        self.process = QProcess()
-        self.callback = None
         # Show the header bar
         self.menu_bar = MenuBar()
         self.menu_bar.open_action_dirac.triggered.connect(self.select_file_Dirac)
         self.menu_bar.open_action_dfcoef.triggered.connect(self.select_file_DFCOEF)
+        self.menu_bar.new_tab_action.triggered.connect(self.add_document)
         self.menu_bar.save_action_input.triggered.connect(self.save_input)
         self.menu_bar.save_action_dfcoef.triggered.connect(self.save_sum_dirac_dfcoef)
+        self.menu_bar.open_action_session.triggered.connect(self.select_file_session)
+        self.menu_bar.save_action_session.triggered.connect(self.save_session)
+        self.menu_bar.undo_action.triggered.connect(self.undo)
+        self.menu_bar.redo_action.triggered.connect(self.redo)
 
         # Body
-        self.table_widget = TableWidget()
-        self.table_summary = TableSummary()
-        # Add Save button
-        self.save_button = QPushButton("Save")
-        self.save_button.clicked.connect(self.save_input)
-
-        # Create an instance of WidgetController
-        self.widget_controller = WidgetController(self.table_summary, self.table_widget)
+        self.tab_widget = QTabWidget()
+        self.tab_widget.setTabsClosable(True)
+        self.tab_widget.setMovable(True)
+        self.tab_widget.tabCloseRequested.connect(self.close_document)
+        self.add_document()
+
+        settings = get_settings()
         self.color_settings_controller = ColorSettingsController(
-            self.table_widget, self.menu_bar.color_settings_action.color_settings_dialog
+            self.get_table_widgets, self.menu_bar.color_settings_action
+        )
+
+        self.active_space_controller = ActiveSpaceController(
+            lambda: self.current_document().table_widget,
+            self.menu_bar.active_space_action,
+            self.display_critical_error_message_box,
+        )
+
+        self.sweep_controller = SweepController(
+            self, self.current_document, self.menu_bar.sweep_action, self.display_critical_error_message_box
         )
 
         self.multi_process_controller = MultiProcessController(self.menu_bar.multi_process_action, settings)
 
         self.save_default_settings_controller = SaveDefaultSettingsController(
             color=colors,
-            user_input=self.table_summary.user_input,
+            get_user_input=self.get_current_user_input,
             multi_process_input=settings.multi_process_input,
             save_default_settings_action=self.menu_bar.save_default_settings_action,
         )
         # layout
         layout = QVBoxLayout()
         layout.addWidget(self.menu_bar)
-        layout.addWidget(self.table_widget)
-        layout.addWidget(self.table_summary)
-        layout.addWidget(self.save_button)
+        layout.addWidget(self.tab_widget)
 
         # Create a widget to hold the layout
         widget = QWidget()
         widget.setLayout(layout)
         self.setCentralWidget(widget)
 
+    def get_documents(self) -> List[Document]:
+        documents: List[Document] = []
+        for idx in range(self.tab_widget.count()):
+            document = self.tab_widget.widget(idx)
+            if isinstance(document, Document):
+                documents.append(document)
+        return documents
+
+    def get_table_widgets(self) -> List[TableWidget]:
+        return [document.table_widget for document in self.get_documents()]
+
+    def current_document(self) -> Document:
+        document = self.tab_widget.currentWidget()
+        if not isinstance(document, Document):
+            document = self.add_document()
+        return document
+
+    def get_current_user_input(self) -> UserInput:
+        return self.current_document().table_summary.user_input
+
+    def add_document(self) -> Document:
+        document = Document()
+        document.save_button.clicked.connect(self.save_input)
+        document.error_occurred.connect(self.display_critical_error_message_box)
+        document.title_changed.connect(lambda title: self.set_document_title(document, title))
+        idx = self.tab_widget.addTab(document, document.title)
+        self.tab_widget.setCurrentIndex(idx)
+        return document
+
+    def set_document_title(self, document: Document, title: str):
+        idx = self.tab_widget.indexOf(document)
+        if idx != -1:
+            self.tab_widget.setTabText(idx, title)
+
+    def get_document_for_new_file(self) -> Document:
+        # Reuse the current tab if nothing is loaded, otherwise open the file in a new tab
+        document = self.current_document()
+        if document.is_empty():
+            return document
+        return self.add_document()
+
+    def close_document(self, idx: int):
+        document = self.tab_widget.widget(idx)
+        self.tab_widget.removeTab(idx)
+        if isinstance(document, Document):
+            document.close_document()
+            document.deleteLater()
+        if self.tab_widget.count() == 0:
+            self.add_document()
+
+    def close_all_documents(self):
+        # Kill sum_dirac_dfcoef if it is still running and remove the scratch files
+        for document in self.get_documents():
+            document.close_document()
+
     def closeEvent(self, a0) -> None:
         # save settings when closing
         self.settings.setValue("geometry", self.saveGeometry())
         self.settings.setValue("windowState", self.saveState())
+        self.close_all_documents()
+        shutdown_sum_dirac_dfcoef_pool()
         return super().closeEvent(a0)
 
     def save_input(self):
-        def add_nelec(cur_nelec: int, rem_electrons: int) -> int:
-            if rem_electrons > 0:
-                cur_nelec += min(rem_electrons, 2)
-            return cur_nelec
-
-        # Create info for standard IVO input
-        # E1g,u or E1?
-        is_gerade_ungerade = True if table_data.header_info.spinor_num_info.keys() == {"E1g", "E1u"} else False
-        if is_gerade_ungerade:
-            nocc = {"E1g": 0, "E1u": 0}
-            nvcut = {"E1g": 0, "E1u": 0}
-        else:
-            nocc = {"E1": 0}
-            nvcut = {"E1": 0}
-        inact = 0
-        act = 0
-        sec = 0
-        elec = 0
-        idx_caspt2 = 0
-        ras1_list = []
-        ras2_list = []
-        ras3_list = []
-        rem_electrons = table_data.header_info.electron_number
-        is_cas = True
-        last_ras2_idx = -1
-        for idx in range(self.table_widget.rowCount()):
-            spinor_indices = [2 * idx_caspt2 + 1, 2 * idx_caspt2 + 2]  # 1 row = 2 spinors
-            item = self.table_widget.item(idx, 0)
-            color = item.background()
-            sym_str = item.text()
-
-            if color != colors.not_used.color:
-                idx_caspt2 += 1
-            if color == colors.inactive.color:
-                debug_print(f"{idx}, inactive")
-                inact += 2
-            elif color == colors.ras1.color:
-                debug_print(f"{idx}, ras1")
-                act += 2
-                ras1_list.extend(spinor_indices)
-                elec = add_nelec(elec, rem_electrons)
-                is_cas = False
-            elif color == colors.active.color:
-                debug_print(f"{idx}, active")
-                act += 2
-                ras2_list.extend(spinor_indices)
-                elec = add_nelec(elec, rem_electrons)
-                if last_ras2_idx not in (-1, idx - 1):
-                    is_cas = False
-                last_ras2_idx = idx
-            elif color == colors.ras3.color:
-                debug_print(f"{idx}, ras3")
-                act += 2
-                elec = add_nelec(elec, rem_electrons)
-                ras3_list.extend(spinor_indices)
-                is_cas = False
-            elif color == colors.secondary.color:
-                debug_print(f"{idx}, secondary")
-                sec += 2
-            # nocc, nvcut
-            if rem_electrons > 0:
-                nocc[sym_str] += 1
-            elif color != colors.not_used.color:
-                # Reset nvcut
-                for k in nvcut.keys():
-                    nvcut[k] = 0
-            else:
-                nvcut[sym_str] += 1
-            rem_electrons -= 2
-        totsym = self.table_summary.user_input.totsym_number.get_value()
-
-        output = f".ninact\n{inact}\n"
-        output += f".nact\n{act}\n"
-        output += f".nelec\n{elec}\n"
-        output += f".nsec\n{sec}\n"
-        output += f".caspt2_ciroots\n{totsym} 1\n"  # CASCI/CASPT2 root is fixed to 1
-        if is_gerade_ungerade:
-            output += f".noccg\n{nocc['E1g']}\n.noccu\n{nocc['E1u']}\n"
-            output += "" if sum(nvcut.values()) == 0 else f".nvcutg\n{nvcut['E1g']}\n.nvcutu\n{nvcut['E1u']}\n"
-        else:
-            output += f".nocc\n{nocc['E1']}\n"
-            output += "" if sum(nvcut.values()) == 0 else f".nvcut\n{nvcut['E1']}\n"
-        output += f".diracver\n{self.table_summary.user_input.dirac_ver_number.get_value()}\n"
-        output += "# NOTE: If you want to use this input to stand-alone version of DIRAC_CASPT2,\n"
-        output += "# you cannot specify IVO and CASCI or CASPT2 simultaneously.\n"
-        output += "# Please comment out subprograms depend on the calculation you want to run.\n"
-        output += ".subprograms\nIVO\nCASCI\nCASPT2\n"
-        if table_data.header_info.moltra_scheme is not None:
-            output += f".scheme\n{table_data.header_info.moltra_scheme}\n"  # Explicitly set MOLTRA scheme.
-
-        if not is_cas:
-            ras1_str = create_ras_str(sorted(ras1_list))
-            ras2_str = create_ras_str(sorted(ras2_list))
-            ras3_str = create_ras_str(sorted(ras3_list))
-            output += (
-                ""
-                if len(ras1_list) == 0
-                else ".ras1\n" + ras1_str + "\n" + self.table_summary.user_input.ras1_max_hole_number.text() + "\n"
-            )
-            output += "" if len(ras2_list) == 0 else ".ras2\n" + ras2_str + "\n"
-            output += (
-                ""
-                if len(ras3_list) == 0
-                else ".ras3\n" + ras3_str + "\n" + self.table_summary.user_input.ras3_max_electron_number.text() + "\n"
-            )
-        output += ".end\n"
+        output = self.current_document().create_input()
 
         # open dialog to save the file
         file_path, _ = QFileDialog.getSaveFileName(self, "Save dirac_caspt2 input File", "", "")
         if file_path:
-            with open(file_path, mode="w") as f:
+            with trace_span("input save", path=file_path), open(file_path, mode="w") as f:
                 f.write(output)
 
     def display_critical_error_message_box(self, message: str):
         QMessageBox.critical(self, "Error", message, QMessageBox.StandardButton.Ok, QMessageBox.StandardButton.Cancel)
 
-    def init_process(self):
-        self.process.finished.connect(self.command_finished_handler)
-
-        if self.process.state() == QProcess.ProcessState.Running:
-            self.process.kill()
-
-    def command_finished_handler(self):
-        if self.callback is not None:
-            self.callback()
-            self.callback = None
-        self.process.kill()
-
     def run_sum_dirac_dfcoef(self, file_path):
-        def create_command(command: str) -> str:
-            if sys.executable:
-                return f"{sys.executable} -m {command}"
-            return command
-
-        def check_version():
-            command = create_command("sum_dirac_dfcoef -v")
-            p = subprocess.run(
-                command.split(),
-                check=True,
-                stdout=subprocess.PIPE,
-            )
-            output = p.stdout.decode("utf-8")
-            # v4.0.0 or later is required
-            major_version = int(output.split(".")[0])
-            if major_version < 4:
-                msg = f"The version of sum_dirac_dfcoef is too old.\n\
-sum_dirac_dfcoef version: {output}\n\
-Please update sum_dirac_dfcoef to v4.0.0 or later with `pip install -U sum_dirac_dfcoef`"
-                raise Exception(msg)
-
-        def run_command():
-            num_process = max(1, settings.multi_process_input.multi_process_num)
-            command = create_command(
-                f'sum_dirac_dfcoef -i "{file_path}" -d 3 -c -o "{dir_info.sum_dirac_dfcoef_path}" -j {num_process}'
-            )
-            self.process.startCommand(command)
-            if self.process.exitCode() != 0:
-                data_stderr = self.process.readAllStandardError().data()
-                if isinstance(data_stderr, (bytes, bytearray)):
-                    decoded_stderr = data_stderr.decode()
-                else:
-                    decoded_stderr = data_stderr.tobytes().decode()
-                err_msg = f"An error has ocurred while running the sum_dirac_dfcoef program.\n\
-Please check the output file. path: {file_path}\nExecuted command: {command}\n\
-all stderr: {decoded_stderr}"
-                raise subprocess.CalledProcessError(self.process.exitCode(), command, "", err_msg)
-
-        self.init_process()
-        check_version()
-        run_command()
+        document = self.get_document_for_new_file()
+        document.run_sum_dirac_dfcoef(Path(file_path))
+
+    def open_file(self, file_path: Path):
+        """Load a sum_dirac_dfcoef output or a binary table file, or run sum_dirac_dfcoef for a DIRAC output.
+        The format is detected from the head of the file, so the file is not parsed as a wrong format first.
+
+        Raises:
+            ValueError: If the format of the file is unknown.
+        """
+        probe = probe_file(file_path)
+        debug_print(f"open_file: {file_path}, format: {probe.format_name}, facts: {probe.facts}")
+        if probe.format_name == SUM_DIRAC_DFCOEF_FORMAT:
+            self.reload_table(file_path)
+        elif probe.format_name == TABLE_DATA_BINARY_FORMAT:
+            self.get_document_for_new_file().load_table_data_binary(file_path)
+        elif probe.format_name == SESSION_FORMAT:
+            session = self.get_document_for_new_file().load_session(file_path)
+            self.color_settings_controller.set_color_theme(session.color_theme)
+        elif probe.format_name == DIRAC_OUTPUT_FORMAT:
+            self.run_sum_dirac_dfcoef(file_path)
+        else:
+            msg = "The file is not a DIRAC output, a sum_dirac_dfcoef output, a binary table file or a session file."
+            raise ValueError(msg)
 
     def select_file_Dirac(self):
         file_path, _ = QFileDialog.getOpenFileName(self, "SELECT A DIRAC OUTPUT FILE", "", "Output file (*.out)")
         if file_path:
             try:
-                self.callback = lambda: self.table_widget.reload(dir_info.sum_dirac_dfcoef_path)
-                self.run_sum_dirac_dfcoef(file_path)
-            except subprocess.CalledProcessError as e:
-                err_msg = f"It seems that the sum_dirac_dfcoef program has failed.\n\
-Please check the output file. Is this DIRAC output file?\npath: {file_path}\n\n\ndetails: {e.stderr}"
-                self.display_critical_error_message_box(err_msg)
+                self.open_file(Path(file_path))
             except Exception as e:
                 err_msg = f"An unexpected error has ocurred.\n\
 file_path: {file_path}\n\n\ndetails: {e}"
@@ -277,18 +215,53 @@ file_path: {file_path}\n\n\ndetails: {e}"
 
     def select_file_DFCOEF(self):
         file_path, _ = QFileDialog.getOpenFileName(
-            self, "SELECT A sum_dirac_dfcoef OUTPUT FILE", "", "Output file (*.out)"
+            self,
+            "SELECT A sum_dirac_dfcoef OUTPUT FILE",
+            "",
+            f"Output file (*.out);;Binary table file (*{TABLE_DATA_BINARY_SUFFIX});;All files (*)",
         )
         if file_path:
             try:
-                self.reload_table(Path(file_path))
+                self.open_file(Path(file_path))
             except Exception as e:
                 err_msg = f"An unexpected error has ocurred.\n\
 file_path: {file_path}\n\n\ndetails: {e}"
                 self.display_critical_error_message_box(err_msg)
 
+    def select_file_session(self):
+        file_path, _ = QFileDialog.getOpenFileName(
+            self, "SELECT A SESSION FILE", "", f"Session file (*{SESSION_SUFFIX})"
+        )
+        if file_path:
+            try:
+                self.open_file(Path(file_path))
+            except Exception as e:
+                err_msg = f"An unexpected error has ocurred.\n\
+file_path: {file_path}\n\n\ndetails: {e}"
+                self.display_critical_error_message_box(err_msg)
+
+    def save_session(self):
+        # Save the table, the orbital spaces, the user input and the color theme of the current document
+        document = self.current_document()
+        if not document.can_save_table():
+            QMessageBox.critical(
+                self,
+                "Error",
+                "There is no table to save.\n\
+Please open a DIRAC output and wait until sum_dirac_dfcoef finishes, or open a sum_dirac_dfcoef output.",
+            )
+            return
+        file_path, _ = QFileDialog.getSaveFileName(
+            self, caption="Save session file", filter=f"Session file (*{SESSION_SUFFIX})"
+        )
+        if not file_path:
+            return
+        if not file_path.endswith(SESSION_SUFFIX):
+            file_path += SESSION_SUFFIX
+        document.save_session(Path(file_path), colors.color_type)
+
     def save_sum_dirac_dfcoef(self):
-        if not dir_info.sum_dirac_dfcoef_path.exists():
+        if not self.current_document().can_save_table():
             QMessageBox.critical(
                 self,
                 "Error",
@@ -296,19 +269,29 @@ file_path: {file_path}\n\n\ndetails: {e}"
 Please run the sum_dirac_dfcoef program first.",
             )
             return
-        file_path, _ = QFileDialog.getSaveFileName(
-            self, caption="Save sum_dirac_dfcoef.out file as different name", filter="Output file (*.out)"
+        file_path, selected_filter = QFileDialog.getSaveFileName(
+            self,
+            caption="Save sum_dirac_dfcoef.out file as different name",
+            filter=f"Output file (*.out);;Binary table file (*{TABLE_DATA_BINARY_SUFFIX})",
         )
-        if not file_path.endswith(".out"):
-            file_path += ".out"
-        if file_path:
-            import shutil
+        if not file_path:
+            return
+        suffix = TABLE_DATA_BINARY_SUFFIX if TABLE_DATA_BINARY_SUFFIX in selected_filter else ".out"
+        if not file_path.endswith(suffix):
+            file_path += suffix
+        # Copy the sum_dirac_dfcoef.out file to the file_path (or convert it to the selected format)
+        self.current_document().save_table(Path(file_path))
+
+    def undo(self):
+        # Undo the last orbital space edit of the current document
+        self.current_document().table_widget.undo()
 
-            # Copy the sum_dirac_dfcoef.out file to the file_path
-            shutil.copy(dir_info.sum_dirac_dfcoef_path, file_path)
+    def redo(self):
+        self.current_document().table_widget.redo()
 
     def reload_table(self, filepath: Path):
-        self.table_widget.reload(filepath)
+        document = self.get_document_for_new_file()
+        document.load_sum_dirac_dfcoef(filepath)
 
     def dragEnterEvent(self, event: QDragEnterEvent) -> None:
         if event.mimeData().hasText():
@@ -327,21 +310,18 @@ Please check your dropped file.",
                 QMessageBox.StandardButton.Ok,
                 QMessageBox.StandardButton.Cancel,
             )
+            return
         try:
-            self.table_widget.reload(filepath)
+            self.open_file(filepath)
         except Exception:
-            try:
-                self.callback = lambda: self.table_widget.reload(dir_info.sum_dirac_dfcoef_path)
-                self.run_sum_dirac_dfcoef(filepath)
-            except Exception:
-                QMessageBox.critical(
-                    self,
-                    "Error",
-                    "We cannot load the file properly.\n\
+            QMessageBox.critical(
+                self,
+                "Error",
+                "We cannot load the file properly.\n\
 Please check your dropped file.",
-                    QMessageBox.StandardButton.Ok,
-                    QMessageBox.StandardButton.Cancel,
-                )
+                QMessageBox.StandardButton.Ok,
+                QMessageBox.StandardButton.Cancel,
+            )
 
     def keyPressEvent(self, event: QKeyEvent):
         super().keyPressEvent(event)
@@ -363,6 +343,21 @@ Please check your dropped file.",
             and event.key() == Qt.Key.Key_O
         ):
             self.select_file_DFCOEF()
+        # Ctrl + Z
+        elif event.modifiers() == Qt.KeyboardModifier.ControlModifier and event.key() == Qt.Key.Key_Z:
+            self.undo()
+        # Ctrl + Shift + Z or Ctrl + Y
+        elif (
+            event.modifiers() == Qt.KeyboardModifier.ControlModifier | Qt.KeyboardModifier.ShiftModifier
+            and event.key() == Qt.Key.Key_Z
+        ) or (event.modifiers() == Qt.KeyboardModifier.ControlModifier and event.key() == Qt.Key.Key_Y):
+            self.redo()
+        # Ctrl + T
+        elif event.modifiers() == Qt.KeyboardModifier.ControlModifier and event.key() == Qt.Key.Key_T:
+            self.add_document()
+        # Ctrl + W
+        elif event.modifiers() == Qt.KeyboardModifier.ControlModifier and event.key() == Qt.Key.Key_W:
+            self.close_document(self.tab_widget.currentIndex())
         # Ctrl + ,
         elif event.modifiers() == Qt.KeyboardModifier.ControlModifier and event.key() == Qt.Key.Key_Comma:
             self.menu_bar.color_settings_action.openColorSettingsDialog()
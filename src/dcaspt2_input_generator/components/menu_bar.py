@@ -1,9 +1,11 @@
-from dcaspt2_input_generator.components.color_settings import ColorSettingsDialogAction
-from dcaspt2_input_generator.components.multi_process_settings import MultiProcessDialogAction
 from PySide6.QtCore import Signal
 from PySide6.QtGui import QAction
 from PySide6.QtWidgets import QMenuBar
 
+from dcaspt2_input_generator.components.active_space_settings import ActiveSpaceStrategyDialogAction
+from dcaspt2_input_generator.components.color_settings import ColorSettingsDialogAction
+from dcaspt2_input_generator.components.multi_process_settings import MultiProcessDialogAction
+
 
 class SaveDefaultSettingsAction(QAction):
     signal_save_default_settings = Signal()
@@ -26,9 +28,10 @@ class AboutAction(QAction):
         self.triggered.connect(self.about)
 
     def about(self):
-        from dcaspt2_input_generator.__about__ import __version__
         from PySide6.QtWidgets import QMessageBox, QWidget
 
+        from dcaspt2_input_generator.__about__ import __version__
+
         msg = f"Version: {__version__}"
         QMessageBox.about(QWidget(), "Version info", msg)
 
@@ -41,6 +44,8 @@ class MenuBar(QMenuBar):
     def init_UI(self):
         # Create the menu bar
         self.file_menu = self.addMenu("File")
+        self.new_tab_action = QAction("New tab (Ctrl+T)", self)
+        self.file_menu.addAction(self.new_tab_action)
         self.open_action_dirac = QAction("Open with DIRAC output (Ctrl+O)", self)
         self.file_menu.addAction(self.open_action_dirac)
         self.open_action_dfcoef = QAction("Open with sum_dirac_dfcoef output (Ctrl+Shift+O)", self)
@@ -49,6 +54,22 @@ class MenuBar(QMenuBar):
         self.file_menu.addAction(self.save_action_input)
         self.save_action_dfcoef = QAction("Save sum_dirac_dfcoef file (Ctrl+Shift+S)", self)
         self.file_menu.addAction(self.save_action_dfcoef)
+        self.open_action_session = QAction("Open session", self)
+        self.file_menu.addAction(self.open_action_session)
+        self.save_action_session = QAction("Save session", self)
+        self.file_menu.addAction(self.save_action_session)
+
+        self.file_menu = self.addMenu("Edit")
+        self.undo_action = QAction("Undo (Ctrl+Z)", self)
+        self.file_menu.addAction(self.undo_action)
+        self.redo_action = QAction("Redo (Ctrl+Shift+Z)", self)
+        self.file_menu.addAction(self.redo_action)
+
+        self.file_menu = self.addMenu("Active space")
+        self.active_space_action = ActiveSpaceStrategyDialogAction()
+        self.file_menu.addAction(self.active_space_action)
+        self.sweep_action = QAction("Sweep active spaces", self)
+        self.file_menu.addAction(self.sweep_action)
 
         self.file_menu = self.addMenu("Settings")
         self.color_settings_action = ColorSettingsDialogAction()
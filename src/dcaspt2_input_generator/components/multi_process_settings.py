@@ -1,10 +1,12 @@
 import os
+from typing import Optional
 
-from dcaspt2_input_generator.utils.settings import settings
 from PySide6.QtCore import Signal
 from PySide6.QtGui import QAction
 from PySide6.QtWidgets import QDialog, QSpinBox, QVBoxLayout
 
+from dcaspt2_input_generator.utils.settings import get_settings
+
 
 class MultiProcessSettingDialog(QDialog):
     multi_process_changed = Signal()
@@ -20,7 +22,7 @@ class MultiProcessSettingDialog(QDialog):
         self.resize(400, 50)
         self.multi_process_spin_box = QSpinBox()
         self.multi_process_spin_box.setRange(1, cpu_count)
-        self.multi_process_spin_box.setValue(settings.multi_process_input.multi_process_num)
+        self.multi_process_spin_box.setValue(get_settings().multi_process_input.multi_process_num)
         self.multi_process_spin_box.valueChanged.connect(self.onMultiProcessDialogChanged)
 
         layout = QVBoxLayout()
@@ -32,14 +34,23 @@ class MultiProcessSettingDialog(QDialog):
 
 
 class MultiProcessDialogAction(QAction):
+    multi_process_changed = Signal()
+
     def __init__(self):
         super().__init__()
         self.init_UI()
 
     def init_UI(self):
-        self.multi_process_settings = MultiProcessSettingDialog()
+        # The dialog is created when it is opened for the first time to reduce the startup time
+        self.multi_process_settings: Optional[MultiProcessSettingDialog] = None
         self.setText("Multi Process Settings")
         self.triggered.connect(self.openMultiProcessDialogSettings)
 
+    def get_dialog(self) -> MultiProcessSettingDialog:
+        if self.multi_process_settings is None:
+            self.multi_process_settings = MultiProcessSettingDialog()
+            self.multi_process_settings.multi_process_changed.connect(self.multi_process_changed)
+        return self.multi_process_settings
+
     def openMultiProcessDialogSettings(self):
-        self.multi_process_settings.exec()
+        self.get_dialog().exec()
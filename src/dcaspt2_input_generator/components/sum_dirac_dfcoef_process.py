@@ -0,0 +1,339 @@
+import os
+from concurrent.futures import Future
+from dataclasses import dataclass
+from pathlib import Path
+from typing import List, Optional, Union
+
+from PySide6.QtCore import QElapsedTimer, QObject, QProcess, QThreadPool, QTimer, Signal
+from PySide6.QtWidgets import QHBoxLayout, QLabel, QProgressBar, QPushButton, QWidget
+
+from dcaspt2_input_generator.core.sum_dirac_dfcoef_cache import SumDiracDfcoefCache
+from dcaspt2_input_generator.core.sum_dirac_dfcoef_pool import (
+    SumDiracDfcoefPool,
+    SumDiracDfcoefRows,
+    shutdown_sum_dirac_dfcoef_pool,
+)
+from dcaspt2_input_generator.core.sum_dirac_dfcoef_runner import (
+    SUM_DIRAC_DFCOEF_ANALYSIS_OPTIONS,
+    check_sum_dirac_dfcoef_version,
+    create_sum_dirac_dfcoef_command,
+    create_sum_dirac_dfcoef_options,
+)
+from dcaspt2_input_generator.utils.tracing import NullSpan, TraceSpan, trace_async_span
+
+
+@dataclass
+class SumDiracDfcoefRunPlan:
+    """The result of SumDiracDfcoefPreparation. cached_path is None if the DIRAC output has not been analysed yet."""
+
+    dirac_output: Path
+    pool: Optional[SumDiracDfcoefPool]
+    version: str
+    cache_key: str
+    cached_path: Optional[Path]
+
+
+# SumDiracDfcoefPreparation checks the version of sum_dirac_dfcoef and looks up the cache before running it.
+# Both can take seconds (the version check starts python or the workers of the pool,
+# and the cache key is the hash of the whole DIRAC output), so they run in a thread of QThreadPool.
+# A canceled or replaced preparation is not stopped, but its result is discarded.
+class SumDiracDfcoefPreparation(QObject):
+    output_received = Signal(str)
+    prepared = Signal(object)  # SumDiracDfcoefRunPlan
+    failed = Signal(str)  # error message
+    canceled = Signal()
+    thread_done = Signal(int, object, str)  # emitted from the thread (generation, plan or None, error message)
+
+    def __init__(self, parent=None):
+        super().__init__(parent)
+        self.thread_done.connect(self.on_thread_done)
+        self.generation = 0
+        self.running = False
+
+    def is_running(self) -> bool:
+        return self.running
+
+    def start(self, dirac_output: Path, pool: Optional[SumDiracDfcoefPool], cache: SumDiracDfcoefCache) -> None:
+        if self.is_running():
+            self.cancel()
+        self.generation += 1
+        generation = self.generation
+        self.running = True
+        self.output_received.emit("Checking the version of sum_dirac_dfcoef and the cache")
+        QThreadPool.globalInstance().start(lambda: self.prepare(generation, dirac_output, pool, cache))
+
+    def cancel(self) -> None:
+        if not self.is_running():
+            return
+        self.generation += 1
+        self.running = False
+        self.canceled.emit()
+
+    def prepare(
+        self, generation: int, dirac_output: Path, pool: Optional[SumDiracDfcoefPool], cache: SumDiracDfcoefCache
+    ) -> None:
+        # Called in the thread of QThreadPool, don't touch the widgets here
+        plan: Optional[SumDiracDfcoefRunPlan] = None
+        err_msg = ""
+        try:
+            version = pool.check_version() if pool is not None else check_sum_dirac_dfcoef_version()
+            cache_key = cache.create_key(dirac_output, version, SUM_DIRAC_DFCOEF_ANALYSIS_OPTIONS)
+            plan = SumDiracDfcoefRunPlan(dirac_output, pool, version, cache_key, cache.get(cache_key))
+        except Exception as e:
+            err_msg = f"An error has ocurred before running the sum_dirac_dfcoef program.\n\
+path: {dirac_output}\n\n\ndetails: {e}"
+        try:
+            self.thread_done.emit(generation, plan, err_msg)
+        except RuntimeError:
+            pass  # The document has been closed while preparing
+
+    def on_thread_done(self, generation: int, plan: Optional[SumDiracDfcoefRunPlan], err_msg: str) -> None:
+        if generation != self.generation:
+            return  # canceled or replaced by the next preparation
+        self.running = False
+        if plan is None:
+            self.failed.emit(err_msg)
+        else:
+            self.prepared.emit(plan)
+
+
+# SumDiracDfcoefProcess runs sum_dirac_dfcoef asynchronously, so the event loop is not blocked
+# while the DIRAC output is analysed.
+# The result is written to a temporary file and moved to output_path only if sum_dirac_dfcoef succeeds,
+# so a canceled or failed run never overwrites the previous result.
+class SumDiracDfcoefProcess(QObject):
+    output_received = Signal(str)  # stdout or stderr of sum_dirac_dfcoef (streamed)
+    succeeded = Signal(object)  # Path of the sum_dirac_dfcoef output
+    failed = Signal(str)  # error message
+    canceled = Signal()
+
+    def __init__(self, parent=None):
+        super().__init__(parent)
+        self.process = QProcess(self)
+        self.process.readyReadStandardOutput.connect(self.read_stdout)
+        self.process.readyReadStandardError.connect(self.read_stderr)
+        self.process.finished.connect(self.on_finished)
+        self.process.errorOccurred.connect(self.on_error_occurred)
+        self.dirac_output: Optional[Path] = None
+        self.output_path = Path()
+        self.running_output_path = Path()
+        self.command: List[str] = []
+        self.stderr_chunks: List[str] = []
+        self.is_canceled = False
+        self.trace: Union[TraceSpan, NullSpan] = NullSpan()
+
+    def is_running(self) -> bool:
+        return self.process.state() != QProcess.ProcessState.NotRunning
+
+    def start(self, dirac_output: Path, output_path: Path, num_process: int) -> None:
+        if self.is_running():
+            self.cancel()
+        self.dirac_output = dirac_output
+        self.output_path = output_path
+        self.running_output_path = output_path.with_name(output_path.name + ".running")
+        self.stderr_chunks = []
+        self.is_canceled = False
+        self.command = create_sum_dirac_dfcoef_command(
+            create_sum_dirac_dfcoef_options(dirac_output, self.running_output_path, num_process)
+        )
+        self.trace = trace_async_span("sum_dirac_dfcoef run", dirac_output=str(dirac_output), mode="subprocess")
+        self.process.start(self.command[0], self.command[1:])
+
+    def cancel(self) -> None:
+        if not self.is_running():
+            return
+        self.is_canceled = True
+        self.process.kill()
+        # Wait for the child process to exit, so that it does not remain as a zombie process
+        self.process.waitForFinished(3000)
+
+    def read_stdout(self) -> None:
+        text = self.decode(self.process.readAllStandardOutput().data())
+        if text:
+            self.output_received.emit(text)
+
+    def read_stderr(self) -> None:
+        text = self.decode(self.process.readAllStandardError().data())
+        if text:
+            self.stderr_chunks.append(text)
+            self.output_received.emit(text)
+
+    def on_finished(self, exit_code: int, exit_status: QProcess.ExitStatus) -> None:
+        # Read the rest of the output before checking the result
+        self.read_stdout()
+        self.read_stderr()
+        self.trace.end(exit_code=exit_code, canceled=self.is_canceled)
+        running_output_path = self.running_output_path
+        if self.is_canceled:
+            self.remove_file(running_output_path)
+            self.canceled.emit()
+        elif exit_status == QProcess.ExitStatus.NormalExit and exit_code == 0 and running_output_path.exists():
+            os.replace(running_output_path, self.output_path)
+            self.succeeded.emit(self.output_path)
+        else:
+            self.remove_file(running_output_path)
+            status = "crashed" if exit_status == QProcess.ExitStatus.CrashExit else f"exit code: {exit_code}"
+            self.failed.emit(self.create_error_message(status))
+
+    def on_error_occurred(self, error: QProcess.ProcessError) -> None:
+        # finished signal is not emitted if the process cannot be started
+        if error == QProcess.ProcessError.FailedToStart:
+            self.trace.end(error="failed to start")
+            self.failed.emit(self.create_error_message(f"failed to start ({self.process.errorString()})"))
+
+    def create_error_message(self, status: str) -> str:
+        return f"An error has ocurred while running the sum_dirac_dfcoef program ({status}).\n\
+Please check the output file. Is this DIRAC output file?\npath: {self.dirac_output}\n\
+Executed command: {' '.join(self.command)}\n\n\nall stderr: {''.join(self.stderr_chunks)}"
+
+    @staticmethod
+    def decode(data) -> str:
+        if isinstance(data, (bytes, bytearray)):
+            return data.decode(errors="replace")
+        return data.tobytes().decode(errors="replace")
+
+    @staticmethod
+    def remove_file(path: Path) -> None:
+        try:
+            os.remove(path)
+        except OSError:
+            pass
+
+
+# SumDiracDfcoefPoolJob runs sum_dirac_dfcoef in the process pool (sum_dirac_dfcoef_run_mode = "pool")
+# and has the same signals as SumDiracDfcoefProcess.
+# The result is returned as SumDiracDfcoefRows instead of a file.
+# Cancel stops a running analysis by killing the workers of the pool (see SumDiracDfcoefPool.cancel).
+class SumDiracDfcoefPoolJob(QObject):
+    output_received = Signal(str)
+    succeeded = Signal(object)  # SumDiracDfcoefRows
+    failed = Signal(str)  # error message
+    canceled = Signal()
+    future_done = Signal(object)  # emitted from the thread of the pool, handled in the main thread
+
+    def __init__(self, parent=None):
+        super().__init__(parent)
+        self.future_done.connect(self.on_future_done)
+        self.dirac_output: Optional[Path] = None
+        self.pool: Optional[SumDiracDfcoefPool] = None
+        self.future: Optional[Future[SumDiracDfcoefRows]] = None
+        self.trace: Union[TraceSpan, NullSpan] = NullSpan()
+
+    def is_running(self) -> bool:
+        return self.future is not None
+
+    def start(self, pool: SumDiracDfcoefPool, dirac_output: Path) -> None:
+        if self.is_running():
+            self.cancel()
+        self.dirac_output = dirac_output
+        self.pool = pool
+        self.trace = trace_async_span("sum_dirac_dfcoef run", dirac_output=str(dirac_output), mode="pool")
+        future = pool.submit(dirac_output)
+        self.future = future
+        future.add_done_callback(self.future_done.emit)
+
+    def cancel(self) -> None:
+        if self.future is None:
+            return
+        future = self.future
+        self.future = None
+        if self.pool is not None:
+            self.pool.cancel(future)
+        self.trace.end(canceled=True)
+        self.canceled.emit()
+
+    def on_future_done(self, future: "Future[SumDiracDfcoefRows]") -> None:
+        # concurrent.futures.process (multiprocessing) has already been imported by the pool
+        from concurrent.futures.process import BrokenProcessPool  # noqa: PLC0415
+
+        if future is not self.future:
+            return  # canceled or replaced by the next job
+        self.future = None
+        self.trace.end()
+        if future.cancelled():
+            # Not canceled by this job, the pool has been shut down (e.g. another job has broken the pool)
+            self.failed.emit(f"The process pool for sum_dirac_dfcoef has been shut down.\npath: {self.dirac_output}")
+            return
+        try:
+            self.succeeded.emit(future.result())
+        except BrokenProcessPool as e:
+            # A worker has been killed (e.g. out of memory), the pool will be recreated at the next run
+            shutdown_sum_dirac_dfcoef_pool()
+            self.failed.emit(
+                f"The process pool for sum_dirac_dfcoef is broken.\npath: {self.dirac_output}\n\n\ndetails: {e!r}"
+            )
+        except Exception as e:
+            err_msg = f"An error has ocurred while running the sum_dirac_dfcoef program.\n\
+Please check the output file. Is this DIRAC output file?\npath: {self.dirac_output}\n\n\ndetails: {e!r}"
+            self.failed.emit(err_msg)
+
+
+# SumDiracDfcoefProgressWidget shows the progress of sum_dirac_dfcoef in the document.
+# It is not a modal dialog, so other documents can be used while sum_dirac_dfcoef is running.
+# sum_dirac_dfcoef does not report the percentage of the progress,
+# so the widget shows a busy indicator, the elapsed time and the last line of the output.
+class SumDiracDfcoefProgressWidget(QWidget):
+    canceled = Signal()
+
+    def __init__(self, parent: Optional[QWidget] = None):
+        super().__init__(parent)
+        self.dirac_output: Optional[Path] = None
+        self.last_line = ""
+        self.elapsed_timer = QElapsedTimer()
+        self.update_timer = QTimer(self)
+        self.init_UI()
+
+    def init_UI(self):  # noqa: N802 (the same name as the other widgets)
+        self.label = QLabel()
+        self.progress_bar = QProgressBar()
+        self.progress_bar.setRange(0, 0)  # busy indicator
+        self.cancel_button = QPushButton("Cancel")
+        self.cancel_button.clicked.connect(self.canceled)
+        self.update_timer.setInterval(1000)
+        self.update_timer.timeout.connect(self.update_label)
+
+        layout = QHBoxLayout()
+        layout.addWidget(self.label)
+        layout.addWidget(self.progress_bar)
+        layout.addWidget(self.cancel_button)
+        self.setLayout(layout)
+        self.hide()
+
+    def connect_preparation(self, preparation: SumDiracDfcoefPreparation):
+        # The progress is shown from the start of the preparation until sum_dirac_dfcoef finishes
+        self.canceled.connect(preparation.cancel)
+        preparation.output_received.connect(self.on_output_received)
+        preparation.failed.connect(self.finish)
+        preparation.canceled.connect(self.finish)
+
+    def connect_job(self, job: Union[SumDiracDfcoefProcess, SumDiracDfcoefPoolJob]):
+        self.canceled.connect(job.cancel)
+        job.output_received.connect(self.on_output_received)
+        job.succeeded.connect(self.finish)
+        job.failed.connect(self.finish)
+        job.canceled.connect(self.finish)
+
+    def start(self, dirac_output: Path):
+        self.dirac_output = dirac_output
+        self.last_line = ""
+        self.elapsed_timer.start()
+        self.update_label()
+        self.update_timer.start()
+        self.show()
+
+    def finish(self, *_):
+        self.update_timer.stop()
+        self.hide()
+
+    def on_output_received(self, text: str):
+        lines = [line for line in text.splitlines() if line.strip()]
+        if lines:
+            self.last_line = lines[-1]
+            self.update_label()
+
+    def update_label(self):
+        elapsed_sec = self.elapsed_timer.elapsed() // 1000 if self.elapsed_timer.isValid() else 0
+        label = f"Running sum_dirac_dfcoef: {self.dirac_output}, elapsed time: {elapsed_sec} s"
+        if self.last_line:
+            label += f"\n{self.last_line}"
+        self.label.setText(label)
@@ -0,0 +1,97 @@
+from typing import Any, Union
+
+from PySide6.QtCore import QAbstractTableModel, QModelIndex, QPersistentModelIndex, Qt
+
+from dcaspt2_input_generator.components.data import colors
+from dcaspt2_input_generator.core.interval_set import IntervalSet
+from dcaspt2_input_generator.core.table_data import OrbitalSpace, TableData
+
+ModelIndex = Union[QModelIndex, QPersistentModelIndex]
+
+
+# TableModel is the model that provides the output data to TableWidget.
+# It does not store the cell values. Each cell value is read from table_data (of the document) on demand,
+# so only the rows that are visible on the screen are converted to the display strings.
+# The background color is derived from the orbital space of the row (table_data.spaces).
+class TableModel(QAbstractTableModel):
+    irrep_column = 0
+    mo_number_column = 1
+    energy_column = 2
+    column_before_ao_percentage = 3
+    table_data: TableData
+    row_count: int
+    column_count: int
+
+    def __init__(self, table_data: TableData, parent=None):
+        super().__init__(parent)
+        self.table_data = table_data
+        self.row_count = 0
+        self.column_count = 0
+
+    def rowCount(self, parent: ModelIndex = QModelIndex()) -> int:  # noqa: B008, N802 (Qt override)
+        if parent.isValid():
+            return 0
+        return self.row_count
+
+    def columnCount(self, parent: ModelIndex = QModelIndex()) -> int:  # noqa: B008, N802 (Qt override)
+        if parent.isValid():
+            return 0
+        return self.column_count
+
+    def data(self, index: ModelIndex, role: int = Qt.ItemDataRole.DisplayRole) -> Any:
+        if not index.isValid():
+            return None
+        row = index.row()
+        if role == Qt.ItemDataRole.DisplayRole:
+            return self.display_text(row, index.column())
+        elif role == Qt.ItemDataRole.BackgroundRole:
+            return colors.get_color_info_by_space(self.table_data.spaces[row]).color
+        return None
+
+    def display_text(self, row: int, column: int) -> str:
+        mo_data = self.table_data.mo_data
+        if column == self.irrep_column:
+            return mo_data.get_mo_symmetry(row)
+        elif column == self.mo_number_column:
+            return str(mo_data.mo_number[row])
+        elif column == self.energy_column:
+            return str(mo_data.energy[row])
+        # percentage, ao_type
+        ao_idx, is_percentage = divmod(column - self.column_before_ao_percentage, 2)
+        if ao_idx >= mo_data.ao_len(row):
+            return ""
+        return str(mo_data.get_percentage(row, ao_idx)) if is_percentage else mo_data.get_ao_type(row, ao_idx)
+
+    def headerData(  # noqa: N802 (Qt override)
+        self, section: int, orientation: Qt.Orientation, role: int = Qt.ItemDataRole.DisplayRole
+    ) -> Any:
+        if role != Qt.ItemDataRole.DisplayRole:
+            return None
+        if orientation == Qt.Orientation.Vertical:
+            return str(section + 1)
+        header_data = ["irrep", "no. of spinor", "energy (a.u.)"]
+        if section < len(header_data):
+            return header_data[section]
+        ao_idx, is_percentage = divmod(section - self.column_before_ao_percentage, 2)
+        return f"percentage {ao_idx + 1}" if is_percentage else f"AO type {ao_idx + 1}"
+
+    def reset_table(self) -> None:
+        """Replace all rows with the current table_data.
+        The table size is fixed here, so the view is not affected by table_data until this method is called."""
+        self.beginResetModel()
+        self.row_count = len(self.table_data.mo_data)
+        self.column_count = self.table_data.column_max_len
+        self.endResetModel()
+
+    def set_rows_space(self, rows: IntervalSet, space: OrbitalSpace) -> None:
+        """Change the orbital space of the given rows (disjoint ranges) and notify the view once,
+        so the view is repainted once however many rows and ranges are changed."""
+        if len(rows.starts) == 0:
+            return
+        self.table_data.set_space_ranges(rows.ranges(), space)
+        self.notify_rows_changed(rows.starts[0], rows.ends[-1])
+
+    def notify_rows_changed(self, top_row: int, bottom_row: int) -> None:
+        top_left = self.index(top_row, 0)
+        bottom_right = self.index(bottom_row, self.columnCount() - 1)
+        self.dataChanged.emit(top_left, bottom_right, [Qt.ItemDataRole.BackgroundRole])
@@ -0,0 +1,38 @@
+from PySide6.QtWidgets import QHBoxLayout, QLabel, QLineEdit, QPushButton, QWidget
+
+from dcaspt2_input_generator.components.table_widget import TableWidget
+from dcaspt2_input_generator.core.table_query import TableQueryError, run_table_query
+
+
+# TableQueryBar selects the rows of the table matching the query
+# (e.g.) U 5f > 30% and -1.0 < energy < 0.5
+# The selected rows can be changed to an orbital space from the context menu of the table.
+class TableQueryBar(QWidget):
+    def __init__(self, table_widget: TableWidget):
+        super().__init__()
+        self.table_widget = table_widget
+        self.init_UI()
+
+    def init_UI(self):  # noqa: N802 (the same name as the other widgets)
+        self.query_input = QLineEdit()
+        self.query_input.setPlaceholderText("Query (e.g.) U 5f > 30% and -1.0 < energy < 0.5")
+        self.query_input.returnPressed.connect(self.select_rows)
+        self.select_button = QPushButton("Select")
+        self.select_button.clicked.connect(self.select_rows)
+        self.result_label = QLabel()
+
+        layout = QHBoxLayout()
+        layout.setContentsMargins(0, 0, 0, 0)
+        layout.addWidget(self.query_input)
+        layout.addWidget(self.select_button)
+        layout.addWidget(self.result_label)
+        self.setLayout(layout)
+
+    def select_rows(self):
+        try:
+            rows = run_table_query(self.table_widget.table_data, self.query_input.text())
+        except TableQueryError as e:
+            self.result_label.setText(str(e))
+            return
+        self.table_widget.select_rows(rows)
+        self.result_label.setText(f"{len(rows)} rows")
@@ -1,8 +1,10 @@
+from typing import Dict
+
 from PySide6.QtCore import Signal, SignalInstance
 from PySide6.QtGui import QFocusEvent, QIntValidator
 from PySide6.QtWidgets import QFrame, QGridLayout, QLabel, QLineEdit, QWidget
 
-from dcaspt2_input_generator.utils.settings import settings
+from dcaspt2_input_generator.utils.settings import get_settings
 from dcaspt2_input_generator.utils.utils import debug_print
 
 
@@ -16,6 +18,7 @@ class NaturalNumberInput(QLineEdit):
         if default_num < bottom_num:
             msg = f"default_num must be larger than bottom_num. default_num: {default_num}, bottom_num: {bottom_num}"
             raise ValueError(msg)
+        self.bottom_num = bottom_num
         self.default_num = default_num
         self.__setup_validator__(bottom_num)
         self.setText(str(self.default_num))
@@ -75,6 +78,7 @@ class UserInput(QGridLayout):
 
     def __init__(self):
         super().__init__()
+        settings = get_settings()
         # 数値を入力するためのラベル
         self.totsym_label = QLabel("total symmetry number")
         self.totsym_number = TotsymNumberInput(self.changed, default_num=settings.input.total_symmetry)
@@ -102,6 +106,18 @@ class UserInput(QGridLayout):
             "dirac_ver": self.dirac_ver_number.get_value(),
         }
 
+    def set_input_values(self, values: Dict[str, int]):
+        # values: the same keys as get_input_values (e.g. restored from a session file)
+        for key, number_input in (
+            ("total_symmetry", self.totsym_number),
+            ("ras1_max_hole", self.ras1_max_hole_number),
+            ("ras3_max_electron", self.ras3_max_electron_number),
+            ("dirac_ver", self.dirac_ver_number),
+        ):
+            if key in values:
+                number_input.setText(str(values[key]))
+        self.changed.emit()
+
 
 class SpinorSummary(QGridLayout):
     def __init__(self):
@@ -130,18 +146,20 @@ class TableSummary(QWidget):
         self.user_input = UserInput()
         self.recommended_moltra = QLabel("Recommended MOLTRA setting")
         self.point_group = QLabel("Point Group")
+        self.resource_estimate = QLabel()
 
         self.summaryLayout.addWidget(QLabel("Summary of the number of spinors"), 0, 0)
         self.summaryLayout.addLayout(self.spinor_summary, 1, 0)
         self.summaryLayout.addWidget(self.recommended_moltra, 2, 0)
         self.summaryLayout.addWidget(self.point_group, 3, 0)
+        self.summaryLayout.addWidget(self.resource_estimate, 4, 0)
 
         line = QFrame()
         line.setFrameShape(QFrame.Shape.HLine)
         line.setFrameShadow(QFrame.Shadow.Sunken)
-        self.summaryLayout.addWidget(line, 4, 0)
+        self.summaryLayout.addWidget(line, 5, 0)
 
-        self.summaryLayout.addWidget(QLabel("User Input"), 5, 0)
-        self.summaryLayout.addLayout(self.user_input, 6, 0)
+        self.summaryLayout.addWidget(QLabel("User Input"), 6, 0)
+        self.summaryLayout.addLayout(self.user_input, 7, 0)
 
         self.setLayout(self.summaryLayout)
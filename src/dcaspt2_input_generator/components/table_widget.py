@@ -1,273 +1,243 @@
+from itertools import groupby
 from pathlib import Path
-from typing import List
-
-from dcaspt2_input_generator.components.data import Color, colors, table_data
+from typing import Any, Dict, List, Tuple
+
+from PySide6.QtCore import QItemSelection, QItemSelectionModel, QItemSelectionRange, Qt, Signal
+from PySide6.QtGui import QAction
+from PySide6.QtWidgets import QCommonStyle, QMenu, QTableView
+
+from dcaspt2_input_generator.components.data import colors
+from dcaspt2_input_generator.components.table_model import TableModel
+from dcaspt2_input_generator.core.active_space import create_active_space
+from dcaspt2_input_generator.core.interval_set import IntervalSet
+from dcaspt2_input_generator.core.session import Session, load_session
+from dcaspt2_input_generator.core.space_history import SpaceHistory, SpaceRuns, apply_space_runs
+from dcaspt2_input_generator.core.table_data import OrbitalSpace, TableData
+from dcaspt2_input_generator.core.table_data_binary import load_table_data_binary
+from dcaspt2_input_generator.utils.tracing import trace_span
 from dcaspt2_input_generator.utils.utils import debug_print
-from PySide6.QtCore import Qt, Signal
-from PySide6.QtGui import QAction, QColor
-from PySide6.QtWidgets import QMenu, QTableWidget, QTableWidgetItem, QCommonStyle
 
 
 # TableWidget is the widget that displays the output data
-# It is a extended class of QTableWidget
+# It is a extended class of QTableView and the data is provided by TableModel
 # It has the following features:
 # 1. Load the output data from the file "data.out"
 # 2. Reload the output data
 # 3. Show the context menu when right click
-# 4. Change the background color of the selected cells
-# 5. Emit the color_changed signal when the background color is changed
+# 4. Change the orbital space (background color) of the selected rows
+# 5. Emit the color_changed signal when the orbital space is changed
 # Display the output data like the following:
 # irrep              no. of spinor    energy (a.u.)    percentage 1    AO type 1    percentage 2    AO type 2    ...
 # E1u                1                -9.631           33.333          B3uArpx      33.333          B2uArpy      ...
 # E1u                2                -9.546           50.000          B3uArpx      50.000          B2uArpy      ...
 # ...
-class TableWidget(QTableWidget):
+class TableWidget(QTableView):
     color_changed = Signal()
 
-    def __init__(self):
+    def __init__(self, table_data: TableData):
         debug_print("TableWidget init")
         super().__init__()
+        self.table_data = table_data
+        self.table_model = TableModel(table_data, self)
+        self.setModel(self.table_model)
+        # Undo/redo history of the orbital space edits, cleared when the rows are replaced
+        self.space_history = SpaceHistory()
+        self.table_model.modelReset.connect(self.space_history.clear)
         self.setStyle(QCommonStyle())
-        self.setStyleSheet("QTableWidget{color:black}")
+        self.setStyleSheet("QTableView{color:black}")
         # Set the context menu policy to custom context menu
         self.setContextMenuPolicy(Qt.ContextMenuPolicy.CustomContextMenu)
         self.customContextMenuRequested.connect(self.show_context_menu)
-        self.setEditTriggers(QTableWidget.EditTrigger.NoEditTriggers)
-        # QTableWidget.ContiguousSelection: Multiple ranges selection is impossible.
+        self.setEditTriggers(QTableView.EditTrigger.NoEditTriggers)
+        # QTableView.ExtendedSelection: Multiple ranges can be selected with Ctrl (and Shift) + click
+        # (e.g.) the 5f rows scattered through the spectrum. The orbital space is changed range by range.
         # https://doc.qt.io/qt-6/qabstractitemview.html#SelectionMode-enum
-        self.setSelectionMode(QTableWidget.SelectionMode.ContiguousSelection)
+        self.setSelectionMode(QTableView.SelectionMode.ExtendedSelection)
+        # Only the rows in the visible area are used to calculate the column width
+        self.horizontalHeader().setResizeContentsPrecision(0)
 
     def reload(self, output_file_path: Path):
         debug_print("TableWidget reload")
         self.load_output(output_file_path)
 
-    def update_index_info(self):
-        # Reset information
-        table_data.idx_info.reset()
-
-        # Update information
-        for row in range(self.rowCount()):
-            row_color = self.item(row, 0).background().color()
-            color_info = colors.get_color_info(row_color)
-            table_data.idx_info.update_idx_info(row, color_info.name)
-
     def create_table(self):
         debug_print("TableWidget create_table")
-        self.clear()
-        rows = table_data.mo_data
-        rows.sort(key=lambda x: (x.energy))
-        self.setRowCount(len(rows))
-        self.setColumnCount(table_data.column_max_len)
-
-        rem_electrons = table_data.header_info.electron_number
-        active_cnt = 0
-
-        for row_idx, row in enumerate(rows):
+        with trace_span("create_table"):
+            self.table_data.mo_data.sort_by_energy()
             # Default CAS configuration is CAS(4,8) (4electrons, 8spinors)
-            key = row.mo_symmetry
-            moltra_info = table_data.header_info.moltra_info[key]
-            if not moltra_info.get(row.mo_number, False):
-                color_info = colors.not_used  # not in MOLTRA
-            elif rem_electrons > 4:
-                color_info = colors.inactive
-            elif active_cnt < 8:
-                active_cnt += 2
-                color_info = colors.active
-            else:
-                color_info = colors.secondary
-
-            rem_electrons -= 2
-            color = color_info.color
-            self.setItem(row_idx, 0, QTableWidgetItem(row.mo_symmetry))
-            self.setItem(row_idx, 1, QTableWidgetItem(str(row.mo_number)))
-            self.setItem(row_idx, 2, QTableWidgetItem(str(row.energy)))
-            # percentage, ao_type
-            column_before_ao_percentage = 3
-            for idx in range(table_data.column_max_len - column_before_ao_percentage):
-                try:
-                    ao_type = QTableWidgetItem(row.ao_type[idx])
-                    ao_percentage = QTableWidgetItem(str(row.percentage[idx]))
-                except IndexError:
-                    ao_type = QTableWidgetItem("")
-                    ao_percentage = QTableWidgetItem("")
-                ao_type.setBackground(color)
-                ao_percentage.setBackground(color)
-                ao_type_column = column_before_ao_percentage + 2 * idx
-                ao_percentage_column = ao_type_column + 1
-                self.setItem(row_idx, ao_type_column, ao_type)
-                self.setItem(row_idx, ao_percentage_column, ao_percentage)
-
-            for idx in range(table_data.column_max_len):
-                self.item(row_idx, idx).setBackground(color)
-        self.update_index_info()
-
-    def set_column_header_items(self):
-        header_data = ["irrep", "no. of spinor", "energy (a.u.)"]
-        init_header_len = len(header_data)
-        additional_header = []
-        for idx in range(init_header_len, table_data.column_max_len):
-            if idx % 2 == 0:
-                additional_header.append(f"percentage {(idx-init_header_len)//2 + 1}")
-            else:
-                additional_header.append(f"AO type {(idx-init_header_len)//2 + 1}")
-
-        header_data.extend(additional_header)
-        self.setHorizontalHeaderLabels(header_data)
+            self.table_data.reset_spaces(create_active_space(self.table_data))
+            self.table_model.reset_table()
 
     def resize_columns(self):
-        self.resizeColumnsToContents()
-        for idx in range(table_data.column_max_len):
-            if idx == 0:  # irrep
-                self.setColumnWidth(idx, self.columnWidth(idx) + 20)
-            elif idx == 1 or idx % 2 == 0:  # no. of spinor, percentage
-                self.setColumnWidth(idx, self.columnWidth(idx) + 10)
-            else:  # energy, AO type
-                self.setColumnWidth(idx, self.columnWidth(idx) + 5)
+        with trace_span("resize_columns", columns=self.table_data.column_max_len):
+            self.resizeColumnsToContents()
+            for idx in range(self.table_data.column_max_len):
+                if idx == 0:  # irrep
+                    self.setColumnWidth(idx, self.columnWidth(idx) + 20)
+                elif idx == 1 or idx % 2 == 0:  # no. of spinor, percentage
+                    self.setColumnWidth(idx, self.columnWidth(idx) + 10)
+                else:  # energy, AO type
+                    self.setColumnWidth(idx, self.columnWidth(idx) + 5)
 
     def load_output(self, file_path: Path):
-        def set_table_data(rows: List[List[str]]):
-            try:
-                header = True
-                for row in rows:
-                    if header:
-                        if len(row) <= 1:  # Empty line, end of header
-                            header = False
-                    else:
-                        if len(row) == 0:
-                            continue
-                        table_data.add_mo_data(row)
-                        table_data.column_max_len = max(table_data.column_max_len, len(row))
-            except ValueError as e:
-                msg = "The output file is not correct, ValueError"
-                raise ValueError(msg) from e
-            except IndexError as e:
-                msg = "The output file is not correct, IndexError"
-                raise IndexError(msg) from e
-
-        def read_header(rows: List[List[str]]):
-            try:
-                for idx, row in enumerate(rows):
-                    if len(row) <= 1:  # Empty line, end of header
-                        break
-                    elif idx == 0:
-                        # 1st line: Read key-value info
-                        # (e.g.) electron_num 18 point_group D2h moltra_scheme default
-                        if len(row) % 2 != 0:
-                            msg = f"1st header line must be even elements because this line is for key-value info.\
-len(1st header)={len(row)}"
-                            raise IndexError(msg)
-
-                        for key_idx in range(0, len(row), 2):  # loop only key
-                            key = row[key_idx]
-                            value = row[key_idx + 1]
-                            if key == "electron_num":
-                                table_data.header_info.update_electron_number(int(value))
-                            elif key == "point_group":
-                                table_data.header_info.update_point_group(value)
-                            elif key == "moltra_scheme":
-                                table_data.header_info.update_moltra_scheme(value)
-                    elif idx == 1:
-                        # 2nd line: MOLTRA range
-                        # (e.g.) E1g 16..85 E1u 11..91
-                        table_data.header_info.read_moltra_info(row)
-                    elif idx == 2:
-                        # 3rd line: Eigenvalue info
-                        # (e.g.) E1g closed 6 open 0 virtual 30 E1u closed 10 open 0 virtual 40
-                        # => table_data.header_info.spinor_num_info = {"E1g": SpinorNumber(6, 0, 30, 36),
-                        #                                              "E1u": SpinorNumber(10, 0, 40, 50)}
-                        table_data.header_info.read_spinor_num_info(row)
-                    else:
-                        # Skip unknown header info line
-                        continue
-            except ValueError as e:
-                msg = "The output file is not correct, ValueError"
-                raise ValueError(msg) from e
-            except IndexError as e:
-                msg = "The output file is not correct, IndexError"
-                raise IndexError(msg) from e
-
-        table_data.reset()
-        rows = [line.split() for line in open(file_path).readlines()]
         # output is space separated file
-        read_header(rows)
-        set_table_data(rows)
-        table_data.validate()
+        with trace_span("load table", path=str(file_path)):
+            self.table_data.load_sum_dirac_dfcoef(file_path)
+            self.show_table_data()
+
+    def load_binary(self, file_path: Path):
+        with trace_span("load table", path=str(file_path)):
+            load_table_data_binary(self.table_data, file_path)
+            self.show_table_data()
+
+    def restore_session(self, file_path: Path) -> Session:
+        # The session file has the sorted rows, the orbital spaces and the column widths,
+        # so the default spaces and resizeColumnsToContents (slow for large tables) are skipped.
+        with trace_span("load table", path=str(file_path)):
+            session = load_session(self.table_data, file_path)
+            self.table_model.reset_table()
+            if len(session.column_widths) == self.table_data.column_max_len:
+                for idx, width in enumerate(session.column_widths):
+                    self.setColumnWidth(idx, width)
+            else:
+                self.resize_columns()
+            self.color_changed.emit()
+        return session
+
+    def get_column_widths(self) -> List[int]:
+        return [self.columnWidth(idx) for idx in range(self.table_data.column_max_len)]
+
+    def load_rows(self, header_rows: List[List[str]], rows: List[List[str]]):
+        # rows are the tokens returned by sum_dirac_dfcoef running in the process pool
+        with trace_span("load table"):
+            self.table_data.load_sum_dirac_dfcoef_rows(header_rows, rows)
+            self.show_table_data()
+
+    def restore_spaces(self, spaces_by_mo: Dict[Tuple[str, int], OrbitalSpace]) -> bool:
+        # Keep the orbital spaces chosen before the rows are reloaded (e.g. in the preview of the DIRAC output)
+        if not self.table_data.restore_spaces_by_mo(spaces_by_mo):
+            return False
+        self.notify_all_spaces_changed()
+        return True
+
+    def apply_active_space(self, strategy_name: str, params: Dict[str, Any]):
+        # Replace the orbital spaces of all rows by the active space strategy (the table is already sorted by energy)
+        spaces = create_active_space(self.table_data, strategy_name, params)
+        old_runs = self.space_history.begin(self.table_data.spaces, [(0, len(spaces) - 1)] if spaces else [])
+        self.table_data.reset_spaces(spaces)
+        self.space_history.commit(self.table_data.spaces, old_runs)
+        self.notify_all_spaces_changed()
+
+    def notify_all_spaces_changed(self):
+        if len(self.table_data.mo_data) > 0:
+            self.table_model.notify_rows_changed(0, len(self.table_data.mo_data) - 1)
+        self.color_changed.emit()
+
+    def show_table_data(self):
+        self.table_data.validate()
         self.create_table()
-        self.set_column_header_items()
         self.resize_columns()
         self.color_changed.emit()
 
+    def select_rows(self, rows: List[int]):
+        # rows: ascending row indexes (e.g. the result of a query), the consecutive rows are selected as one range
+        last_column = self.table_model.columnCount() - 1
+        # The ranges are appended to one selection, because calling QItemSelection.select for each range
+        # breaks the reference count of None in some PySide6 versions (crash after ~1000 ranges)
+        selection = QItemSelection()
+        for _, group in groupby(enumerate(rows), key=lambda item: item[1] - item[0]):
+            run = [row for _, row in group]
+            selection.append(
+                QItemSelectionRange(self.table_model.index(run[0], 0), self.table_model.index(run[-1], last_column))
+            )
+        self.selectionModel().select(
+            selection,
+            QItemSelectionModel.SelectionFlag.ClearAndSelect | QItemSelectionModel.SelectionFlag.Rows,
+        )
+        if rows:
+            self.scrollTo(self.table_model.index(rows[0], 0))
+
     def show_context_menu(self, position):
         menu = QMenu()
-        ranges = self.selectedRanges()
-        selected_rows: List[int] = []
-        for r in ranges:
-            selected_rows.extend(range(r.topRow(), r.bottomRow() + 1))
+        rows = self.get_selected_rows()
+        if len(rows.starts) == 0:
+            return
 
-        top_row = selected_rows[0]
-        bottom_row = selected_rows[-1]
+        # Each selected range is checked, because the rows between the ranges are not changed
+        # (e.g.) row 1 and row 100 must not become inactive if secondary starts from row 55
+        idx_info = self.table_data.idx_info
 
         # Show the inactive action
-        if table_data.idx_info.should_show_inactive_action_menu(top_row):
+        if all(idx_info.should_show_inactive_action_menu(top_row) for top_row in rows.starts):
             inactive_action = QAction(colors.inactive.icon, colors.inactive.message)
-            inactive_action.triggered.connect(lambda: self.change_background_color(colors.inactive.color))
+            inactive_action.triggered.connect(lambda: self.change_orbital_space(OrbitalSpace.inactive))
             menu.addAction(inactive_action)
 
         # Show the secondary action
-        if table_data.idx_info.should_show_secondary_action_menu(bottom_row):
+        if all(idx_info.should_show_secondary_action_menu(bottom_row) for bottom_row in rows.ends):
             secondary_action = QAction(colors.secondary.icon, colors.secondary.message)
-            secondary_action.triggered.connect(lambda: self.change_background_color(colors.secondary.color))
+            secondary_action.triggered.connect(lambda: self.change_orbital_space(OrbitalSpace.secondary))
             menu.addAction(secondary_action)
 
         # Show the active action
         ras1_action = QAction(colors.ras1.icon, colors.ras1.message)
-        ras1_action.triggered.connect(lambda: self.change_background_color(colors.ras1.color))
+        ras1_action.triggered.connect(lambda: self.change_orbital_space(OrbitalSpace.ras1))
         menu.addAction(ras1_action)
 
         active_action = QAction(colors.active.icon, colors.active.message)
-        active_action.triggered.connect(lambda: self.change_background_color(colors.active.color))
+        active_action.triggered.connect(lambda: self.change_orbital_space(OrbitalSpace.active))
         menu.addAction(active_action)
 
         ras3_action = QAction(colors.ras3.icon, colors.ras3.message)
-        ras3_action.triggered.connect(lambda: self.change_background_color(colors.ras3.color))
+        ras3_action.triggered.connect(lambda: self.change_orbital_space(OrbitalSpace.ras3))
         menu.addAction(ras3_action)
 
         not_used_action = QAction(colors.not_used.icon, colors.not_used.message)
-        not_used_action.triggered.connect(lambda: self.change_background_color(colors.not_used.color))
+        not_used_action.triggered.connect(lambda: self.change_orbital_space(OrbitalSpace.not_used))
         menu.addAction(not_used_action)
 
         menu.exec_(self.viewport().mapToGlobal(position))
 
-    def change_selected_rows_background_color(self, row, color: QColor):
-        for column in range(self.columnCount()):
-            item = self.item(row, column)
-            if item is not None:
-                item.setBackground(color)
-
-    def change_background_color(self, color):
-        indexes = self.selectedIndexes()
-        rows = {index.row() for index in indexes}
-        for row in rows:
-            self.change_selected_rows_background_color(row, color)
-        self.update_index_info()
+    def get_selected_rows(self) -> IntervalSet:
+        # The selected cells are merged into disjoint row ranges without listing each row or cell
+        rows = IntervalSet()
+        selection = self.selectionModel().selection()
+        for idx in range(selection.size()):
+            selection_range = selection.at(idx)
+            rows.add_range(selection_range.top(), selection_range.bottom())
+        return rows
+
+    def change_orbital_space(self, space: OrbitalSpace):
+        rows = self.get_selected_rows()
+        old_runs = self.space_history.begin(self.table_data.spaces, rows.ranges())
+        self.table_model.set_rows_space(rows, space)
+        self.space_history.commit(self.table_data.spaces, old_runs)
         self.color_changed.emit()
 
-    def update_color(self, prev_color: Color):
-        debug_print("update_color")
-        color_mappping = {
-            prev_color.inactive.color.name(): colors.inactive.color,
-            prev_color.ras1.color.name(): colors.ras1.color,
-            prev_color.active.color.name(): colors.active.color,
-            prev_color.ras3.color.name(): colors.ras3.color,
-            prev_color.secondary.color.name(): colors.secondary.color,
-        }
-
-        for row in range(self.rowCount()):
-            item = self.item(row, 0)
-            if item is None:
-                continue
-            color = item.background().color()
-            new_color = color_mappping.get(color.name())
-            if new_color:
-                self.change_selected_rows_background_color(row, new_color)
+    def undo(self) -> bool:
+        # Restore the orbital spaces before the last edit, return False if there is nothing to undo
+        edit = self.space_history.undo()
+        if edit is None:
+            return False
+        self.apply_space_runs(edit.old_runs)
+        return True
+
+    def redo(self) -> bool:
+        edit = self.space_history.redo()
+        if edit is None:
+            return False
+        self.apply_space_runs(edit.new_runs)
+        return True
+
+    def apply_space_runs(self, all_runs: List[SpaceRuns]):
+        top_row, bottom_row = apply_space_runs(self.table_data, all_runs)
+        if bottom_row != -1:
+            self.table_model.notify_rows_changed(top_row, bottom_row)
         self.color_changed.emit()
+
+    def update_color(self):
+        # The background color is derived from the orbital space at paint time,
+        # so the table only needs to be repainted.
+        # The orbital spaces are not changed, so color_changed (which updates the summary) is not emitted.
+        debug_print("update_color")
+        self.viewport().update()
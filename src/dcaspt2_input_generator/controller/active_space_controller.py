@@ -0,0 +1,33 @@
+from typing import Callable
+
+from dcaspt2_input_generator.components.active_space_settings import ActiveSpaceStrategyDialogAction
+from dcaspt2_input_generator.components.table_widget import TableWidget
+
+
+# ActiveSpaceController applies the strategy selected in the dialog to the table of the current tab
+class ActiveSpaceController:
+    def __init__(
+        self,
+        get_table_widget: Callable[[], TableWidget],
+        active_space_action: ActiveSpaceStrategyDialogAction,
+        display_error: Callable[[str], None],
+    ):
+        self.get_table_widget = get_table_widget
+        self.active_space_action = active_space_action
+        self.display_error = display_error
+
+        # Connect signals and slots
+        self.active_space_action.strategy_applied.connect(self.apply_strategy)
+
+    def apply_strategy(self):
+        table_widget = self.get_table_widget()
+        if len(table_widget.table_data.mo_data) == 0:
+            self.display_error("There is no table to apply the active space strategy.\nPlease open an output first.")
+            return
+        dialog = self.active_space_action.get_dialog()
+        strategy = dialog.get_strategy()
+        try:
+            params = strategy.parse_parameters(dialog.get_parameter_values())
+            table_widget.apply_active_space(strategy.name, params)
+        except ValueError as e:
+            self.display_error(str(e))
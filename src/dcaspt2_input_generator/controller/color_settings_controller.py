@@ -1,23 +1,41 @@
-from dcaspt2_input_generator.components.color_settings import ColorSettingsDialog
+from typing import Callable, List
+
+from dcaspt2_input_generator.components.color_settings import ColorSettingsDialogAction
 from dcaspt2_input_generator.components.data import colors
 from dcaspt2_input_generator.components.table_widget import TableWidget
 from dcaspt2_input_generator.utils.utils import debug_print
 
 
 class ColorSettingsController:
-    # table_widget: TableWidget
-    # dialog: ColorSettingsDialog
-    def __init__(self, table_widget: TableWidget, dialog: ColorSettingsDialog):
-        self.table_widget = table_widget
-        self.dialog = dialog
+    # get_table_widgets: returns the TableWidget of all documents
+    # color_settings_action: ColorSettingsDialogAction (the dialog is created when it is opened)
+    def __init__(
+        self, get_table_widgets: Callable[[], List[TableWidget]], color_settings_action: ColorSettingsDialogAction
+    ):
+        self.get_table_widgets = get_table_widgets
+        self.color_settings_action = color_settings_action
 
         # Connect signals and slots
-        self.dialog.color_settings_changed.connect(self.onColorSettingsDialogChanged)
+        self.color_settings_action.color_settings_changed.connect(self.onColorSettingsDialogChanged)
 
     def onColorSettingsDialogChanged(self):
         debug_print("onColorSettingsDialogChanged")
-        prev_color = colors.deep_copy()
-        color_type_str = self.dialog.buttonGroup.checkedButton().text()
-        colors.change_color_templates(color_type_str)
-        if prev_color != colors:
-            self.table_widget.update_color(prev_color)
+        color_type_str = self.color_settings_action.get_dialog().buttonGroup.checkedButton().text()
+        self.change_color_theme(color_type_str)
+
+    def set_color_theme(self, color_type: str):
+        # Change the color theme without the dialog (e.g. restoring a session)
+        dialog = self.color_settings_action.color_settings_dialog
+        if dialog is not None:
+            for button in dialog.buttonGroup.buttons():
+                button.setChecked(button.text() == color_type)
+        self.change_color_theme(color_type)
+
+    def change_color_theme(self, color_type: str):
+        # The tables read the colors from the palette at paint time,
+        # so swapping the palette and repainting the tables is enough.
+        if color_type == colors.color_type:
+            return
+        colors.change_color_templates(color_type)
+        for table_widget in self.get_table_widgets():
+            table_widget.update_color()
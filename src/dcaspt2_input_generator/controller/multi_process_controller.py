@@ -8,9 +8,9 @@ class MultiProcessController:
         self.settings = settings
 
         # Connect signals and slots
-        self.multi_process_action.multi_process_settings.multi_process_changed.connect(self.onMultiProcessDialogChanged)
+        self.multi_process_action.multi_process_changed.connect(self.onMultiProcessDialogChanged)
 
     def onMultiProcessDialogChanged(self):
         self.settings.multi_process_input.multi_process_num = (
-            self.multi_process_action.multi_process_settings.multi_process_spin_box.value()
+            self.multi_process_action.get_dialog().multi_process_spin_box.value()
         )
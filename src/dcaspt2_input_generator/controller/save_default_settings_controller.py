@@ -1,4 +1,5 @@
 import json
+from typing import Callable
 
 from dcaspt2_input_generator.components.data import Color
 from dcaspt2_input_generator.components.menu_bar import SaveDefaultSettingsAction
@@ -14,12 +15,13 @@ class SaveDefaultSettingsController:
     def __init__(
         self,
         color: Color,
-        user_input: UserInput,
+        get_user_input: Callable[[], UserInput],
         multi_process_input: MultiProcess,
         save_default_settings_action: SaveDefaultSettingsAction,
     ):
         self.color = color
-        self.user_input = user_input
+        # The user input of the current document
+        self.get_user_input = get_user_input
         self.multi_process_input = multi_process_input
         self.save_default_settings_action = save_default_settings_action
 
@@ -28,7 +30,7 @@ class SaveDefaultSettingsController:
 
     def save_default_settings(self):
         # Save current settings in user input and color settings to the settings.json file as default.
-        user_input = self.user_input.get_input_values()
+        user_input = self.get_user_input().get_input_values()
         color_setting = self.color.color_type
         user_input["color_theme"] = color_setting
         multi_process_num = self.multi_process_input.multi_process_num
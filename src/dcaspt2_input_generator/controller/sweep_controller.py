@@ -0,0 +1,142 @@
+import threading
+from pathlib import Path
+from typing import Callable, Optional, Union
+
+from PySide6.QtCore import QObject, Qt, QThreadPool, Signal
+from PySide6.QtGui import QAction
+from PySide6.QtWidgets import QFileDialog, QMessageBox, QProgressDialog, QWidget
+
+from dcaspt2_input_generator.components.document import Document
+from dcaspt2_input_generator.controller.widget_controller import load_default_resource_calibration
+from dcaspt2_input_generator.core.active_space_sweep import SweepGrid, SweepSummary, load_sweep_grid, run_sweep
+from dcaspt2_input_generator.core.table_data import TableData
+from dcaspt2_input_generator.utils.settings import get_settings
+
+
+# SweepController writes the inputs of all variants of a sweep grid file (see core/active_space_sweep.py)
+# for the table of the current tab. The user input values of the tab are the defaults of the grid.
+# The sweep runs in a thread of QThreadPool. The progress dialog is window-modal,
+# so the table is not changed while the sweep reads it, and the sweep can be canceled from it.
+class SweepController(QObject):
+    progress_changed = Signal(int, int)  # emitted from the thread (finished variants, all variants)
+    sweep_finished = Signal(object)  # emitted from the thread (SweepSummary or the error message)
+
+    def __init__(
+        self,
+        parent: QWidget,
+        get_document: Callable[[], Document],
+        sweep_action: QAction,
+        display_error: Callable[[str], None],
+    ):
+        super().__init__(parent)
+        self.parent_widget = parent
+        self.get_document = get_document
+        self.sweep_action = sweep_action
+        self.display_error = display_error
+        self.progress_dialog: Optional[QProgressDialog] = None
+        self.cancel_event = threading.Event()
+
+        # Connect signals and slots
+        self.sweep_action.triggered.connect(self.start_sweep)
+        self.progress_changed.connect(self.on_progress_changed)
+        self.sweep_finished.connect(self.on_sweep_finished)
+
+    def start_sweep(self):
+        document = self.get_document()
+        if not document.can_save_table():
+            self.display_error("There is no table to sweep.\n\
+Please open a DIRAC output and wait until sum_dirac_dfcoef finishes, or open a sum_dirac_dfcoef output.")
+            return
+        grid_path, _ = QFileDialog.getOpenFileName(
+            self.parent_widget, "SELECT A SWEEP GRID FILE", "", "Grid file (*.json)"
+        )
+        if not grid_path:
+            return
+        output_dir = QFileDialog.getExistingDirectory(self.parent_widget, "SELECT THE OUTPUT DIRECTORY OF THE SWEEP")
+        if not output_dir:
+            return
+        user_input = document.table_summary.user_input.get_input_values()
+        try:
+            grid = load_sweep_grid(
+                Path(grid_path),
+                ras1_max_hole=user_input["ras1_max_hole"],
+                ras3_max_electron=user_input["ras3_max_electron"],
+                total_symmetry=user_input["total_symmetry"],
+            )
+        except (OSError, ValueError) as e:
+            self.display_error(f"Failed to read the sweep grid file.\nfile_path: {grid_path}\n\n\ndetails: {e}")
+            return
+
+        cancel_event = threading.Event()
+        self.cancel_event = cancel_event
+        self.progress_dialog = QProgressDialog("Writing the inputs of the sweep", "Cancel", 0, 0, self.parent_widget)
+        self.progress_dialog.setWindowTitle("Sweep active spaces")
+        self.progress_dialog.setWindowModality(Qt.WindowModality.WindowModal)
+        self.progress_dialog.setMinimumDuration(0)
+        self.progress_dialog.setAutoClose(False)
+        self.progress_dialog.setAutoReset(False)
+        self.progress_dialog.canceled.connect(cancel_event.set)
+        self.progress_dialog.show()
+        self.sweep_action.setEnabled(False)
+        table_data = document.table_widget.table_data
+        dirac_ver = user_input["dirac_ver"]
+        num_process = get_settings().multi_process_input.multi_process_num
+        QThreadPool.globalInstance().start(
+            lambda: self.run_sweep(
+                table_data,
+                grid,
+                Path(output_dir),
+                dirac_ver=dirac_ver,
+                num_process=num_process,
+                cancel_event=cancel_event,
+            )
+        )
+
+    def run_sweep(
+        self,
+        table_data: TableData,
+        grid: SweepGrid,
+        output_dir: Path,
+        *,
+        dirac_ver: int,
+        num_process: int,
+        cancel_event: threading.Event,
+    ):
+        # Called in the thread of QThreadPool, don't touch the widgets here
+        result: Union[SweepSummary, str]
+        try:
+            result = run_sweep(
+                table_data,
+                grid,
+                output_dir,
+                dirac_ver=dirac_ver,
+                num_process=num_process,
+                calibration=load_default_resource_calibration(),
+                progress=self.progress_changed.emit,
+                is_canceled=cancel_event.is_set,
+            )
+        except Exception as e:
+            result = f"Failed to sweep the active spaces.\noutput_dir: {output_dir}\n\n\ndetails: {e}"
+        self.sweep_finished.emit(result)
+
+    def on_progress_changed(self, num_finished: int, num_variants: int):
+        if self.progress_dialog is not None and not self.cancel_event.is_set():
+            self.progress_dialog.setMaximum(num_variants)
+            self.progress_dialog.setValue(num_finished)
+
+    def on_sweep_finished(self, result: Union[SweepSummary, str]):
+        if self.progress_dialog is not None:
+            self.progress_dialog.close()
+            self.progress_dialog.deleteLater()
+            self.progress_dialog = None
+        self.sweep_action.setEnabled(True)
+        if isinstance(result, str):
+            self.display_error(result)
+            return
+        message = f"{result.num_inputs} inputs ({result.num_errors} errors).\nThe manifest is {result.manifest_path}"
+        if result.canceled:
+            message = f"The sweep has been canceled.\n{message}"
+        errors = [f"variant {r.variant.index}: {r.error}" for r in result.results if r.error]
+        if errors:
+            message += "\n\n" + "\n".join(errors[:10])
+        QMessageBox.information(self.parent_widget, "Sweep active spaces", message)
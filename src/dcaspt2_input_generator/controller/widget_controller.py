@@ -1,54 +1,59 @@
-from collections import OrderedDict
+from typing import Optional
 
-from dcaspt2_input_generator.components.data import colors, table_data
 from dcaspt2_input_generator.components.table_summary import TableSummary
 from dcaspt2_input_generator.components.table_widget import TableWidget
+from dcaspt2_input_generator.core.resource_estimate import (
+    CalculationSize,
+    ResourceCalibration,
+    estimate_resources,
+    format_bytes,
+    format_seconds,
+    load_resource_calibration,
+)
+from dcaspt2_input_generator.core.table_data import OrbitalSpace
 from dcaspt2_input_generator.utils.dir_info import dir_info
+from dcaspt2_input_generator.utils.tracing import trace_span
+from dcaspt2_input_generator.utils.utils import debug_print
+
+
+def load_default_resource_calibration() -> Optional[ResourceCalibration]:
+    # The calibration fitted by "dcaspt2_input_generator calibrate" (None if it has not been created)
+    if not dir_info.resource_calibration_path.exists():
+        return None
+    try:
+        return load_resource_calibration(dir_info.resource_calibration_path)
+    except ValueError as e:
+        debug_print(str(e))
+        return None
 
 
 class WidgetController:
     def __init__(self, table_summary: TableSummary, table_widget: TableWidget):
         self.table_summary = table_summary
         self.table_widget = table_widget
+        self.resource_calibration = load_default_resource_calibration()
 
         # change_background_color is a slot
         self.table_widget.color_changed.connect(self.onTableWidgetColorChanged)
+        user_input = self.table_summary.user_input
+        user_input.ras1_max_hole_number.textChanged.connect(self.update_resource_estimate)
+        user_input.ras3_max_electron_number.textChanged.connect(self.update_resource_estimate)
 
     def onTableWidgetColorChanged(self):
-        def get_max_mem_str(estimated_max_mem: int) -> str:
-            kb = 1024
-            mb = kb**2
-            gb = kb**3
-            if estimated_max_mem < kb:  # byte
-                return f"{estimated_max_mem} byte"
-            elif estimated_max_mem < mb:  # KB
-                mem = float(estimated_max_mem) / kb
-                return f"{mem:.3f} KB"
-            elif estimated_max_mem < gb:  # MB
-                mem = float(estimated_max_mem) / mb
-                return f"{mem:.3f} MB"
-            else:
-                mem = float(estimated_max_mem) / gb
-                return f"{mem:.3f} GB"
-
-        color_count = {"inactive": 0, "ras1": 0, "active, ras2": 0, "ras3": 0, "secondary": 0}
-        row_count = self.table_widget.rowCount()
-        for row in range(row_count):
-            color = self.table_widget.item(row, 0).background()
-            sym_str = self.table_widget.item(row, 0).text()
-            mo_num = int(self.table_widget.item(row, 1).text())
-            table_data.header_info.moltra_info[sym_str][mo_num] = False if color == colors.not_used.color else True
+        with trace_span("summary"):
+            self.update_summary()
 
-            if color == colors.inactive.color:
-                color_count["inactive"] += 2
-            elif color == colors.ras1.color:
-                color_count["ras1"] += 2
-            elif color == colors.active.color:
-                color_count["active, ras2"] += 2
-            elif color == colors.ras3.color:
-                color_count["ras3"] += 2
-            elif color == colors.secondary.color:
-                color_count["secondary"] += 2
+    def update_summary(self):
+        table_data = self.table_widget.table_data
+        # 1 row = 2 spinors
+        space_count = table_data.count_spaces()
+        color_count = {
+            "inactive": 2 * space_count[OrbitalSpace.inactive],
+            "ras1": 2 * space_count[OrbitalSpace.ras1],
+            "active, ras2": 2 * space_count[OrbitalSpace.active],
+            "ras3": 2 * space_count[OrbitalSpace.ras3],
+            "secondary": 2 * space_count[OrbitalSpace.secondary],
+        }
 
         # Update summary information
         self.table_summary.spinor_summary.inactive_label.setText(f"inactive: {color_count['inactive']}")
@@ -62,62 +67,40 @@ class WidgetController:
         self.table_summary.user_input.ras3_max_electron_number.set_top(color_count["ras3"])
         res = ""
         for k, d in table_data.header_info.moltra_info.items():
-            res += f"\n {k}"
-            range_str = ""
-            start = True
-            prev_mo_num = 0
-            range_start_num = 0
-            search_end = False
-            sorted_d = OrderedDict(sorted(d.items()))
-            for mo_num, is_used in sorted_d.items():
-                search_end = True
-                if not is_used:
-                    continue
-                if start:
-                    # First used MO
-                    range_str += f" {mo_num}"
-                    range_start_num = mo_num
-                    start = False
-                elif mo_num != prev_mo_num + 1:
-                    if range_start_num == prev_mo_num:
-                        # Prev MO is alone, already added to range_str
-                        range_str += f" {mo_num}"
-                        range_start_num = mo_num
-                    else:
-                        # Prev MO is not alone, not added to range_str yet
-                        range_str += f"..{prev_mo_num} {mo_num}"
-                        range_start_num = mo_num
-                prev_mo_num = mo_num
-            if search_end and range_start_num != prev_mo_num:
-                # prev_mo_num is not added to range_str
-                range_str += f"..{prev_mo_num}"
-            res += range_str
+            range_str = d.to_range_str()
+            res += f"\n {k} {range_str}" if range_str else f"\n {k}"
 
         self.table_summary.recommended_moltra.setText(f"Recommended MOLTRA setting: {res}")
-        if table_data.header_info.point_group is not None:
-            inact = color_count["inactive"]
-            act = color_count["ras1"] + color_count["active, ras2"] + color_count["ras3"]
-            sec = color_count["secondary"]
-            inttwo = (
-                8 * ((inact + act) ** 4) * (2 if table_data.header_info.point_group == "C1" else 1)
-            )  # inttwr, inttwi # noqa E501
-            inttwo_f1_f2 = (
-                8 * (sec**2 * (inact + act) ** 2) * (4 if table_data.header_info.point_group == "C1" else 2)
-            )  # inttwr_f1, inttwi_f1, inttwr_f2, inttwi_f2 # noqa E501
-            indkl = (8 * (inact + act + sec) ** 2) * 2  # indk, indl
-            rkl = (8 * (inact + act + sec) ** 2) * (
-                2 if table_data.header_info.point_group == "C1" else 1
-            )  # rklr, rkli # noqa E501
-            estimated_max_mem = inttwo + inttwo_f1_f2 + indkl + rkl
-            if estimated_max_mem < 0:
-                estimated_max_mem = 0
-            mem_str = get_max_mem_str(estimated_max_mem)
-
-            txt = f"Point Group: {table_data.header_info.point_group}, estimated max memory size: {mem_str}"
-            self.table_summary.point_group.setText(txt)
-        else:
-            txt = "Point Group: could not be obtained, cannot detect the maximum memory size of the dirac_caspt2 calcluation."  # noqa E501
-            self.table_summary.point_group.setText(txt)
+        self.update_resource_estimate()
 
         # Reload the input
         self.table_summary.update()
+
+    def update_resource_estimate(self):
+        # The estimate depends on the orbital spaces and the ras1/ras3 limits, so it is updated on both changes
+        table_data = self.table_widget.table_data
+        if not table_data.header_info.point_group:
+            txt = "Point Group: could not be obtained, cannot detect the maximum memory size of the dirac_caspt2 calcluation."  # noqa E501
+            self.table_summary.point_group.setText(txt)
+            self.table_summary.resource_estimate.setText("")
+            return
+        user_input = self.table_summary.user_input
+        size = CalculationSize.from_table(
+            table_data,
+            ras1_max_hole=user_input.ras1_max_hole_number.get_value(),
+            ras3_max_electron=user_input.ras3_max_electron_number.get_value(),
+        )
+        estimate = estimate_resources(size, self.resource_calibration)
+        txt = f"Point Group: {size.point_group}, estimated max memory size: {format_bytes(estimate.peak_memory)}"
+        self.table_summary.point_group.setText(f"{txt} ({estimate.peak_subprogram})")
+        lines = [f"CI determinants: {estimate.determinants}"]
+        for subprogram in estimate.subprograms:
+            line = (
+                f"{subprogram.name}: memory {format_bytes(subprogram.peak_memory)},"
+                f" integral files {format_bytes(subprogram.integral_file_size)},"
+                f" relative cost {subprogram.relative_cost:.3g}"
+            )
+            if subprogram.seconds is not None:
+                line += f", about {format_seconds(subprogram.seconds)}"
+            lines.append(line)
+        self.table_summary.resource_estimate.setText("\n".join(lines))
@@ -0,0 +1,302 @@
+# This script assigns the orbital space of all rows (the active space) with a strategy.
+# A strategy looks at the whole energy-sorted table at once (the energy column, the AO columns and the MOLTRA range)
+# and returns the boundary between inactive and secondary and the active row ranges,
+# then the orbital spaces of all rows are written with a few slice assignments instead of deciding row by row.
+# A new strategy is added by register_active_space_strategy.
+# It does not depend on PySide6, so it can be used without the GUI.
+from bisect import bisect_left, bisect_right
+from dataclasses import dataclass, field
+from itertools import groupby
+from operator import mul, sub
+from typing import Any, Callable, Dict, Iterable, List, Optional, Tuple
+
+from dcaspt2_input_generator.core.table_data import OrbitalSpace, TableData
+from dcaspt2_input_generator.core.table_query import is_same_atom, parse_ao_type, run_table_query
+from dcaspt2_input_generator.utils.tracing import trace_span
+
+DEFAULT_STRATEGY = "count"
+
+
+@dataclass
+class StrategyParameter:
+    name: str
+    type: Callable[[str], Any]
+    default: Any
+    help: str
+
+
+@dataclass
+class ActiveSpace:
+    """The rows in active_ranges ([start, end) row indexes) are active.
+    The other rows before inactive_end are inactive and the rest are secondary.
+    The rows that are not in the MOLTRA range are not_used in any case."""
+
+    inactive_end: int
+    active_ranges: List[Tuple[int, int]] = field(default_factory=list)
+
+
+class ActiveSpaceTable:
+    """The columns of table_data used by the strategies. table_data.mo_data must be sorted by energy.
+
+    used_rows are the rows in the MOLTRA range (the rows that are not not_used).
+    The rows before occupied_end have electrons, so HOMO is occupied_end - 1 and LUMO is occupied_end.
+    """
+
+    def __init__(self, table_data: TableData):
+        rows = table_data.mo_data
+        moltra_info = table_data.header_info.moltra_info
+        contains = [moltra_info[label].__contains__ for label in rows.symmetry_labels]
+        self.table_data = table_data
+        self.row_count = len(rows)
+        self.energy = rows.energy
+        self.used = bytes(contains[code](mo_number) for code, mo_number in zip(rows.mo_symmetry_code, rows.mo_number))
+        self.used_rows = [row for row, used in enumerate(self.used) if used]
+        self.occupied_end = min(max((table_data.header_info.electron_number + 1) // 2, 0), self.row_count)
+
+    def clamp(self, row: int) -> int:
+        return min(max(row, 0), self.row_count)
+
+    def frontier_energies(self) -> Tuple[float, float]:
+        """Return the energies of HOMO and LUMO (the same row is used if one of them is not in the table)"""
+        homo = self.clamp(self.occupied_end - 1)
+        lumo = min(self.occupied_end, self.row_count - 1)
+        homo = min(homo, lumo)
+        return self.energy[homo], self.energy[lumo]
+
+    def end_of_used_rows(self, start: int, count: int) -> int:
+        """Return the end of the range from start that includes count rows in the MOLTRA range"""
+        if count <= 0:
+            return start
+        last = bisect_left(self.used_rows, start) + count - 1
+        return self.used_rows[last] + 1 if last < len(self.used_rows) else self.row_count
+
+    def ao_character(self, patterns: Dict[str, str]) -> List[float]:
+        """Return the sum of the percentages of the AO types matching patterns per row.
+        patterns: atom -> angular momentums (e.g.) {"U": "fd", "O": "p"}, "" means all AO types of the atom"""
+        rows = self.table_data.mo_data
+        label_mask = bytes(is_matched_ao_type(label, patterns) for label in rows.ao_labels)
+        # Each step below runs over the whole AO column at once
+        weighted = list(map(mul, rows.percentage, map(label_mask.__getitem__, rows.ao_type_ids)))
+        offsets = rows.ao_offsets
+        return list(map(sum, map(weighted.__getitem__, map(slice, offsets[:-1], offsets[1:]))))
+
+
+@dataclass
+class ActiveSpaceStrategy:
+    """select returns the ActiveSpace of the table for the parameters converted by parse_parameters"""
+
+    name: str
+    description: str
+    parameters: List[StrategyParameter]
+    select: Callable[[ActiveSpaceTable, Dict[str, Any]], ActiveSpace]
+
+    def parse_parameters(self, values: Optional[Dict[str, str]] = None) -> Dict[str, Any]:
+        """Convert the parameter strings (e.g. given on the command line) and fill in the defaults.
+
+        Raises:
+            ValueError: If a parameter is unknown or has an invalid value.
+        """
+        values = values or {}
+        known = {parameter.name for parameter in self.parameters}
+        unknown = [name for name in values if name not in known]
+        if unknown:
+            msg = f"Unknown parameter of the {self.name} strategy: {', '.join(unknown)}.\
+ Valid parameters: {', '.join(sorted(known))}"
+            raise ValueError(msg)
+        params: Dict[str, Any] = {}
+        for parameter in self.parameters:
+            if parameter.name not in values:
+                params[parameter.name] = parameter.default
+                continue
+            try:
+                params[parameter.name] = parameter.type(values[parameter.name].strip())
+            except ValueError as e:
+                msg = f"Invalid value of {parameter.name} for the {self.name} strategy: {values[parameter.name]}"
+                raise ValueError(msg) from e
+        return params
+
+
+def is_matched_ao_type(ao_type: str, patterns: Dict[str, str]) -> bool:
+    parsed = parse_ao_type(ao_type)
+    if parsed is None:
+        return False
+    atom, shell = parsed
+    return any(
+        is_same_atom(atom, pattern) and (shells == "" or shell in shells) for pattern, shells in patterns.items()
+    )
+
+
+def parse_ao_patterns(ao_str: str) -> Dict[str, str]:
+    """(e.g.) "U:f,U:d,O:p" -> {"U": "fd", "O": "p"}, "Ar" -> {"Ar": ""} (all AO types of Ar)"""
+    if not ao_str.strip():
+        msg = "AO type patterns are required. (e.g.) U:f,U:d,O:p"
+        raise ValueError(msg)
+    patterns: Dict[str, str] = {}
+    for elem in ao_str.split(","):
+        atom, _, shells = elem.strip().partition(":")
+        if not atom or any(shell not in "spdfghi" for shell in shells):
+            msg = f"Invalid AO type pattern: {elem}. (e.g.) U:f,U:d,O:p"
+            raise ValueError(msg)
+        if patterns.get(atom) == "" or shells == "":
+            patterns[atom] = ""
+        else:
+            patterns[atom] = patterns.get(atom, "") + shells
+    return patterns
+
+
+def select_by_count(table: ActiveSpaceTable, params: Dict[str, Any]) -> ActiveSpace:
+    # The rows are inactive until the given number of electrons remain,
+    # then the next rows in the MOLTRA range are active until the given number of spinors is reached.
+    # (The same as the orbital spaces decided row by row, 1 row = 2 electrons = 2 spinors)
+    inactive_end = table.clamp(-(-(table.table_data.header_info.electron_number - params["electrons"]) // 2))
+    active_end = table.end_of_used_rows(inactive_end, -(-params["spinors"] // 2))
+    return ActiveSpace(inactive_end, [(inactive_end, active_end)])
+
+
+def select_by_energy_window(table: ActiveSpaceTable, params: Dict[str, Any]) -> ActiveSpace:
+    homo_energy, lumo_energy = table.frontier_energies()
+    start = bisect_left(table.energy, homo_energy - params["below"])
+    end = bisect_right(table.energy, lumo_energy + params["above"])
+    return ActiveSpace(start, [(start, end)])
+
+
+def select_by_largest_gap(table: ActiveSpaceTable, params: Dict[str, Any]) -> ActiveSpace:
+    # The active space starts above the largest energy gap between the occupied rows near HOMO
+    # and ends below the largest energy gap between the virtual rows near LUMO,
+    # so that (nearly) degenerate rows are not split into different spaces.
+    energy = table.energy
+    occupied_end = table.occupied_end
+    low = max(occupied_end - params["occupied_rows"], 0)
+    # gaps[idx] is the gap between the rows low + idx and low + idx + 1
+    gaps = list(map(sub, energy[low + 1 : occupied_end], energy[low : occupied_end - 1]))
+    start = low + max(range(len(gaps)), key=gaps.__getitem__) + 1 if gaps else low
+    high = min(occupied_end + params["virtual_rows"], table.row_count)
+    gaps = list(map(sub, energy[occupied_end + 1 : high + 1], energy[occupied_end:high]))
+    end = occupied_end + max(range(len(gaps)), key=gaps.__getitem__) + 1 if gaps else high
+    return ActiveSpace(start, [(start, end)])
+
+
+def select_by_ao_character(table: ActiveSpaceTable, params: Dict[str, Any]) -> ActiveSpace:
+    character = table.ao_character(parse_ao_patterns(params["ao"]))
+    return ActiveSpace(table.occupied_end, create_row_ranges(value > params["threshold"] for value in character))
+
+
+def select_by_query(table: ActiveSpaceTable, params: Dict[str, Any]) -> ActiveSpace:
+    rows = set(run_table_query(table.table_data, params["query"]))
+    return ActiveSpace(table.occupied_end, create_row_ranges(row in rows for row in range(table.row_count)))
+
+
+def create_row_ranges(is_active: Iterable[bool]) -> List[Tuple[int, int]]:
+    """(e.g.) [False, True, True, False, True] -> [(1, 3), (4, 5)]"""
+    ranges: List[Tuple[int, int]] = []
+    row = 0
+    for active, group in groupby(is_active):
+        length = sum(1 for _ in group)
+        if active:
+            ranges.append((row, row + length))
+        row += length
+    return ranges
+
+
+_active_space_strategies: Dict[str, ActiveSpaceStrategy] = {}
+
+
+def register_active_space_strategy(strategy: ActiveSpaceStrategy) -> None:
+    _active_space_strategies[strategy.name] = strategy
+
+
+def get_active_space_strategies() -> List[ActiveSpaceStrategy]:
+    return list(_active_space_strategies.values())
+
+
+def get_active_space_strategy(name: str) -> ActiveSpaceStrategy:
+    """Raises:
+    ValueError: If the strategy is not registered.
+    """
+    if name not in _active_space_strategies:
+        msg = f"Unknown active space strategy: {name}. Valid strategies: {', '.join(_active_space_strategies)}"
+        raise ValueError(msg)
+    return _active_space_strategies[name]
+
+
+def create_active_space(
+    table_data: TableData,
+    strategy_name: str = DEFAULT_STRATEGY,
+    params: Optional[Dict[str, Any]] = None,
+    *,
+    table: Optional[ActiveSpaceTable] = None,
+) -> bytearray:
+    """Return the orbital space of each row decided by the strategy. table_data.mo_data must be sorted by energy.
+    params are the converted parameters, the default values are used for the missing ones.
+    table: ActiveSpaceTable(table_data) created by the caller to reuse it for many strategies (e.g. a sweep)
+    Default: CAS(4,8) (4 electrons, 8 spinors) by the count strategy"""
+    strategy = get_active_space_strategy(strategy_name)
+    params = {**strategy.parse_parameters(), **(params or {})}
+    with trace_span("active space", strategy=strategy_name, rows=len(table_data.mo_data)):
+        if table is None:
+            table = ActiveSpaceTable(table_data)
+        if table.row_count == 0:
+            return bytearray()
+        active_space = strategy.select(table, params)
+        inactive_end = table.clamp(active_space.inactive_end)
+        spaces = bytearray([OrbitalSpace.inactive]) * inactive_end
+        spaces += bytearray([OrbitalSpace.secondary]) * (table.row_count - inactive_end)
+        for active_start, active_end in active_space.active_ranges:
+            start, end = table.clamp(active_start), table.clamp(active_end)
+            spaces[start:end] = bytes([OrbitalSpace.active]) * max(end - start, 0)
+        # OrbitalSpace.not_used is 0, so multiplying by the MOLTRA mask sets not_used at once
+        return bytearray(map(mul, spaces, table.used))
+
+
+register_active_space_strategy(
+    ActiveSpaceStrategy(
+        "count",
+        "CAS(electrons, spinors) just above the inactive rows",
+        [
+            StrategyParameter("electrons", int, 4, "number of active electrons"),
+            StrategyParameter("spinors", int, 8, "number of active spinors"),
+        ],
+        select_by_count,
+    )
+)
+register_active_space_strategy(
+    ActiveSpaceStrategy(
+        "energy_window",
+        "The rows in the energy window around the HOMO-LUMO gap",
+        [
+            StrategyParameter("below", float, 0.5, "energy range below HOMO (a.u.)"),
+            StrategyParameter("above", float, 0.5, "energy range above LUMO (a.u.)"),
+        ],
+        select_by_energy_window,
+    )
+)
+register_active_space_strategy(
+    ActiveSpaceStrategy(
+        "largest_gap",
+        "The rows between the largest energy gaps below HOMO and above LUMO",
+        [
+            StrategyParameter("occupied_rows", int, 10, "number of the occupied rows to search the gap"),
+            StrategyParameter("virtual_rows", int, 20, "number of the virtual rows to search the gap"),
+        ],
+        select_by_largest_gap,
+    )
+)
+register_active_space_strategy(
+    ActiveSpaceStrategy(
+        "ao_character",
+        "The rows with more than threshold % of the given AO types",
+        [
+            StrategyParameter("ao", str, "", "atom:angular momentum list (e.g.) U:f,U:d,O:p"),
+            StrategyParameter("threshold", float, 50.0, "minimum sum of the percentages (%)"),
+        ],
+        select_by_ao_character,
+    )
+)
+register_active_space_strategy(
+    ActiveSpaceStrategy(
+        "query",
+        "The rows matching the query (e.g. U 5f > 30% and -1.0 < energy < 0.5)",
+        [StrategyParameter("query", str, "", "query of the rows (e.g.) U 5f > 30% and -1.0 < energy < 0.5")],
+        select_by_query,
+    )
+)
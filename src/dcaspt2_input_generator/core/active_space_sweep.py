@@ -0,0 +1,471 @@
+# This script creates the DIRAC-CASPT2 inputs of many active spaces (a sweep) from one table
+# and writes a manifest (CSV) with the estimated memory and the number of CI determinants of each input.
+# The sweep grid (JSON) lists the active space strategies with the lists of their parameters,
+# the numbers of active rows moved to ras1/ras3, the ras1 hole / ras3 electron limits and the total symmetries:
+#   {"active_spaces": [{"strategy": "count", "electrons": [4, 6], "spinors": [8, 10, 12]},
+#                      {"strategy": "energy_window", "below": [0.3, 0.5], "above": 0.5}],
+#    "ras1_rows": [0, 2], "ras3_rows": [0, 2], "ras1_max_hole": [1, 2], "ras3_max_electron": [1, 2],
+#    "totsym": [1, 2, 3]}
+# Every combination is a variant. The rows are walked once per orbital space definition
+# (strategy, parameters, ras1_rows, ras3_rows), and the variants that differ only in the limits or the total
+# symmetry reuse it, so most variants only format the input.
+# The definitions are distributed to worker processes, which load the table from a binary table file once,
+# if the sweep is large enough to pay for the startup of the spawn workers.
+# It does not depend on PySide6, so it can be used without the GUI.
+import csv
+import itertools
+import json
+import math
+import re
+import tempfile
+from dataclasses import dataclass, field, replace
+from pathlib import Path
+from typing import Any, Callable, Dict, List, Optional, Sequence, Tuple
+
+from dcaspt2_input_generator.core.active_space import (
+    ActiveSpaceTable,
+    create_active_space,
+    get_active_space_strategy,
+)
+from dcaspt2_input_generator.core.dcaspt2_input import count_dcaspt2_spaces, format_dcaspt2_input
+from dcaspt2_input_generator.core.resource_estimate import (
+    CalculationSize,
+    ResourceCalibration,
+    ResourceEstimate,
+    estimate_resources,
+    format_bytes,
+)
+from dcaspt2_input_generator.core.table_data import OrbitalSpace, TableData
+from dcaspt2_input_generator.core.table_data_binary import load_table_data_binary, write_table_data_binary
+from dcaspt2_input_generator.utils.tracing import trace_span
+
+SWEEP_MANIFEST_NAME = "manifest.csv"
+SWEEP_MANIFEST_COLUMNS = (
+    "index",
+    "file",
+    "strategy",
+    "parameters",
+    "ras1_rows",
+    "ras3_rows",
+    "ras1_max_hole",
+    "ras3_max_electron",
+    "totsym",
+    "ninact",
+    "nras1",
+    "nras2",
+    "nras3",
+    "nsec",
+    "nelec",
+    "determinants",
+    "peak_memory_bytes",
+    "peak_memory",
+    "peak_subprogram",
+    "seconds",
+    "fits",
+    "error",
+)
+UNSAFE_FILE_NAME_CHARS = re.compile(r"[^A-Za-z0-9.+-]+")
+# The worker processes are used only if (the number of definitions) * (the number of rows) is at least this value.
+# Starting the spawn workers takes about a second, a smaller sweep finishes earlier in this process.
+# (e.g.) 132 definitions of a 30 rows table: 0.3 s in this process, 1.4 s with 4 workers
+SWEEP_PARALLEL_MIN_WORK = 1_000_000
+
+
+@dataclass(frozen=True)
+class SweepSpaceDefinition:
+    """The orbital spaces of a variant: the strategy, then the first ras1_rows and the last ras3_rows
+    active rows are changed to ras1 and ras3."""
+
+    strategy: str
+    params: Tuple[Tuple[str, Any], ...]
+    ras1_rows: int = 0
+    ras3_rows: int = 0
+
+    def params_str(self) -> str:
+        return ";".join(f"{key}={value}" for key, value in self.params)
+
+
+@dataclass(frozen=True)
+class SweepVariant:
+    index: int
+    definition: SweepSpaceDefinition
+    ras1_max_hole: int
+    ras3_max_electron: int
+    total_symmetry: int
+
+    def file_name(self) -> str:
+        params = "_".join(f"{key}{value}" for key, value in self.definition.params)
+        name = f"{self.index:04d}_{self.definition.strategy}_{params}"
+        if self.definition.ras1_rows:
+            name += f"_ras1-{self.definition.ras1_rows}h{self.ras1_max_hole}"
+        if self.definition.ras3_rows:
+            name += f"_ras3-{self.definition.ras3_rows}e{self.ras3_max_electron}"
+        name += f"_sym{self.total_symmetry}"
+        return UNSAFE_FILE_NAME_CHARS.sub("_", name)[:200] + ".inp"
+
+
+@dataclass
+class SweepGrid:
+    definitions: List[SweepSpaceDefinition]
+    ras1_max_hole: List[int]
+    ras3_max_electron: List[int]
+    total_symmetry: List[int]
+
+    def create_variants(self) -> List[SweepVariant]:
+        """Return all combinations. The limit of ras1 (ras3) is ignored if there is no ras1 (ras3) row,
+        so such variants are created only once."""
+        variants: List[SweepVariant] = []
+        seen = set()
+        for definition in self.definitions:
+            for ras1_max_hole, ras3_max_electron, total_symmetry in itertools.product(
+                self.ras1_max_hole, self.ras3_max_electron, self.total_symmetry
+            ):
+                key = (
+                    definition,
+                    ras1_max_hole if definition.ras1_rows else 0,
+                    ras3_max_electron if definition.ras3_rows else 0,
+                    total_symmetry,
+                )
+                if key in seen:
+                    continue
+                seen.add(key)
+                variants.append(SweepVariant(len(variants) + 1, *key))
+        return variants
+
+
+@dataclass
+class SweepResult:
+    variant: SweepVariant
+    file_name: Optional[str] = None
+    size: Optional[CalculationSize] = None
+    estimate: Optional[ResourceEstimate] = None
+    error: str = ""
+
+
+@dataclass
+class SweepSummary:
+    results: List[SweepResult] = field(default_factory=list)
+    manifest_path: Optional[Path] = None
+    canceled: bool = False
+
+    @property
+    def num_inputs(self) -> int:
+        return sum(1 for result in self.results if result.file_name is not None)
+
+    @property
+    def num_errors(self) -> int:
+        return sum(1 for result in self.results if result.error)
+
+
+def as_list(value: Any, name: str) -> List[Any]:
+    values = value if isinstance(value, list) else [value]
+    if len(values) == 0:
+        msg = f"{name} of the sweep grid is empty."
+        raise ValueError(msg)
+    return values
+
+
+def as_int_list(json_dict: Dict[str, Any], name: str, default: int, minimum: int = 0) -> List[int]:
+    values = as_list(json_dict.get(name, default), name)
+    if not all(isinstance(value, int) and value >= minimum for value in values):
+        msg = f"{name} of the sweep grid must be integers larger than or equal to {minimum}: {values}"
+        raise ValueError(msg)
+    return values
+
+
+def parse_sweep_grid(
+    json_dict: Dict[str, Any], *, ras1_max_hole: int, ras3_max_electron: int, total_symmetry: int
+) -> SweepGrid:
+    """Create SweepGrid from the sweep grid (see the top of this file).
+    ras1_max_hole, ras3_max_electron and total_symmetry are used if the grid does not have them.
+
+    Raises:
+        ValueError: If the grid is not correct (e.g. unknown strategy or parameter).
+    """
+    if not isinstance(json_dict, dict) or "active_spaces" not in json_dict:
+        msg = 'The sweep grid must be a JSON object with "active_spaces".'
+        raise ValueError(msg)
+    ras1_rows_list = as_int_list(json_dict, "ras1_rows", 0)
+    ras3_rows_list = as_int_list(json_dict, "ras3_rows", 0)
+    definitions: List[SweepSpaceDefinition] = []
+    for active_space in as_list(json_dict["active_spaces"], "active_spaces"):
+        if not isinstance(active_space, dict) or "strategy" not in active_space:
+            msg = f'Each item of "active_spaces" must be a JSON object with "strategy": {active_space}'
+            raise ValueError(msg)
+        strategy = get_active_space_strategy(active_space["strategy"])
+        names = [name for name in active_space if name != "strategy"]
+        value_lists = [as_list(active_space[name], name) for name in names]
+        for values in itertools.product(*value_lists):
+            params = strategy.parse_parameters({name: str(value) for name, value in zip(names, values)})
+            for ras1_rows, ras3_rows in itertools.product(ras1_rows_list, ras3_rows_list):
+                definitions.append(SweepSpaceDefinition(strategy.name, tuple(params.items()), ras1_rows, ras3_rows))
+    return SweepGrid(
+        definitions,
+        as_int_list(json_dict, "ras1_max_hole", ras1_max_hole),
+        as_int_list(json_dict, "ras3_max_electron", ras3_max_electron),
+        as_int_list(json_dict, "totsym", total_symmetry, minimum=1),
+    )
+
+
+def load_sweep_grid(file_path: Path, *, ras1_max_hole: int, ras3_max_electron: int, total_symmetry: int) -> SweepGrid:
+    with open(file_path) as f:
+        try:
+            json_dict = json.load(f)
+        except json.JSONDecodeError as e:
+            msg = f"The sweep grid is not a correct JSON file. path: {file_path}, {e}"
+            raise ValueError(msg) from e
+    return parse_sweep_grid(
+        json_dict, ras1_max_hole=ras1_max_hole, ras3_max_electron=ras3_max_electron, total_symmetry=total_symmetry
+    )
+
+
+def create_definition_spaces(
+    table_data: TableData, definition: SweepSpaceDefinition, table: ActiveSpaceTable
+) -> bytearray:
+    spaces = create_active_space(table_data, definition.strategy, dict(definition.params), table=table)
+    if definition.ras1_rows + definition.ras3_rows == 0:
+        return spaces
+    active = bytes([OrbitalSpace.active])
+    active_rows = spaces.count(active)
+    if definition.ras1_rows + definition.ras3_rows > active_rows:
+        msg = (
+            f"ras1_rows ({definition.ras1_rows}) + ras3_rows ({definition.ras3_rows})"
+            f" exceeds the number of active rows ({active_rows})."
+        )
+        raise ValueError(msg)
+    row = -1
+    for _ in range(definition.ras1_rows):
+        row = spaces.find(active, row + 1)
+        spaces[row] = OrbitalSpace.ras1
+    row = len(spaces)
+    for _ in range(definition.ras3_rows):
+        row = spaces.rfind(active, 0, row)
+        spaces[row] = OrbitalSpace.ras3
+    return spaces
+
+
+def create_definition_inputs(
+    table_data: TableData,
+    table: ActiveSpaceTable,
+    definition: SweepSpaceDefinition,
+    variants: Sequence[SweepVariant],
+    *,
+    output_dir: Path,
+    dirac_ver: int,
+    calibration: Optional[ResourceCalibration],
+) -> List[SweepResult]:
+    """Write the inputs of the variants that share the orbital space definition"""
+    try:
+        spaces = create_definition_spaces(table_data, definition, table)
+        dcaspt2_spaces = count_dcaspt2_spaces(table_data, spaces)
+    except ValueError as e:
+        return [SweepResult(variant, error=str(e)) for variant in variants]
+    base_size = CalculationSize.from_table(table_data, spaces)
+    results: List[SweepResult] = []
+    for variant in variants:
+        size = replace(base_size, ras1_max_hole=variant.ras1_max_hole, ras3_max_electron=variant.ras3_max_electron)
+        output = format_dcaspt2_input(
+            dcaspt2_spaces,
+            total_symmetry=variant.total_symmetry,
+            dirac_ver=dirac_ver,
+            ras1_max_hole=variant.ras1_max_hole,
+            ras3_max_electron=variant.ras3_max_electron,
+        )
+        file_name = variant.file_name()
+        with open(output_dir / file_name, mode="w") as f:
+            f.write(output)
+        results.append(SweepResult(variant, file_name, size, estimate_resources(size, calibration)))
+    return results
+
+
+# The table of the worker process, loaded once by init_sweep_worker
+_worker_table_data: Optional[TableData] = None
+_worker_active_space_table: Optional[ActiveSpaceTable] = None
+
+
+def init_sweep_worker(table_path: str, electron_number: int) -> None:
+    global _worker_table_data, _worker_active_space_table  # noqa: PLW0603
+    _worker_table_data = TableData()
+    load_table_data_binary(_worker_table_data, Path(table_path))
+    # The electron number of the table has been corrected by TableData.validate in the main process
+    _worker_table_data.header_info.electron_number = electron_number
+    _worker_active_space_table = ActiveSpaceTable(_worker_table_data)
+
+
+def run_definition_in_worker(
+    definition: SweepSpaceDefinition,
+    variants: Sequence[SweepVariant],
+    output_dir: str,
+    dirac_ver: int,
+    calibration: Optional[ResourceCalibration],
+) -> List[SweepResult]:
+    if _worker_table_data is None or _worker_active_space_table is None:
+        msg = "init_sweep_worker has not been called in this process."
+        raise RuntimeError(msg)
+    return create_definition_inputs(
+        _worker_table_data,
+        _worker_active_space_table,
+        definition,
+        variants,
+        output_dir=Path(output_dir),
+        dirac_ver=dirac_ver,
+        calibration=calibration,
+    )
+
+
+def run_sweep(
+    table_data: TableData,
+    grid: SweepGrid,
+    output_dir: Path,
+    *,
+    dirac_ver: int,
+    num_process: int = 1,
+    calibration: Optional[ResourceCalibration] = None,
+    node_memory: Optional[int] = None,
+    progress: Optional[Callable[[int, int], None]] = None,
+    is_canceled: Optional[Callable[[], bool]] = None,
+) -> SweepSummary:
+    """Write the inputs of all variants of the grid and the manifest to output_dir.
+    The variants that cannot be created (e.g. too few active rows for ras1_rows) are written to the manifest
+    with the error message instead of raising an exception.
+    progress(finished variants, all variants) is called after each definition.
+    If is_canceled returns True, the remaining definitions are skipped
+    and the manifest lists only the variants finished before that."""
+    output_dir.mkdir(parents=True, exist_ok=True)
+    variants_by_definition: Dict[SweepSpaceDefinition, List[SweepVariant]] = {}
+    for variant in grid.create_variants():
+        variants_by_definition.setdefault(variant.definition, []).append(variant)
+    num_variants = sum(map(len, variants_by_definition.values()))
+
+    results: List[SweepResult] = []
+    canceled = False
+
+    def add_results(definition_results: List[SweepResult]) -> bool:
+        # Return False if the sweep is canceled
+        results.extend(definition_results)
+        if progress is not None:
+            progress(len(results), num_variants)
+        return is_canceled is None or not is_canceled()
+
+    num_workers = min(num_process, len(variants_by_definition))
+    if len(variants_by_definition) * len(table_data.mo_data) < SWEEP_PARALLEL_MIN_WORK:
+        num_workers = 1
+    with trace_span("sweep", variants=num_variants, workers=num_workers):
+        if num_workers <= 1:
+            # The MOLTRA mask and the energies of the table are shared by all definitions
+            table = ActiveSpaceTable(table_data)
+            for definition, variants in variants_by_definition.items():
+                definition_results = create_definition_inputs(
+                    table_data,
+                    table,
+                    definition,
+                    variants,
+                    output_dir=output_dir,
+                    dirac_ver=dirac_ver,
+                    calibration=calibration,
+                )
+                if not add_results(definition_results):
+                    canceled = True
+                    break
+        else:
+            canceled = run_sweep_in_workers(
+                table_data,
+                variants_by_definition,
+                output_dir=output_dir,
+                dirac_ver=dirac_ver,
+                calibration=calibration,
+                num_workers=num_workers,
+                add_results=add_results,
+            )
+    results.sort(key=lambda result: result.variant.index)
+    manifest_path = output_dir / SWEEP_MANIFEST_NAME
+    write_sweep_manifest(results, manifest_path, node_memory)
+    return SweepSummary(results, manifest_path, canceled)
+
+
+def run_sweep_in_workers(
+    table_data: TableData,
+    variants_by_definition: Dict[SweepSpaceDefinition, List[SweepVariant]],
+    *,
+    output_dir: Path,
+    dirac_ver: int,
+    calibration: Optional[ResourceCalibration],
+    num_workers: int,
+    add_results: Callable[[List[SweepResult]], bool],
+) -> bool:
+    """Run the definitions in the worker processes and pass the results of each definition to add_results.
+    Return True if add_results has returned False (canceled), then the definitions not started are skipped."""
+    # multiprocessing is imported at the first use to reduce the startup time of the application
+    import multiprocessing  # noqa: PLC0415
+    from concurrent.futures import ProcessPoolExecutor, as_completed  # noqa: PLC0415
+
+    with tempfile.TemporaryDirectory() as tmp_dir:
+        # The workers read the table from the binary table file instead of receiving it with each task
+        table_path = Path(tmp_dir) / "sweep.dcaspt2tbl"
+        write_table_data_binary(table_data, table_path)
+        # Use spawn, because forking the GUI process (Qt) is not safe
+        with ProcessPoolExecutor(
+            max_workers=num_workers,
+            mp_context=multiprocessing.get_context("spawn"),
+            initializer=init_sweep_worker,
+            initargs=(str(table_path), table_data.header_info.electron_number),
+        ) as executor:
+            futures = [
+                executor.submit(run_definition_in_worker, definition, variants, str(output_dir), dirac_ver, calibration)
+                for definition, variants in variants_by_definition.items()
+            ]
+            for future in as_completed(futures):
+                futures.remove(future)
+                if not add_results(future.result()):
+                    for pending_future in futures:
+                        pending_future.cancel()
+                    # The definitions already running cannot be canceled, add their inputs to the manifest
+                    executor.shutdown(wait=True)
+                    for running_future in futures:
+                        if not running_future.cancelled():
+                            add_results(running_future.result())
+                    return True
+    return False
+
+
+def write_sweep_manifest(results: Sequence[SweepResult], file_path: Path, node_memory: Optional[int]) -> None:
+    with open(file_path, mode="w", newline="") as f:
+        writer = csv.writer(f)
+        writer.writerow(SWEEP_MANIFEST_COLUMNS)
+        for result in results:
+            variant = result.variant
+            row: List[Any] = [
+                variant.index,
+                result.file_name or "",
+                variant.definition.strategy,
+                variant.definition.params_str(),
+                variant.definition.ras1_rows,
+                variant.definition.ras3_rows,
+                variant.ras1_max_hole,
+                variant.ras3_max_electron,
+                variant.total_symmetry,
+            ]
+            size, estimate = result.size, result.estimate
+            if size is None or estimate is None:
+                row.extend([""] * (len(SWEEP_MANIFEST_COLUMNS) - len(row) - 1))
+            else:
+                seconds = estimate.seconds
+                fits = "" if node_memory is None else ("yes" if estimate.fits_in_memory(node_memory) else "no")
+                row.extend(
+                    [
+                        size.ninact,
+                        size.nras1,
+                        size.nras2,
+                        size.nras3,
+                        size.nsec,
+                        size.nelec,
+                        estimate.determinants,
+                        int(estimate.peak_memory) if math.isfinite(estimate.peak_memory) else "inf",
+                        format_bytes(estimate.peak_memory),
+                        estimate.peak_subprogram,
+                        "" if seconds is None else f"{seconds:.3g}",
+                        fits,
+                    ]
+                )
+            row.append(result.error)
+            writer.writerow(row)
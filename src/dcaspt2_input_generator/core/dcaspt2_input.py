@@ -0,0 +1,195 @@
+# This script creates the DIRAC-CASPT2 input from TableData and the orbital space of each row.
+# count_dcaspt2_spaces walks the rows once, format_dcaspt2_input only formats the counted values,
+# so the inputs that differ only in the user input values (e.g. total symmetry) share one walk over the rows.
+# It does not depend on PySide6, so it can be used without the GUI.
+from dataclasses import dataclass
+from typing import Dict, List, Optional, Sequence
+
+from dcaspt2_input_generator.core.table_data import OrbitalSpace, TableData
+from dcaspt2_input_generator.utils.utils import create_ras_str
+
+
+@dataclass
+class Dcaspt2Spaces:
+    """The values of the DIRAC-CASPT2 input that depend only on the orbital spaces (the numbers are spinors)"""
+
+    ninact: int
+    nact: int
+    nelec: int
+    nsec: int
+    is_gerade_ungerade: bool
+    nocc: Dict[str, int]
+    nvcut: Dict[str, int]
+    is_cas: bool
+    ras1_list: List[int]
+    ras2_list: List[int]
+    ras3_list: List[int]
+    moltra_scheme: Optional[int]
+
+
+def create_dcaspt2_input(
+    table_data: TableData,
+    spaces: Sequence[int],
+    *,
+    total_symmetry: int,
+    dirac_ver: int,
+    ras1_max_hole: int,
+    ras3_max_electron: int,
+) -> str:
+    """Create the DIRAC-CASPT2 input string.
+
+    Args:
+        table_data (TableData): MO data sorted by energy
+        spaces (Sequence[int]): orbital space (OrbitalSpace value) of each row of table_data.mo_data
+        total_symmetry (int): .caspt2_ciroots total symmetry number
+        dirac_ver (int): DIRAC major version
+        ras1_max_hole (int): maximum number of holes in ras1
+        ras3_max_electron (int): maximum number of electrons in ras3
+
+    Returns:
+        str: DIRAC-CASPT2 input
+    """
+    return format_dcaspt2_input(
+        count_dcaspt2_spaces(table_data, spaces),
+        total_symmetry=total_symmetry,
+        dirac_ver=dirac_ver,
+        ras1_max_hole=ras1_max_hole,
+        ras3_max_electron=ras3_max_electron,
+    )
+
+
+def count_dcaspt2_spaces(table_data: TableData, spaces: Sequence[int]) -> Dcaspt2Spaces:
+    """Count the spinors of each orbital space and the IVO (nocc, nvcut) and RAS settings.
+    spaces: the OrbitalSpace value of each row (e.g. table_data.spaces or the bytearray of create_active_space)
+
+    Raises:
+        ValueError: If the numbers of spaces and rows are not same.
+    """
+
+    def add_nelec(cur_nelec: int, rem_electrons: int) -> int:
+        if rem_electrons > 0:
+            cur_nelec += min(rem_electrons, 2)
+        return cur_nelec
+
+    if len(spaces) != len(table_data.mo_data):
+        msg = f"The number of orbital spaces ({len(spaces)}) and rows ({len(table_data.mo_data)}) are not same."
+        raise ValueError(msg)
+
+    # Create info for standard IVO input
+    # E1g,u or E1?
+    is_gerade_ungerade = True if table_data.header_info.spinor_num_info.keys() == {"E1g", "E1u"} else False
+    nocc: Dict[str, int]
+    nvcut: Dict[str, int]
+    if is_gerade_ungerade:
+        nocc = {"E1g": 0, "E1u": 0}
+        nvcut = {"E1g": 0, "E1u": 0}
+    else:
+        nocc = {"E1": 0}
+        nvcut = {"E1": 0}
+    inact = 0
+    act = 0
+    sec = 0
+    elec = 0
+    idx_caspt2 = 0
+    ras1_list: List[int] = []
+    ras2_list: List[int] = []
+    ras3_list: List[int] = []
+    rem_electrons = table_data.header_info.electron_number
+    is_cas = True
+    last_ras2_idx = -1
+    for idx, space in enumerate(spaces):
+        spinor_indices = [2 * idx_caspt2 + 1, 2 * idx_caspt2 + 2]  # 1 row = 2 spinors
+        sym_str = table_data.mo_data.get_mo_symmetry(idx)
+
+        if space != OrbitalSpace.not_used:
+            idx_caspt2 += 1
+        if space == OrbitalSpace.inactive:
+            inact += 2
+        elif space == OrbitalSpace.ras1:
+            act += 2
+            ras1_list.extend(spinor_indices)
+            elec = add_nelec(elec, rem_electrons)
+            is_cas = False
+        elif space == OrbitalSpace.active:
+            act += 2
+            ras2_list.extend(spinor_indices)
+            elec = add_nelec(elec, rem_electrons)
+            if last_ras2_idx not in (-1, idx - 1):
+                is_cas = False
+            last_ras2_idx = idx
+        elif space == OrbitalSpace.ras3:
+            act += 2
+            elec = add_nelec(elec, rem_electrons)
+            ras3_list.extend(spinor_indices)
+            is_cas = False
+        elif space == OrbitalSpace.secondary:
+            sec += 2
+        # nocc, nvcut
+        if rem_electrons > 0:
+            nocc[sym_str] += 1
+        elif space != OrbitalSpace.not_used:
+            # Reset nvcut
+            for k in nvcut.keys():
+                nvcut[k] = 0
+        else:
+            nvcut[sym_str] += 1
+        rem_electrons -= 2
+
+    return Dcaspt2Spaces(
+        ninact=inact,
+        nact=act,
+        nelec=elec,
+        nsec=sec,
+        is_gerade_ungerade=is_gerade_ungerade,
+        nocc=nocc,
+        nvcut=nvcut,
+        is_cas=is_cas,
+        ras1_list=ras1_list,
+        ras2_list=ras2_list,
+        ras3_list=ras3_list,
+        moltra_scheme=table_data.header_info.moltra_scheme,
+    )
+
+
+def format_dcaspt2_input(
+    dcaspt2_spaces: Dcaspt2Spaces,
+    *,
+    total_symmetry: int,
+    dirac_ver: int,
+    ras1_max_hole: int,
+    ras3_max_electron: int,
+) -> str:
+    """Create the DIRAC-CASPT2 input string from the values counted by count_dcaspt2_spaces."""
+    nocc = dcaspt2_spaces.nocc
+    nvcut = dcaspt2_spaces.nvcut
+    output = f".ninact\n{dcaspt2_spaces.ninact}\n"
+    output += f".nact\n{dcaspt2_spaces.nact}\n"
+    output += f".nelec\n{dcaspt2_spaces.nelec}\n"
+    output += f".nsec\n{dcaspt2_spaces.nsec}\n"
+    output += f".caspt2_ciroots\n{total_symmetry} 1\n"  # CASCI/CASPT2 root is fixed to 1
+    if dcaspt2_spaces.is_gerade_ungerade:
+        output += f".noccg\n{nocc['E1g']}\n.noccu\n{nocc['E1u']}\n"
+        output += "" if sum(nvcut.values()) == 0 else f".nvcutg\n{nvcut['E1g']}\n.nvcutu\n{nvcut['E1u']}\n"
+    else:
+        output += f".nocc\n{nocc['E1']}\n"
+        output += "" if sum(nvcut.values()) == 0 else f".nvcut\n{nvcut['E1']}\n"
+    output += f".diracver\n{dirac_ver}\n"
+    output += "# NOTE: If you want to use this input to stand-alone version of DIRAC_CASPT2,\n"
+    output += "# you cannot specify IVO and CASCI or CASPT2 simultaneously.\n"
+    output += "# Please comment out subprograms depend on the calculation you want to run.\n"
+    output += ".subprograms\nIVO\nCASCI\nCASPT2\n"
+    if dcaspt2_spaces.moltra_scheme is not None:
+        output += f".scheme\n{dcaspt2_spaces.moltra_scheme}\n"  # Explicitly set MOLTRA scheme.
+
+    if not dcaspt2_spaces.is_cas:
+        ras1_list = dcaspt2_spaces.ras1_list
+        ras2_list = dcaspt2_spaces.ras2_list
+        ras3_list = dcaspt2_spaces.ras3_list
+        ras1_str = create_ras_str(sorted(ras1_list))
+        ras2_str = create_ras_str(sorted(ras2_list))
+        ras3_str = create_ras_str(sorted(ras3_list))
+        output += "" if len(ras1_list) == 0 else f".ras1\n{ras1_str}\n{ras1_max_hole}\n"
+        output += "" if len(ras2_list) == 0 else f".ras2\n{ras2_str}\n"
+        output += "" if len(ras3_list) == 0 else f".ras3\n{ras3_str}\n{ras3_max_electron}\n"
+    output += ".end\n"
+    return output
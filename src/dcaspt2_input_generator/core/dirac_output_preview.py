@@ -0,0 +1,436 @@
+# This script reads the header information and the orbital energies from a DIRAC output directly,
+# without running sum_dirac_dfcoef.
+# They are written in a few small sections of the DIRAC output (the input file, SYMGRP and the SCF eigenvalues),
+# so the file is memory-mapped and only these sections are decoded and parsed.
+# The result is the same tokens as the sum_dirac_dfcoef output without the AO columns,
+# so the table can be shown before sum_dirac_dfcoef finishes analysing the AO coefficients.
+# The parsing rules follow sum_dirac_dfcoef (header_info.py, eigenvalues.py, electron_num.py, moltra.py and scheme.py).
+# It does not depend on PySide6, so it can be used without the GUI.
+import mmap
+import re
+from bisect import bisect_left, bisect_right
+from pathlib import Path
+from typing import Dict, Iterator, List, Tuple
+
+from dcaspt2_input_generator.core.sum_dirac_dfcoef_pool import SumDiracDfcoefRows
+from dcaspt2_input_generator.utils.tracing import trace_span
+
+INPUT_FIELD_START = b"Contents of the input file"
+INPUT_FIELD_END = b"Contents of the molecule file"
+ELECTRONIC_EIGENVALUE_TYPES = ("closed", "open", "virtual")
+# The same as -d 3 in SUM_DIRAC_DFCOEF_ANALYSIS_OPTIONS
+ENERGY_DECIMAL = 3
+# (e.g.) "* Fermion symmetry E1g" => words[SYMMETRY_TYPE_WORD_IDX] is the symmetry type
+SYMMETRY_TYPE_WORD_IDX = 3
+
+
+class DiracOutputPreviewError(ValueError):
+    pass
+
+
+def iter_lines(mm: mmap.mmap, start: int, end: int = -1) -> Iterator[str]:
+    mm.seek(start)
+    while end == -1 or mm.tell() < end:
+        line = mm.readline()
+        if not line:
+            return
+        yield line.decode(errors="replace")
+
+
+def split_words(line: str) -> List[str]:
+    return [word for word in line.rstrip("\r\n").split(" ") if word != ""]
+
+
+def remove_comment(line: str) -> str:
+    match = re.search(r" *[!#]", line)
+    return line if match is None else line[: match.start()]
+
+
+def is_keyword(word: str) -> bool:
+    return re.match(r" *\.[0-9A-Z]+", word) is not None
+
+
+def is_section(word: str) -> bool:
+    return re.match(r" *\*{1,2}[0-9A-Z]+", word) is not None
+
+
+def is_section_two_stars(word: str) -> bool:
+    return re.match(r" *\*{2}[0-9A-Z]+", word) is not None
+
+
+def iter_input_words(input_lines: List[str]) -> Iterator[Tuple[str, List[str]]]:
+    """Yield (the line without comment, upper case words) of the DIRAC input, skipping empty and comment lines"""
+    for line in input_lines:
+        no_comment_line = remove_comment(line)
+        words = [word.upper() for word in split_words(no_comment_line)]
+        if len(words) > 0:
+            yield no_comment_line, words
+
+
+def get_a_natural_number(word: str) -> int:
+    match = re.search(r"[-]?[0-9]+", word)
+    if match is None or int(match.group()) < 0:
+        msg = f"Cannot read the number of electrons from the DIRAC input: {word}"
+        raise DiracOutputPreviewError(msg)
+    return int(match.group())
+
+
+def read_electron_number_from_input(input_lines: List[str]) -> int:
+    """Read .CLOSED SHELL and .OPEN SHELL in *SCF. Return 0 if they are not written."""
+    electron_num = 0
+    is_scf_found = False
+    is_scf_detail_section = False
+    is_closed_shell_section = False
+    is_open_shell_section = False
+    num_of_open_shell = 0
+    for _, words in iter_input_words(input_lines):
+        if ".SCF" in words[0]:
+            is_scf_found = True
+        if is_section(words[0]):
+            is_scf_detail_section = "*SCF" in words[0]
+        if not is_scf_detail_section:
+            continue
+        if is_open_shell_section:
+            # .OPEN SHELL
+            # num_of_open_shell
+            # num_of_elec/irrep1_num_spinor irrep2_num_spinor ...
+            if num_of_open_shell == 0:
+                num_of_open_shell = get_a_natural_number(words[0])
+            else:
+                electron_num += get_a_natural_number(words[0])
+                num_of_open_shell -= 1
+                is_open_shell_section = num_of_open_shell != 0
+        if is_closed_shell_section:
+            # .CLOSED SHELL
+            # irrep1_num_spinor irrep2_num_spinor ...
+            electron_num += sum(get_a_natural_number(word) for word in words)
+            is_closed_shell_section = False
+        if len(words) > 1 and words[0] == ".CLOSED" and "SHELL" in words[1]:
+            is_closed_shell_section = True
+        if len(words) > 1 and words[0] == ".OPEN" and "SHELL" in words[1]:
+            is_open_shell_section = True
+    if not is_scf_found:
+        msg = "Cannot find .SCF in the DIRAC input. The orbital energies are not written without SCF calculation."
+        raise DiracOutputPreviewError(msg)
+    return electron_num
+
+
+def read_moltra_range_str(input_lines: List[str]) -> List[str]:
+    """Return the lines of **MOLTRA > .ACTIVE (e.g.) ["energy -20 10 2", "10..180"]. [] if .ACTIVE is not written."""
+    range_str: List[str] = []
+    is_moltra_section = False
+    is_next_line_active = False
+    for no_comment_line, words in iter_input_words(input_lines):
+        if is_section_two_stars(words[0]) and "**MOLTRA" in words[0]:
+            is_moltra_section = True
+            continue
+        if is_moltra_section and ".ACTIVE" in words[0]:
+            is_next_line_active = True
+            continue
+        if is_next_line_active:
+            if is_section(words[0]) or is_keyword(words[0]):
+                break  # End of the .ACTIVE section
+            range_str.append(no_comment_line.strip())
+    return range_str
+
+
+def read_moltra_scheme(input_lines: List[str]) -> int:
+    """Return **MOLTRA > .SCHEME or 0 if it is not written"""
+    is_moltra_section = False
+    is_next_line_scheme = False
+    for _, words in iter_input_words(input_lines):
+        if is_section_two_stars(words[0]) and "**MOLTRA" in words[0]:
+            is_moltra_section = True
+            continue
+        if is_moltra_section and ".SCHEME" in words[0]:
+            is_next_line_scheme = True
+            continue
+        if is_next_line_scheme:
+            if is_section(words[0]) or is_keyword(words[0]):
+                break
+            return int(words[0])
+    return 0
+
+
+def read_electron_number_from_scf_field(mm: mmap.mmap, start: int) -> int:
+    # (e.g.) "   i.e. no. of electrons =  18" after "Wave function module"
+    pos = mm.find(b"Wave function module", start)
+    pos = mm.find(b"i.e. no. of electrons", pos) if pos != -1 else -1
+    if pos == -1:
+        msg = "Cannot find the number of electrons in the DIRAC output."
+        raise DiracOutputPreviewError(msg)
+    return int(split_words(next(iter_lines(mm, pos)))[5])
+
+
+def read_point_group(mm: mmap.mmap, start: int) -> Tuple[str, int]:
+    """Return the point group and the position after it"""
+    pos = mm.find(b"SYMGRP", start)
+    if pos != -1:
+        mm.seek(pos)
+        mm.readline()
+        for line in iter_lines(mm, mm.tell()):
+            if "Represented as" in line or "Point group:" in line:
+                return split_words(line)[-1], mm.tell()
+            stripped_line = line.strip()
+            if len(stripped_line) > 0 and all(char == "*" for char in stripped_line):
+                break
+    msg = "The symmetry group is not found in the DIRAC output."
+    raise DiracOutputPreviewError(msg)
+
+
+class EigenvaluesReader:
+    """Read the SCF eigenvalues section (from "Eigenvalues" to "HOMO - LUMO").
+    Both the standard print (* Fermion symmetry E1g) and the supersymmetry print (* Block 1 in E1g: ...) are supported.
+
+    shell_num[symmetry_type][eigenvalue_type] is the number of spinors (eigenvalue_type: closed, open, virtual, ...)
+    energies[symmetry_type] is the list of (eigenvalue_type, energy) of each Kramers pair in the printed order.
+    """
+
+    def __init__(self):
+        self.shell_num: Dict[str, Dict[str, int]] = {}
+        self.energies: Dict[str, List[Tuple[str, float]]] = {}
+        # The energies of the supersymmetry print are collected per omega and ordered by the occupation info
+        self.omega: Dict[str, Dict[str, List[float]]] = {}
+        self.symmetry_type = ""
+        self.eigenvalue_type = ""
+        self.omega_str = ""
+
+    def set_symmetry_type(self, symmetry_type: str) -> None:
+        self.symmetry_type = symmetry_type
+        self.shell_num.setdefault(symmetry_type, {"closed": 0, "open": 0, "virtual": 0, "negative": 0, "positronic": 0})
+        self.energies.setdefault(symmetry_type, [])
+
+    def read(self, lines: Iterator[str]) -> None:
+        is_header_found = False
+        print_type = ""  # "standard" or "supersymmetry"
+        is_atomic = False
+        is_occupation_info = False
+        omega_list: List[str] = []
+        occ_idx: Dict[str, int] = {}
+        for line in lines:
+            words = split_words(line)
+            if len(words) == 0:
+                continue
+            if not is_header_found:
+                is_header_found = words[0] == "Eigenvalues"
+            elif print_type == "":
+                if (
+                    words[0] == "*"
+                    and len(words) > SYMMETRY_TYPE_WORD_IDX
+                    and "Fermion" in words[1]
+                    and "symmetry" in words[2]
+                ):
+                    print_type = "standard"
+                    self.set_symmetry_type(words[SYMMETRY_TYPE_WORD_IDX])
+                elif "* Block" in line:
+                    print_type = "supersymmetry"
+                    is_atomic = ";" in line
+                    self.read_block_line(line, words)
+            elif "HOMO - LUMO" in line:
+                break
+            elif not is_occupation_info:
+                if (
+                    print_type == "standard"
+                    and words[0] == "*"
+                    and len(words) > SYMMETRY_TYPE_WORD_IDX
+                    and "Fermion" in words[1]
+                ):
+                    self.set_symmetry_type(words[SYMMETRY_TYPE_WORD_IDX])
+                elif print_type == "supersymmetry" and "* Block" in line:
+                    self.read_block_line(line, words)
+                elif self.is_eigenvalue_type_line(words):
+                    self.eigenvalue_type = words[1].lower()
+                elif "Occupation in fermion symmetry" in line:
+                    is_occupation_info = True
+                    occ_idx = self.prepare_occupation_info(words)
+                else:
+                    self.read_eigenvalues(line, print_type)
+            elif "Occupation of" in line:  # The occupation info ends
+                break
+            elif "Occupation in fermion symmetry" in line:
+                occ_idx = self.prepare_occupation_info(words)
+            elif "orbitals" in line:
+                # * Inactive orbitals => closed
+                self.eigenvalue_type = {"inactive": "closed", "active": "open"}.get(words[1].lower(), "virtual")
+            elif "Mj" in line:
+                mj_list = split_by_slash2(line.replace("Mj", ""))
+                if len(mj_list) != len(omega_list):
+                    msg = f"The number of Mj and omega are not same. line: {line}"
+                    raise DiracOutputPreviewError(msg)
+                omega_list = [f"{omega} {mj}" for omega, mj in zip(omega_list, mj_list)]
+                self.append_supersymmetry_energies(omega_list, occ_idx)
+            elif is_atomic:
+                omega_list = split_by_slash2(line)
+            else:  # molecular
+                omega_list = split_by_slash2(line)
+                self.append_supersymmetry_energies(omega_list, occ_idx)
+        if not is_header_found or print_type == "":
+            msg = "The SCF eigenvalues are not found in the DIRAC output."
+            raise DiracOutputPreviewError(msg)
+
+    @staticmethod
+    def is_eigenvalue_type_line(words: List[str]) -> bool:
+        # * Closed shell, * Open shell, * Virtual eigenvalues, * Negative energy eigenvalues, * Positronic eigenvalues
+        if words[:1] != ["*"]:
+            return False
+        return words[1:3] in (
+            ["Closed", "shell,"],
+            ["Open", "shell"],
+            ["Virtual", "eigenvalues,"],
+            ["Positronic", "eigenvalues,"],
+        ) or words[1:4] == ["Negative", "energy", "eigenvalues,"]
+
+    def read_block_line(self, line: str, words: List[str]) -> None:
+        # * Block   3 in E1u:  Omega =  5/2    => symmetry_type: E1u, omega: 5/2
+        # * Block   3 in E1u:  p 3/2; -3/2     => symmetry_type: E1u, omega: p 3/2 -3/2
+        self.set_symmetry_type(line[line.index("in") + 2 : line.index(":")].strip())
+        if "Omega" in line:
+            self.omega_str = words[-1].replace("=", "").strip()
+        else:
+            omega_str = line[line.index(":") + 1 : len(line) - 1].strip()
+            if ";" in omega_str:
+                jval, mjval = omega_str.split(";")[:2]
+                omega_str = f"{jval.strip()} {mjval.strip()}"
+            self.omega_str = omega_str
+        self.omega.setdefault(self.symmetry_type, {}).setdefault(self.omega_str, [])
+
+    def read_eigenvalues(self, line: str, print_type: str) -> None:
+        # (e.g.) -775.202926514  ( 2)  -775.202926514  ( 2)
+        start_idx = 0
+        while True:
+            energy_match = re.search(r"[-]?[0-9]+\.?[0-9]+", line[start_idx:])
+            num_match = re.search(r"\([ ]*[0-9]+\)", line[start_idx:])
+            if energy_match is None or num_match is None:
+                break
+            energy = float(energy_match.group())
+            num = int(num_match.group()[1:-1])
+            self.shell_num[self.symmetry_type][self.eigenvalue_type] += num
+            for _ in range(0, num, 2):  # 1 Kramers pair = 2 spinors
+                if print_type == "standard":
+                    self.energies[self.symmetry_type].append((self.eigenvalue_type, energy))
+                else:
+                    self.omega[self.symmetry_type][self.omega_str].append(energy)
+            start_idx += num_match.end()
+
+    def prepare_occupation_info(self, words: List[str]) -> Dict[str, int]:
+        self.symmetry_type = words[-1]
+        return dict.fromkeys(self.omega.get(self.symmetry_type, {}), 0)
+
+    def append_supersymmetry_energies(self, omega_list: List[str], occ_idx: Dict[str, int]) -> None:
+        for omega in omega_list:
+            if omega not in occ_idx:
+                msg = f"Cannot find omega {omega} in the eigenvalues of {self.symmetry_type}"
+                raise DiracOutputPreviewError(msg)
+            energy = self.omega[self.symmetry_type][omega][occ_idx[omega]]
+            self.energies[self.symmetry_type].append((self.eigenvalue_type, energy))
+            occ_idx[omega] += 1
+
+    def electronic_energies(self, symmetry_type: str) -> List[float]:
+        return [
+            energy
+            for eigenvalue_type, energy in self.energies[symmetry_type]
+            if eigenvalue_type in ELECTRONIC_EIGENVALUE_TYPES
+        ]
+
+
+def split_by_slash2(line: str) -> List[str]:
+    # (e.g. atomic  ) "s 1/2 d 3/2 s 1/2" => ["s 1/2", "d 3/2", "s 1/2"]
+    # (e.g. molecule) "1/2 1/2 3/2" => ["1/2", "1/2", "3/2"]
+    return [f"{item.strip()}/2" for item in line.strip("\r\n").split("/2") if item.strip("\r\n")]
+
+
+def create_moltra_range(range_str: str, energies: List[float]) -> str:
+    """Convert a line of **MOLTRA > .ACTIVE to the range of the electronic Kramers pairs.
+    (e.g.) "ENERGY -20.0 10.0 1.0" => "1..33", "10..oo" => "10..33" (energies: 33 Kramers pairs)"""
+    num = len(energies)
+    if range_str.upper() == "ALL":
+        return f"1..{num}"
+    if "ENERGY" in range_str.upper():
+        min_energy, max_energy, step = map(float, range_str.upper().replace("ENERGY", "").split())
+        sorted_energies = sorted(energies)
+        min_idx = bisect_left(sorted_energies, min_energy)
+        max_idx = bisect_right(sorted_energies, max_energy)
+        if min_energy > max_energy or min_idx >= num or max_idx == 0:
+            msg = f"No orbitals in the MOLTRA energy range: {range_str}"
+            raise DiracOutputPreviewError(msg)
+        # Extend the range while the energy difference between the neighbouring orbitals is within the step
+        while min_idx > 0 and abs(sorted_energies[min_idx] - sorted_energies[min_idx - 1]) <= step:
+            min_idx -= 1
+        while max_idx < num and abs(sorted_energies[max_idx] - sorted_energies[max_idx - 1]) <= step:
+            max_idx += 1
+        if max_idx - min_idx == 1 and max_idx < num:
+            return f"{min_idx + 1}"
+        return f"{min_idx + 1}..{max_idx}"
+    ranges: List[str] = []
+    for item in re.findall(r"[-]?(?:[0-9]+|oo)\.{2}[-]?(?:[0-9]+|oo)", range_str):
+        start, end = (1 if value == "-oo" else num if value == "oo" else int(value) for value in item.split(".."))
+        if start > end:
+            msg = f"The minimum index is larger than the maximum index: {item}"
+            raise DiracOutputPreviewError(msg)
+        ranges.append(f"{start}..{end}")
+    if len(ranges) == 0:
+        msg = f"Cannot read the MOLTRA range: {range_str}"
+        raise DiracOutputPreviewError(msg)
+    return ",".join(ranges)
+
+
+def read_dirac_output_preview(dirac_output: Path) -> SumDiracDfcoefRows:
+    """Return the header and the rows (symmetry, MO number, energy) without AO columns of the DIRAC output.
+
+    Raises:
+        DiracOutputPreviewError: If the sections are not found (e.g. the file is not a DIRAC output).
+    """
+    with trace_span("preview parse", path=str(dirac_output)), open(dirac_output, "rb") as f:
+        try:
+            mm = mmap.mmap(f.fileno(), 0, access=mmap.ACCESS_READ)
+        except ValueError as e:  # empty file
+            raise DiracOutputPreviewError(str(e)) from e
+        with mm:
+            return read_sections(mm)
+
+
+def read_sections(mm: mmap.mmap) -> SumDiracDfcoefRows:
+    input_start = mm.find(INPUT_FIELD_START)
+    input_end = mm.find(INPUT_FIELD_END, input_start) if input_start != -1 else -1
+    if input_end == -1:
+        msg = "The DIRAC input is not found in the file. Is this DIRAC output file?"
+        raise DiracOutputPreviewError(msg)
+    # The input field is the lines between the two lines
+    input_lines = list(iter_lines(mm, input_start, mm.rfind(b"\n", input_start, input_end) + 1))[1:]
+
+    electron_num = read_electron_number_from_input(input_lines)
+    if electron_num == 0:
+        electron_num = read_electron_number_from_scf_field(mm, input_end)
+    scheme = read_moltra_scheme(input_lines)
+    moltra_range_str = read_moltra_range_str(input_lines)
+    point_group, pos = read_point_group(mm, input_end)
+
+    scf_pos = mm.find(b"SCF - CYCLE", pos)
+    if scf_pos == -1:
+        msg = "The SCF calculation is not found in the DIRAC output."
+        raise DiracOutputPreviewError(msg)
+    reader = EigenvaluesReader()
+    reader.read(iter_lines(mm, scf_pos))
+
+    symmetry_types = list(reader.shell_num.keys())
+    if len(moltra_range_str) == 0:
+        moltra_range_str = ["ENERGY -20.0 10.0 1.0"]  # The default of **MOLTRA > .ACTIVE
+    # A line of .ACTIVE is used for all symmetries if the number of lines is less than the number of symmetries
+    moltra_range_str += [moltra_range_str[0]] * (len(symmetry_types) - len(moltra_range_str))
+
+    result = SumDiracDfcoefRows()
+    result.header_rows.append(
+        ["electron_num", str(electron_num), "point_group", point_group, "moltra_scheme", str(scheme or "default")]
+    )
+    moltra_row: List[str] = []
+    spinor_num_row: List[str] = []
+    for symmetry_type, range_str in zip(symmetry_types, moltra_range_str):
+        moltra_row.extend([symmetry_type, create_moltra_range(range_str, reader.electronic_energies(symmetry_type))])
+        spinor_num_row.append(symmetry_type)
+        for eigenvalue_type in ELECTRONIC_EIGENVALUE_TYPES:
+            spinor_num_row.extend([eigenvalue_type, str(reader.shell_num[symmetry_type][eigenvalue_type])])
+    result.header_rows.extend([moltra_row, spinor_num_row])
+    for symmetry_type in symmetry_types:
+        for mo_number, energy in enumerate(reader.electronic_energies(symmetry_type), start=1):
+            result.rows.append([symmetry_type, str(mo_number), f"{energy:.{ENERGY_DECIMAL}f}"])
+    return result
@@ -0,0 +1,120 @@
+# This script detects the format of a file opened by the user from the first PROBE_SIZE bytes (probe),
+# so that the file is passed directly to its loader without parsing the whole file first.
+# A new format is added by register_file_format, and the formats are probed in the registered order.
+# It does not depend on PySide6, so it can be used without the GUI.
+import re
+import struct
+from dataclasses import dataclass, field
+from pathlib import Path
+from typing import Callable, Dict, List, Optional
+
+from dcaspt2_input_generator.core.session import SESSION_MAGIC
+from dcaspt2_input_generator.core.table_data_binary import HEADER_FORMAT, HEADER_SIZE, TABLE_DATA_BINARY_MAGIC
+
+PROBE_SIZE = 32 * 1024
+
+SUM_DIRAC_DFCOEF_FORMAT = "sum_dirac_dfcoef"
+TABLE_DATA_BINARY_FORMAT = "table_data_binary"
+SESSION_FORMAT = "session"
+DIRAC_OUTPUT_FORMAT = "dirac_output"
+UNKNOWN_FORMAT = "unknown"
+
+# The number of header lines of the sum_dirac_dfcoef output
+SUM_DIRAC_DFCOEF_HEADER_LINES = 3
+
+# The lines written at the beginning of the DIRAC output
+# (e.g.) "DIRAC master    (host) starts by allocating ...", "DIRAC serial starts by allocating ..."
+DIRAC_BANNER = re.compile(rb"^ *DIRAC (?:master|serial|nodes)|diracprogram\.org|Contents of the input file", re.M)
+DIRAC_HOST = re.compile(rb"^ *DIRAC master +\(([^)]*)\)", re.M)
+
+
+@dataclass
+class FileFormat:
+    """probe returns the header facts if head (the first PROBE_SIZE bytes of the file) is this format, otherwise None"""
+
+    name: str
+    description: str
+    probe: Callable[[bytes], Optional[Dict[str, str]]]
+
+
+@dataclass
+class FileProbe:
+    path: Path
+    format_name: str
+    facts: Dict[str, str] = field(default_factory=dict)
+
+
+def probe_sum_dirac_dfcoef(head: bytes) -> Optional[Dict[str, str]]:
+    # The 1st line of sum_dirac_dfcoef output for dcaspt2_input_generator starts with "electron_num"
+    # (e.g.) electron_num 18 point_group D2h moltra_scheme default
+    #        E1g 1..33 E1u 1..33
+    #        E1g closed 6 open 0 virtual 60 E1u closed 12 open 0 virtual 54
+    lines = head.split(b"\n", SUM_DIRAC_DFCOEF_HEADER_LINES)
+    first_line = lines[0].decode(errors="replace").split()
+    if len(first_line) == 0 or first_line[0] != "electron_num":
+        return None
+    facts = dict(zip(first_line[::2], first_line[1::2]))
+    if len(lines) > SUM_DIRAC_DFCOEF_HEADER_LINES:  # The 3rd line is complete
+        facts["symmetry_types"] = " ".join(lines[2].decode(errors="replace").split()[::7])
+    return facts
+
+
+def probe_table_data_binary(head: bytes) -> Optional[Dict[str, str]]:
+    if not head.startswith(TABLE_DATA_BINARY_MAGIC):
+        return None
+    facts: Dict[str, str] = {}
+    if len(head) >= HEADER_SIZE:
+        _, version, _, _ = struct.unpack_from(HEADER_FORMAT, head, 0)
+        facts["version"] = str(version)
+    return facts
+
+
+def probe_session(head: bytes) -> Optional[Dict[str, str]]:
+    # The session file has the same layout as the binary table file
+    return (
+        probe_table_data_binary(TABLE_DATA_BINARY_MAGIC + head[len(SESSION_MAGIC) :])
+        if head.startswith(SESSION_MAGIC)
+        else None
+    )
+
+
+def probe_dirac_output(head: bytes) -> Optional[Dict[str, str]]:
+    if DIRAC_BANNER.search(head) is None:
+        return None
+    facts: Dict[str, str] = {}
+    host = DIRAC_HOST.search(head)
+    if host is not None:
+        facts["host"] = host.group(1).decode(errors="replace")
+    return facts
+
+
+_file_formats: List[FileFormat] = []
+
+
+def register_file_format(file_format: FileFormat) -> None:
+    _file_formats.append(file_format)
+
+
+def get_file_formats() -> List[FileFormat]:
+    return list(_file_formats)
+
+
+def probe_file(file_path: Path) -> FileProbe:
+    """Return the format of the file and its header facts.
+
+    Raises:
+        OSError: If the file cannot be read (e.g. it does not exist).
+    """
+    with open(file_path, "rb") as f:
+        head = f.read(PROBE_SIZE)
+    for file_format in _file_formats:
+        facts = file_format.probe(head)
+        if facts is not None:
+            return FileProbe(file_path, file_format.name, facts)
+    return FileProbe(file_path, UNKNOWN_FORMAT)
+
+
+register_file_format(FileFormat(SUM_DIRAC_DFCOEF_FORMAT, "sum_dirac_dfcoef output", probe_sum_dirac_dfcoef))
+register_file_format(FileFormat(TABLE_DATA_BINARY_FORMAT, "binary table file", probe_table_data_binary))
+register_file_format(FileFormat(SESSION_FORMAT, "session file", probe_session))
+register_file_format(FileFormat(DIRAC_OUTPUT_FORMAT, "DIRAC output", probe_dirac_output))
@@ -0,0 +1,101 @@
+from bisect import bisect_right
+from typing import Iterator, List, Tuple
+
+
+class IntervalSet:
+    """A set of non-negative integers stored as sorted, disjoint and non-adjacent closed ranges.
+
+    (e.g.) {1, 2, 3, 4, 5, 8, 10, 11} is stored as starts = [1, 8, 10], ends = [5, 8, 11]
+    and rendered as "1..5 8 10..11".
+    The memory usage is proportional to the number of ranges, not the number of integers.
+    The point lookup is O(log(number of ranges)).
+    """
+
+    starts: List[int]
+    ends: List[int]
+
+    def __init__(self):
+        self.starts = []
+        self.ends = []
+
+    @classmethod
+    def from_range_str(cls, range_str: str) -> "IntervalSet":
+        """(e.g.) "1..5,8,10..11" -> IntervalSet of {1, 2, 3, 4, 5, 8, 10, 11}"""
+        interval_set = cls()
+        for elem in range_str.split(","):
+            range_elem = elem.strip()
+            if ".." in range_elem:
+                start_str, end_str = range_elem.split("..")
+                interval_set.add_range(int(start_str), int(end_str))
+            else:
+                interval_set.add(int(range_elem))
+        return interval_set
+
+    def __contains__(self, value: object) -> bool:
+        if not isinstance(value, int):
+            return False
+        idx = bisect_right(self.starts, value) - 1
+        return idx >= 0 and value <= self.ends[idx]
+
+    def __eq__(self, other: object) -> bool:
+        if not isinstance(other, IntervalSet):
+            return NotImplemented
+        return self.starts == other.starts and self.ends == other.ends
+
+    # IntervalSet is mutable, so it is not hashable
+    __hash__ = None  # type: ignore[assignment]
+
+    def __len__(self) -> int:
+        """Return the number of integers in this set"""
+        return sum(end - start + 1 for start, end in self.ranges())
+
+    def __repr__(self) -> str:
+        return f"IntervalSet({self.to_range_str(',')!r})"
+
+    def ranges(self) -> Iterator[Tuple[int, int]]:
+        return zip(self.starts, self.ends)
+
+    def add(self, value: int) -> None:
+        self.add_range(value, value)
+
+    def add_range(self, start: int, end: int) -> None:
+        """Add all integers from start to end (including end)"""
+        if start > end:
+            msg = f"The start of the range must be less than or equal to the end. start: {start}, end: {end}"
+            raise ValueError(msg)
+        # Merge all ranges that overlap or are adjacent to [start, end]
+        left = bisect_right(self.ends, start - 2)  # the first range whose end >= start - 1
+        right = bisect_right(self.starts, end + 1)  # the ranges before right have start <= end + 1
+        if left < right:
+            start = min(start, self.starts[left])
+            end = max(end, self.ends[right - 1])
+        self.starts[left:right] = [start]
+        self.ends[left:right] = [end]
+
+    def discard(self, value: int) -> None:
+        idx = bisect_right(self.starts, value) - 1
+        if idx < 0 or value > self.ends[idx]:
+            return  # value is not in this set
+        start, end = self.starts[idx], self.ends[idx]
+        if start == end:
+            del self.starts[idx]
+            del self.ends[idx]
+        elif value == start:
+            self.starts[idx] = start + 1
+        elif value == end:
+            self.ends[idx] = end - 1
+        else:
+            # Split the range into [start, value - 1] and [value + 1, end]
+            self.ends[idx] = value - 1
+            self.starts.insert(idx + 1, value + 1)
+            self.ends.insert(idx + 1, end)
+
+    def set_value(self, value: int, *, is_included: bool) -> None:
+        if is_included:
+            self.add(value)
+        else:
+            self.discard(value)
+
+    def to_range_str(self, sep: str = " ") -> str:
+        """(e.g.) {1, 2, 3, 4, 5, 8, 10, 11} -> "1..5 8 10..11" (sep=" ")"""
+        return sep.join(str(start) if start == end else f"{start}..{end}" for start, end in self.ranges())
@@ -0,0 +1,428 @@
+# This script estimates the resources of each DIRAC-CASPT2 subprogram (IVO, CASCI and CASPT2)
+# from the orbital spaces of a table: the peak memory, the size of the integral files read by the subprogram
+# and the relative compute cost.
+# The models are the leading terms of each subprogram (e.g. the CI matrix of CASCI, the two-electron integrals
+# of CASPT2), so the estimates are meant to compare active spaces, not to predict the exact numbers.
+# The relative costs are converted to seconds (and the memory is scaled) by a ResourceCalibration
+# fitted to the timing logs of our own calculations (see calibrate_resources).
+# It does not depend on PySide6, so it can be used without the GUI
+# (e.g. to choose the active spaces that fit the node memory before submitting the jobs).
+import csv
+import json
+import math
+import sys
+from dataclasses import asdict, dataclass, field, fields
+from pathlib import Path
+from typing import Callable, Dict, Iterable, List, Optional, Sequence
+
+from dcaspt2_input_generator.core.table_data import OrbitalSpace, TableData
+
+REAL_BYTES = 8
+INDEX_BYTES = 8
+BYTE_UNITS = ("byte", "KB", "MB", "GB", "TB")
+KIB = 1024
+SECONDS_PER_MINUTE = 60
+SECONDS_PER_HOUR = 3600
+
+
+@dataclass(frozen=True)
+class PointGroupInfo:
+    # n_irreps: the CI space of one total symmetry is about 1/n_irreps of all determinants
+    # complex_integrals: the integrals have the real and imaginary parts (e.g. inttwr and inttwi)
+    n_irreps: int
+    complex_integrals: bool
+
+
+POINT_GROUPS: Dict[str, PointGroupInfo] = {
+    "C1": PointGroupInfo(1, True),
+    "Ci": PointGroupInfo(2, False),
+    "C2": PointGroupInfo(2, False),
+    "Cs": PointGroupInfo(2, False),
+    "C2h": PointGroupInfo(4, False),
+    "D2": PointGroupInfo(4, False),
+    "C2v": PointGroupInfo(4, False),
+    "D2h": PointGroupInfo(8, False),
+}
+UNKNOWN_POINT_GROUP = PointGroupInfo(1, False)
+
+
+@dataclass(frozen=True)
+class CalculationSize:
+    """The number of spinors of each orbital space of a DIRAC-CASPT2 calculation"""
+
+    point_group: str
+    ninact: int
+    nras1: int
+    nras2: int
+    nras3: int
+    nsec: int
+    nelec: int
+    ras1_max_hole: int = 0
+    ras3_max_electron: int = 0
+    # The occupied and virtual spinors of IVO (nocc, and the spinors up to nvcut)
+    ivo_occupied: int = 0
+    ivo_virtual: int = 0
+
+    @property
+    def nact(self) -> int:
+        return self.nras1 + self.nras2 + self.nras3
+
+    @property
+    def nocc(self) -> int:
+        """inactive + active spinors (the spinors with at least one occupied index in CASPT2)"""
+        return self.ninact + self.nact
+
+    @property
+    def point_group_info(self) -> PointGroupInfo:
+        return POINT_GROUPS.get(self.point_group, UNKNOWN_POINT_GROUP)
+
+    @property
+    def word_bytes(self) -> int:
+        return REAL_BYTES * (2 if self.point_group_info.complex_integrals else 1)
+
+    @classmethod
+    def from_table(
+        cls,
+        table_data: TableData,
+        spaces: Optional[Sequence[int]] = None,
+        *,
+        ras1_max_hole: int = 0,
+        ras3_max_electron: int = 0,
+    ) -> "CalculationSize":
+        """Count the spinors in the same way as create_dcaspt2_input (spaces: table_data.spaces by default).
+        bytes.count is used instead of a loop over the rows, so it is fast enough to be called on every edit."""
+        space_bytes = bytes(table_data.spaces if spaces is None else spaces)
+        electron_number = table_data.header_info.electron_number
+        # The rows before electron_number // 2 have 2 electrons, the next row has 1 electron if it is odd
+        filled_rows = space_bytes[: electron_number // 2]
+        nelec = 2 * sum(
+            filled_rows.count(space) for space in (OrbitalSpace.ras1, OrbitalSpace.active, OrbitalSpace.ras3)
+        )
+        if electron_number % 2 == 1 and len(space_bytes) > electron_number // 2:
+            if space_bytes[electron_number // 2] in (OrbitalSpace.ras1, OrbitalSpace.active, OrbitalSpace.ras3):
+                nelec += 1
+        occupied_rows = min((electron_number + 1) // 2, len(space_bytes))
+        used_end = len(space_bytes.rstrip(bytes([OrbitalSpace.not_used])))
+        # 1 row = 2 spinors
+        return cls(
+            point_group=table_data.header_info.point_group or "",
+            ninact=2 * space_bytes.count(OrbitalSpace.inactive),
+            nras1=2 * space_bytes.count(OrbitalSpace.ras1),
+            nras2=2 * space_bytes.count(OrbitalSpace.active),
+            nras3=2 * space_bytes.count(OrbitalSpace.ras3),
+            nsec=2 * space_bytes.count(OrbitalSpace.secondary),
+            nelec=nelec,
+            ras1_max_hole=ras1_max_hole,
+            ras3_max_electron=ras3_max_electron,
+            ivo_occupied=2 * occupied_rows,
+            ivo_virtual=2 * max(used_end - occupied_rows, 0),
+        )
+
+
+if sys.version_info >= (3, 8):
+    from math import comb
+else:
+
+    def comb(n: int, k: int) -> int:
+        # math.comb is not available in Python 3.7
+        if k < 0 or k > n:
+            return 0
+        k = min(k, n - k)
+        result = 1
+        for i in range(1, k + 1):
+            result = result * (n - k + i) // i
+        return result
+
+
+def to_float(value: int) -> float:
+    # The number of determinants of a large active space can exceed the range of float
+    try:
+        return float(value)
+    except OverflowError:
+        return math.inf
+
+
+def count_determinants(size: CalculationSize) -> int:
+    """Count the determinants of the CAS or RAS space of one total symmetry.
+    ras1 has at most ras1_max_hole holes and ras3 has at most ras3_max_electron electrons."""
+    total = 0
+    for holes in range(min(size.ras1_max_hole, size.nras1) + 1):
+        ras1_electrons = size.nras1 - holes
+        for ras3_electrons in range(min(size.ras3_max_electron, size.nras3) + 1):
+            ras2_electrons = size.nelec - ras1_electrons - ras3_electrons
+            if 0 <= ras2_electrons <= size.nras2:
+                total += (
+                    comb(size.nras1, ras1_electrons)
+                    * comb(size.nras2, ras2_electrons)
+                    * comb(size.nras3, ras3_electrons)
+                )
+    return -(-total // size.point_group_info.n_irreps)
+
+
+@dataclass(frozen=True)
+class SubprogramModel:
+    # Each function takes the size and the number of determinants (inf if it exceeds the range of float),
+    # memory and integral_files return bytes, cost returns the relative number of operations.
+    name: str
+    memory: Callable[[CalculationSize, float], float]
+    integral_files: Callable[[CalculationSize, float], float]
+    cost: Callable[[CalculationSize, float], float]
+
+
+def ivo_memory(size: CalculationSize, ndet: float) -> float:  # noqa: ARG001
+    # The Fock matrix and the eigenvectors of the virtual spinors, and the (vv|oo) and (vo|ov) integrals
+    nocc, nvir = size.ivo_occupied, size.ivo_virtual
+    return size.word_bytes * (2 * nvir**2 + 2 * nvir**2 * nocc**2)
+
+
+def ivo_integral_files(size: CalculationSize, ndet: float) -> float:  # noqa: ARG001
+    nocc, nvir = size.ivo_occupied, size.ivo_virtual
+    return size.word_bytes * 2 * nvir**2 * nocc**2
+
+
+def ivo_cost(size: CalculationSize, ndet: float) -> float:  # noqa: ARG001
+    nocc, nvir = size.ivo_occupied, size.ivo_virtual
+    return nvir**2 * nocc**2 + nvir**3
+
+
+def casci_memory(size: CalculationSize, ndet: float) -> float:
+    # The CI matrix is diagonalized directly, so it is the largest array
+    return size.word_bytes * (ndet * ndet + 2 * ndet + size.nact**4)
+
+
+def casci_integral_files(size: CalculationSize, ndet: float) -> float:  # noqa: ARG001
+    # The active integrals and the integrals for the inactive Fock matrix
+    return size.word_bytes * (size.nact**4 + size.nact**2 * size.ninact**2)
+
+
+def casci_cost(size: CalculationSize, ndet: float) -> float:
+    return ndet * ndet * ndet + ndet * ndet * size.nact**2
+
+
+def caspt2_memory(size: CalculationSize, ndet: float) -> float:
+    nocc, nsec = size.nocc, size.nsec
+    nall = nocc + nsec
+    inttwo = size.word_bytes * nocc**4  # inttwr, inttwi
+    inttwo_f1_f2 = 2 * size.word_bytes * nsec**2 * nocc**2  # inttwr_f1, inttwi_f1, inttwr_f2, inttwi_f2
+    indkl = 2 * INDEX_BYTES * nall**2  # indk, indl
+    rkl = size.word_bytes * nall**2  # rklr, rkli
+    # The CI vector and the two-body density matrix of the active spinors
+    density = size.word_bytes * (ndet + size.nact**4)
+    return inttwo + inttwo_f1_f2 + indkl + rkl + density
+
+
+def caspt2_integral_files(size: CalculationSize, ndet: float) -> float:  # noqa: ARG001
+    nocc, nsec = size.nocc, size.nsec
+    return size.word_bytes * (nocc**4 + 2 * nsec**2 * nocc**2 + nsec * nocc**3)
+
+
+def caspt2_cost(size: CalculationSize, ndet: float) -> float:
+    return size.nocc**2 * size.nsec**2 * size.nact**2 + ndet * size.nact**4
+
+
+SUBPROGRAM_MODELS: List[SubprogramModel] = [
+    SubprogramModel("IVO", ivo_memory, ivo_integral_files, ivo_cost),
+    SubprogramModel("CASCI", casci_memory, casci_integral_files, casci_cost),
+    SubprogramModel("CASPT2", caspt2_memory, caspt2_integral_files, caspt2_cost),
+]
+
+
+@dataclass
+class SubprogramCalibration:
+    # seconds_per_cost: seconds per relative cost (None if there is no timing of the subprogram)
+    # memory_scale: measured peak memory / estimated peak memory
+    seconds_per_cost: Optional[float] = None
+    memory_scale: float = 1.0
+    records: int = 0
+
+
+@dataclass
+class ResourceCalibration:
+    subprograms: Dict[str, SubprogramCalibration] = field(default_factory=dict)
+
+    def get(self, name: str) -> SubprogramCalibration:
+        return self.subprograms.get(name, SubprogramCalibration())
+
+
+@dataclass(frozen=True)
+class SubprogramEstimate:
+    # The bytes are float, because they are inf if the number of determinants exceeds the range of float
+    name: str
+    peak_memory: float
+    integral_file_size: float
+    relative_cost: float
+    seconds: Optional[float]
+
+
+@dataclass(frozen=True)
+class ResourceEstimate:
+    size: CalculationSize
+    determinants: int
+    subprograms: List[SubprogramEstimate]
+
+    @property
+    def peak_memory(self) -> float:
+        return max(subprogram.peak_memory for subprogram in self.subprograms)
+
+    @property
+    def peak_subprogram(self) -> str:
+        return max(self.subprograms, key=lambda subprogram: subprogram.peak_memory).name
+
+    @property
+    def seconds(self) -> Optional[float]:
+        """The total time of all subprograms (None if any subprogram is not calibrated)"""
+        if any(subprogram.seconds is None for subprogram in self.subprograms):
+            return None
+        return sum(subprogram.seconds for subprogram in self.subprograms)  # type: ignore[misc]
+
+    def fits_in_memory(self, node_memory: int) -> bool:
+        return self.peak_memory <= node_memory
+
+
+def estimate_resources(size: CalculationSize, calibration: Optional[ResourceCalibration] = None) -> ResourceEstimate:
+    calibration = calibration or ResourceCalibration()
+    ndet = count_determinants(size)
+    ndet_float = to_float(ndet)
+    subprograms: List[SubprogramEstimate] = []
+    for model in SUBPROGRAM_MODELS:
+        subprogram_calibration = calibration.get(model.name)
+        cost = float(model.cost(size, ndet_float))
+        seconds_per_cost = subprogram_calibration.seconds_per_cost
+        subprograms.append(
+            SubprogramEstimate(
+                name=model.name,
+                peak_memory=float(model.memory(size, ndet_float)) * subprogram_calibration.memory_scale,
+                integral_file_size=float(model.integral_files(size, ndet_float)),
+                relative_cost=cost,
+                seconds=None if seconds_per_cost is None else cost * seconds_per_cost,
+            )
+        )
+    return ResourceEstimate(size, ndet, subprograms)
+
+
+@dataclass(frozen=True)
+class TimingRecord:
+    """One subprogram run of the timing log"""
+
+    subprogram: str
+    size: CalculationSize
+    seconds: float
+    peak_memory: Optional[int] = None
+
+
+def read_timing_log(file_path: Path) -> List[TimingRecord]:
+    """Read the timing log (CSV) with the columns subprogram, seconds, peak_memory (bytes, can be empty)
+    and the fields of CalculationSize (point_group, ninact, nras1, nras2, nras3, nsec, nelec, ...).
+    ras1_max_hole, ras3_max_electron, ivo_occupied and ivo_virtual can be omitted."""
+    size_fields = {f.name: f for f in fields(CalculationSize)}
+    records: List[TimingRecord] = []
+    with open(file_path, newline="") as f:
+        for line_number, row in enumerate(csv.DictReader(f), start=2):
+            try:
+                size_values: Dict[str, object] = {}
+                for name in size_fields:
+                    value = (row.get(name) or "").strip()
+                    if name == "point_group":
+                        size_values[name] = value
+                    elif value:
+                        size_values[name] = int(value)
+                size = CalculationSize(**size_values)  # type: ignore[arg-type]
+                if size.ivo_occupied == 0 and size.ivo_virtual == 0:
+                    size = CalculationSize(**{**asdict(size), "ivo_occupied": size.nocc, "ivo_virtual": size.nsec})
+                peak_memory = (row.get("peak_memory") or "").strip()
+                records.append(
+                    TimingRecord(
+                        subprogram=row["subprogram"].strip(),
+                        size=size,
+                        seconds=float(row["seconds"]),
+                        peak_memory=int(peak_memory) if peak_memory else None,
+                    )
+                )
+            except (KeyError, TypeError, ValueError, AttributeError) as e:
+                msg = f"Invalid timing log. path: {file_path}, line: {line_number}, {e!r}"
+                raise ValueError(msg) from e
+    return records
+
+
+def calibrate_resources(records: Iterable[TimingRecord]) -> ResourceCalibration:
+    """Fit seconds_per_cost and memory_scale of each subprogram to the timing records.
+    The geometric mean of measured / estimated is used, because the costs of the records differ by
+    orders of magnitude and the mean of the ratios would be dominated by the largest calculation."""
+    models = {model.name: model for model in SUBPROGRAM_MODELS}
+    time_logs: Dict[str, List[float]] = {}
+    memory_logs: Dict[str, List[float]] = {}
+    for record in records:
+        if record.subprogram not in models:
+            msg = f"Unknown subprogram: {record.subprogram}. Available subprograms: {', '.join(models)}"
+            raise ValueError(msg)
+        model = models[record.subprogram]
+        ndet = to_float(count_determinants(record.size))
+        cost = model.cost(record.size, ndet)
+        if record.seconds > 0 and 0 < cost < math.inf:
+            time_logs.setdefault(record.subprogram, []).append(math.log(record.seconds / cost))
+        memory = model.memory(record.size, ndet)
+        if record.peak_memory is not None and record.peak_memory > 0 and 0 < memory < math.inf:
+            memory_logs.setdefault(record.subprogram, []).append(math.log(record.peak_memory / memory))
+
+    calibration = ResourceCalibration()
+    for name in models:
+        if name not in time_logs and name not in memory_logs:
+            continue
+        log_times = time_logs.get(name, [])
+        log_memories = memory_logs.get(name, [])
+        calibration.subprograms[name] = SubprogramCalibration(
+            seconds_per_cost=math.exp(sum(log_times) / len(log_times)) if log_times else None,
+            memory_scale=math.exp(sum(log_memories) / len(log_memories)) if log_memories else 1.0,
+            records=max(len(log_times), len(log_memories)),
+        )
+    return calibration
+
+
+def save_resource_calibration(calibration: ResourceCalibration, file_path: Path) -> None:
+    with open(file_path, mode="w") as f:
+        json.dump(asdict(calibration), f, indent=4)
+
+
+def load_resource_calibration(file_path: Path) -> ResourceCalibration:
+    with open(file_path) as f:
+        try:
+            json_dict = json.load(f)
+            return ResourceCalibration(
+                {name: SubprogramCalibration(**values) for name, values in json_dict["subprograms"].items()}
+            )
+        except (json.JSONDecodeError, KeyError, TypeError, AttributeError) as e:
+            msg = f"Invalid resource calibration file. path: {file_path}, {e!r}"
+            raise ValueError(msg) from e
+
+
+def format_bytes(num_bytes: float) -> str:
+    """(e.g.) 512 -> 512 byte, 1536 -> 1.500 KB"""
+    if not math.isfinite(num_bytes):
+        return "inf"
+    if num_bytes < KIB:
+        return f"{int(num_bytes)} byte"
+    unit_idx = min(int(math.log(num_bytes, KIB)), len(BYTE_UNITS) - 1)
+    return f"{num_bytes / KIB**unit_idx:.3f} {BYTE_UNITS[unit_idx]}"
+
+
+def parse_bytes(size_str: str) -> int:
+    """(e.g.) 192G -> 192 * 1024**3, 512MB -> 512 * 1024**2, 1000 -> 1000"""
+    value = size_str.strip().upper().rstrip("B")
+    units = {"K": KIB, "M": KIB**2, "G": KIB**3, "T": KIB**4}
+    try:
+        if value and value[-1] in units:
+            return int(float(value[:-1]) * units[value[-1]])
+        return int(value)
+    except ValueError as e:
+        msg = f"Invalid memory size: {size_str}. (e.g.) 192G, 512M, 1000000"
+        raise ValueError(msg) from e
+
+
+def format_seconds(seconds: float) -> str:
+    if not math.isfinite(seconds):
+        return "inf"
+    if seconds < SECONDS_PER_MINUTE:
+        return f"{seconds:.1f} s"
+    elif seconds < SECONDS_PER_HOUR:
+        return f"{seconds / SECONDS_PER_MINUTE:.1f} min"
+    return f"{seconds / SECONDS_PER_HOUR:.1f} h"
@@ -0,0 +1,84 @@
+# This script writes and reads the session file.
+# The session file keeps the work on a table, so that it can be reopened after the application is closed
+# without running sum_dirac_dfcoef and assigning the orbital spaces again.
+# It is the binary table file (see table_data_binary.py) with its own magic and
+#   the orbital space of each row (an extra column),
+#   the user input values, the color theme, the column widths of the table and the title (metadata).
+# The MO data is stored in the session file itself (not a reference to the sum_dirac_dfcoef cache),
+# because the cache and the scratch files can be removed after the session is saved.
+# It does not depend on PySide6, so it can be used without the GUI.
+from array import array
+from dataclasses import dataclass, field
+from pathlib import Path
+from typing import Dict, List
+
+from dcaspt2_input_generator.core.table_data import OrbitalSpace, TableData
+from dcaspt2_input_generator.core.table_data_binary import load_table_data_binary, write_table_data_binary
+from dcaspt2_input_generator.utils.tracing import trace_span
+
+SESSION_MAGIC = b"DC2SESSN"
+SESSION_SUFFIX = ".dcaspt2session"
+
+
+@dataclass
+class Session:
+    """The state of a document except the table itself"""
+
+    title: str = ""
+    # (e.g.) {"total_symmetry": 1, "ras1_max_hole": 0, "ras3_max_electron": 0, "dirac_ver": 23}
+    user_input: Dict[str, int] = field(default_factory=dict)
+    color_theme: str = "default"
+    # The widths of the table columns, the columns are resized to the contents if it is empty
+    column_widths: List[int] = field(default_factory=list)
+
+
+def write_session(file_path: Path, table_data: TableData, session: Session) -> None:
+    """Write table_data (MO data and the orbital spaces of all rows) and session.
+    table_data.spaces must be set for all rows."""
+    if len(table_data.spaces) != len(table_data.mo_data):
+        msg = "The orbital spaces are not set for all rows."
+        raise ValueError(msg)
+    with trace_span("session save", path=str(file_path)):
+        write_table_data_binary(
+            table_data,
+            file_path,
+            magic=SESSION_MAGIC,
+            extra_metadata={
+                "session": {
+                    "title": session.title,
+                    "user_input": session.user_input,
+                    "color_theme": session.color_theme,
+                    "column_widths": session.column_widths,
+                }
+            },
+            extra_columns={"spaces": array("B", table_data.spaces)},
+        )
+
+
+def load_session(table_data: TableData, file_path: Path) -> Session:
+    """Reset table_data and read the session file.
+    After this, table_data is validated, sorted by energy and has the orbital spaces of the session.
+
+    Raises:
+        ValueError: If the file is not a correct session file.
+    """
+    with trace_span("session load", path=str(file_path)):
+        metadata, extra_columns = load_table_data_binary(table_data, file_path, magic=SESSION_MAGIC)
+        if "session" not in metadata or "spaces" not in extra_columns:
+            msg = f"The session information is not found. path: {file_path}"
+            raise ValueError(msg)
+        spaces = extra_columns["spaces"]
+        if len(spaces) != len(table_data.mo_data) or any(space >= len(OrbitalSpace) for space in spaces):
+            msg = f"The orbital spaces of the session are not correct. path: {file_path}"
+            raise ValueError(msg)
+        table_data.validate()
+        # The rows are saved in the sorted order, so this does not copy the rows
+        order = table_data.mo_data.sort_by_energy()
+        table_data.reset_spaces(spaces[old_idx] for old_idx in order)
+        values = metadata["session"]
+        return Session(
+            title=values.get("title", ""),
+            user_input=dict(values.get("user_input", {})),
+            color_theme=values.get("color_theme", "default"),
+            column_widths=list(values.get("column_widths", [])),
+        )
@@ -0,0 +1,125 @@
+# This script keeps the undo/redo history of the orbital space edits of a table.
+# An edit stores only the changed row ranges, and each range stores its old and new orbital spaces
+# as runs (space, number of rows), so changing 40,000 rows from inactive to ras3 costs a few bytes,
+# not a copy of the table. Undo and redo write the runs back with TableData.set_space_ranges,
+# so they cost O(number of runs) instead of O(number of rows of the table).
+# It does not depend on PySide6, so it can be used without the GUI.
+import re
+from array import array
+from collections import deque
+from dataclasses import dataclass
+from typing import Deque, Dict, Iterable, Iterator, List, Optional, Tuple
+
+from dcaspt2_input_generator.core.table_data import OrbitalSpace, TableData
+
+MAX_HISTORY_EDITS = 1000
+# A run of the same orbital space (byte value)
+SPACE_RUN = re.compile(rb"(.)\1*", re.DOTALL)
+
+
+@dataclass
+class SpaceRuns:
+    """The orbital spaces of the rows from start to end (both included) as runs.
+    (e.g.) inactive, inactive, ras3, ras3, ras3 -> spaces = [inactive, ras3], lengths = [2, 3]"""
+
+    start: int
+    end: int
+    spaces: bytes
+    lengths: array
+
+    @classmethod
+    def encode(cls, spaces: bytearray, start: int, end: int) -> "SpaceRuns":
+        # The regular expression finds the runs in C, the loop runs once per run (not per row)
+        matches = list(SPACE_RUN.finditer(spaces, start, end + 1))
+        return cls(
+            start,
+            end,
+            bytes(spaces[match.start()] for match in matches),
+            array("I", (match.end() - match.start() for match in matches)),
+        )
+
+    def iter_ranges(self) -> Iterator[Tuple[int, int, int]]:
+        """Yield (top_row, bottom_row, space) of each run"""
+        row = self.start
+        for space, length in zip(self.spaces, self.lengths):
+            yield row, row + length - 1, space
+            row += length
+
+
+@dataclass
+class SpaceEdit:
+    """old_runs[idx] and new_runs[idx] are the orbital spaces of the same rows before and after the edit"""
+
+    old_runs: List[SpaceRuns]
+    new_runs: List[SpaceRuns]
+
+
+class SpaceHistory:
+    """Undo and redo stacks of SpaceEdit. Call begin before changing the orbital spaces and commit after it.
+    The oldest edits are dropped when there are more than max_edits edits."""
+
+    undo_stack: Deque[SpaceEdit]
+    redo_stack: List[SpaceEdit]
+
+    def __init__(self, max_edits: int = MAX_HISTORY_EDITS):
+        self.undo_stack = deque(maxlen=max_edits)
+        self.redo_stack = []
+
+    def clear(self) -> None:
+        self.undo_stack.clear()
+        self.redo_stack.clear()
+
+    def can_undo(self) -> bool:
+        return len(self.undo_stack) > 0
+
+    def can_redo(self) -> bool:
+        return len(self.redo_stack) > 0
+
+    def begin(self, spaces: bytearray, ranges: Iterable[Tuple[int, int]]) -> List[SpaceRuns]:
+        """Return the orbital spaces of the ranges ((top_row, bottom_row), both included) before the edit"""
+        return [SpaceRuns.encode(spaces, start, end) for start, end in ranges]
+
+    def commit(self, spaces: bytearray, old_runs: List[SpaceRuns]) -> None:
+        """Add the edit of the ranges returned by begin. Nothing is added if no orbital space is changed."""
+        new_runs = [SpaceRuns.encode(spaces, runs.start, runs.end) for runs in old_runs]
+        if new_runs == old_runs:
+            return
+        self.undo_stack.append(SpaceEdit(old_runs, new_runs))
+        self.redo_stack.clear()
+
+    def undo(self) -> Optional[SpaceEdit]:
+        if not self.undo_stack:
+            return None
+        edit = self.undo_stack.pop()
+        self.redo_stack.append(edit)
+        return edit
+
+    def redo(self) -> Optional[SpaceEdit]:
+        if not self.redo_stack:
+            return None
+        edit = self.redo_stack.pop()
+        self.undo_stack.append(edit)
+        return edit
+
+    def nbytes(self) -> int:
+        """Return the size of the stored runs (for checking the memory usage of the history)"""
+        return sum(
+            len(runs.spaces) + runs.lengths.itemsize * len(runs.lengths)
+            for edit in (*self.undo_stack, *self.redo_stack)
+            for runs in (*edit.old_runs, *edit.new_runs)
+        )
+
+
+def apply_space_runs(table_data: TableData, all_runs: List[SpaceRuns]) -> Tuple[int, int]:
+    """Write the runs to table_data with one TableData.set_space_ranges call per orbital space.
+    Return the first and last rows of the runs ((len(spaces), -1) if all_runs is empty)."""
+    ranges_by_space: Dict[int, List[Tuple[int, int]]] = {}
+    for runs in all_runs:
+        for top_row, bottom_row, space in runs.iter_ranges():
+            ranges_by_space.setdefault(space, []).append((top_row, bottom_row))
+    for space, ranges in ranges_by_space.items():
+        table_data.set_space_ranges(ranges, OrbitalSpace(space))
+    return (
+        min((runs.start for runs in all_runs), default=len(table_data.spaces)),
+        max((runs.end for runs in all_runs), default=-1),
+    )
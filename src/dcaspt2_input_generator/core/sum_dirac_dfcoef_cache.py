@@ -0,0 +1,110 @@
+# This script provides the on-disk cache of the sum_dirac_dfcoef output.
+# The cache entry is keyed by the content hash of the DIRAC output, the version of sum_dirac_dfcoef
+# and the options that change the result, so the same DIRAC output is analysed only once.
+import hashlib
+import os
+import shutil
+import tempfile
+from pathlib import Path
+from typing import List, Optional
+
+from dcaspt2_input_generator.utils.tracing import trace_span
+from dcaspt2_input_generator.utils.utils import debug_print
+
+
+def calculate_file_hash(file_path: Path, chunk_size: int = 1024 * 1024) -> str:
+    with trace_span("file hash", path=str(file_path)):
+        file_hash = hashlib.sha256()
+        with open(file_path, "rb") as f:
+            for chunk in iter(lambda: f.read(chunk_size), b""):
+                file_hash.update(chunk)
+        return file_hash.hexdigest()
+
+
+class SumDiracDfcoefCache:
+    """Content-addressed cache of the sum_dirac_dfcoef output with a size-bounded LRU eviction.
+
+    Each entry is a file named <key>.out in cache_dir.
+    The entries are written to a temporary file and renamed, so readers never see a partial file.
+    All write operations (store, touch, evict) are skipped silently if they are not permitted,
+    so the cache directory can be shared read-only between several users.
+    """
+
+    suffix = ".out"
+
+    def __init__(self, cache_dir: Path, max_size: int):
+        self.cache_dir = cache_dir
+        self.max_size = max_size  # byte
+
+    def create_key(self, dirac_output: Path, version: str, options: List[str]) -> str:
+        key_hash = hashlib.sha256()
+        key_hash.update(calculate_file_hash(dirac_output).encode())
+        key_hash.update(f"sum_dirac_dfcoef {version.strip()} {' '.join(options)}".encode())
+        return key_hash.hexdigest()
+
+    def entry_path(self, key: str) -> Path:
+        return self.cache_dir / f"{key}{self.suffix}"
+
+    def get(self, key: str) -> Optional[Path]:
+        """Return the path of the cached sum_dirac_dfcoef output or None if it is not cached."""
+        path = self.entry_path(key)
+        if not path.is_file():
+            return None
+        try:
+            # Update the modification time, which is used as the last access time for LRU eviction
+            os.utime(path)
+        except OSError:
+            pass  # Read-only cache
+        debug_print(f"sum_dirac_dfcoef cache hit: {path}")
+        return path
+
+    def store(self, key: str, sum_dirac_dfcoef_output: Path) -> Optional[Path]:
+        """Copy sum_dirac_dfcoef_output into the cache and return the path of the entry.
+        Return None if the cache is not writable."""
+        path = self.entry_path(key)
+        try:
+            self.cache_dir.mkdir(parents=True, exist_ok=True)
+            fd, tmp_name = tempfile.mkstemp(dir=self.cache_dir, suffix=".tmp")
+            os.close(fd)
+            try:
+                shutil.copyfile(sum_dirac_dfcoef_output, tmp_name)
+                # Other users can read the entry if they share the cache directory
+                os.chmod(tmp_name, 0o644)
+                os.replace(tmp_name, path)
+            finally:
+                if os.path.exists(tmp_name):
+                    os.remove(tmp_name)
+        except OSError as e:
+            debug_print(f"Cannot store sum_dirac_dfcoef output to the cache: {e}")
+            return None
+        self.evict()
+        return path
+
+    def evict(self) -> None:
+        """Remove the least recently used entries until the total size is less than or equal to max_size."""
+        entries = []
+        for path in self.cache_dir.glob(f"*{self.suffix}"):
+            try:
+                stat = path.stat()
+            except OSError:
+                continue  # Removed by another process
+            entries.append((stat.st_mtime, stat.st_size, path))
+        total_size = sum(size for _, size, _ in entries)
+        for _, size, path in sorted(entries, key=lambda entry: entry[0]):
+            if total_size <= self.max_size:
+                break
+            try:
+                path.unlink()
+                total_size -= size
+            except OSError:
+                continue  # Not permitted or already removed
+
+
+def create_sum_dirac_dfcoef_cache() -> SumDiracDfcoefCache:
+    """Create the cache from the settings (sum_dirac_dfcoef_cache_dir, sum_dirac_dfcoef_cache_max_mb)"""
+    from dcaspt2_input_generator.utils.settings import get_settings  # noqa: PLC0415 (read at the first use)
+
+    settings = get_settings()
+
+    cache_settings = settings.sum_dirac_dfcoef_cache
+    return SumDiracDfcoefCache(cache_settings.cache_dir, cache_settings.max_size_mb * 1024 * 1024)
@@ -0,0 +1,284 @@
+# This script runs sum_dirac_dfcoef in a persistent process pool by calling its Python API directly.
+# Compared to running `python -m sum_dirac_dfcoef` for each DIRAC output,
+# the interpreter startup and the import of sum_dirac_dfcoef are paid only once per session,
+# and the parsed rows are returned to the caller without writing and reading a text file.
+# It does not depend on PySide6, so it can be used without the GUI.
+# sum_dirac_dfcoef and multiprocessing are imported in the functions which use them (see init_worker).
+# ruff: noqa: PLC0415
+import sys
+import threading
+from dataclasses import dataclass, field
+from functools import lru_cache
+from pathlib import Path
+from typing import TYPE_CHECKING, Dict, List, Optional, Tuple
+
+from dcaspt2_input_generator.core.sum_dirac_dfcoef_runner import (
+    SUM_DIRAC_DFCOEF_ANALYSIS_OPTIONS,
+    validate_sum_dirac_dfcoef_version,
+)
+from dcaspt2_input_generator.utils.tracing import trace_span
+
+if TYPE_CHECKING:
+    from concurrent.futures import Future, ProcessPoolExecutor
+
+# analyse_dirac_output uses the internals of sum_dirac_dfcoef, not its command line interface,
+# so the pool is only used with the versions it is tested with ([min, max) of (major, minor)).
+# Update this range (and the dependency in pyproject.toml) after checking that the rows are the same
+# as the output of `python -m sum_dirac_dfcoef -d 3 -c` for the new version.
+POOL_TESTED_VERSIONS = ((5, 2), (5, 3))
+
+
+@dataclass
+class SumDiracDfcoefRows:
+    """The sum_dirac_dfcoef output split into tokens (the same tokens as SumDiracDfcoefReader returns)"""
+
+    header_rows: List[List[str]] = field(default_factory=list)
+    rows: List[List[str]] = field(default_factory=list)
+
+    def write(self, file_path: Path) -> None:
+        """Write the rows in the sum_dirac_dfcoef output format, so that they can be saved or cached."""
+        with open(file_path, mode="w", encoding="utf-8") as f:
+            for header_row in self.header_rows:
+                f.write(" ".join(header_row) + "\n")
+            f.write("\n")
+            for row in self.rows:
+                f.write(" ".join(row) + "\n")
+
+
+def init_worker() -> None:
+    # sum_dirac_dfcoef parses sys.argv when it is imported, so set the arguments before importing it.
+    # -i is overwritten for each DIRAC output in analyse_dirac_output.
+    sys.argv = ["sum_dirac_dfcoef", "-i", "", *SUM_DIRAC_DFCOEF_ANALYSIS_OPTIONS]
+    import sum_dirac_dfcoef.sum_dirac_dfcoef  # noqa: F401
+
+
+def get_version() -> str:
+    from sum_dirac_dfcoef.__about__ import __version__
+
+    return __version__
+
+
+def validate_pool_version(version: str) -> None:
+    """v5.2.x is required for the process pool (see POOL_TESTED_VERSIONS).
+
+    Raises:
+        Exception: If the process pool is not tested with the version of sum_dirac_dfcoef.
+    """
+    min_version, max_version = POOL_TESTED_VERSIONS
+    try:
+        major_minor = tuple(int(part) for part in version.split(".")[:2])
+    except ValueError:
+        major_minor = ()
+    if not min_version <= major_minor < max_version:
+        msg = f"The process pool mode is not tested with this version of sum_dirac_dfcoef.\n\
+sum_dirac_dfcoef version: {version}\n\
+Please set sum_dirac_dfcoef_run_mode to subprocess in settings.json,\
+ or install sum_dirac_dfcoef v5.2.x with `pip install 'sum_dirac_dfcoef>=5.2,<5.3'`"
+        raise Exception(msg)
+
+
+def reset_worker_state() -> None:
+    """sum_dirac_dfcoef is written to analyse one DIRAC output per process
+    and keeps some results in class and module variables. Reset them before analysing the next DIRAC output."""
+    from sum_dirac_dfcoef.atoms import ao
+    from sum_dirac_dfcoef.moltra import MoltraInfo
+
+    MoltraInfo.is_default = True
+    MoltraInfo.range_str.clear()
+    MoltraInfo.range_dict.clear()
+    ao.reset()
+
+
+def analyse_dirac_output(dirac_output: str) -> SumDiracDfcoefRows:
+    """Run sum_dirac_dfcoef for dcaspt2_input_generator (the same as sum_dirac_dfcoef.main with -d 3 -c)
+    in the worker process and return the electronic MO data as tokens."""
+    from sum_dirac_dfcoef.args import args
+    from sum_dirac_dfcoef.functions_info import get_functions_info
+    from sum_dirac_dfcoef.header_info import HeaderInfo
+    from sum_dirac_dfcoef.privec_reader import PrivecProcessor
+
+    reset_worker_state()
+    args.input = dirac_output
+    args.parallel = 1  # The pool has its own workers, don't start another process pool in the worker
+    with open(dirac_output, encoding="utf-8") as f:
+        header_info = HeaderInfo()
+        header_info.read_header_info(f)
+        f.seek(0)
+        functions_info = get_functions_info(f)
+        f.seek(0)
+        dirac_output_lines = f.readlines()
+    privec_processor = PrivecProcessor(dirac_output_lines, functions_info, header_info.eigenvalues)
+    privec_processor.read_privec_data_wrapper()
+    header_info.calculate_moltra_idx_range(privec_processor.data_all_mo)
+    privec_processor.data_all_mo.sort_mo_energy()
+
+    # Create the same tokens as sum_dirac_dfcoef's OutputFileWriter writes
+    result = SumDiracDfcoefRows()
+    scheme = "default" if header_info.scheme.value == 0 else str(header_info.scheme.value)
+    result.header_rows.append(
+        ["electron_num", str(header_info.electrons), "point_group", header_info.point_group, "moltra_scheme", scheme]
+    )
+    moltra_row: List[str] = []
+    for symmetry_type, d in header_info.moltra_info.range_dict.items():
+        moltra_row.extend([symmetry_type, str(d)])
+    result.header_rows.append(moltra_row)
+    spinor_num_row: List[str] = []
+    for symmetry_type, d in header_info.eigenvalues.shell_num.items():
+        spinor_num_row.append(symmetry_type)
+        for eigenvalue_type, num in d.items():
+            if eigenvalue_type in ("closed", "open", "virtual"):
+                spinor_num_row.extend([eigenvalue_type, str(num)])
+    result.header_rows.append(spinor_num_row)
+    for mo in privec_processor.data_all_mo.electronic:
+        digit_int = len(str(int(mo.mo_energy)))  # number of digits of integer part
+        row = [*mo.mo_info.split(), f"{mo.mo_energy:{digit_int}.{args.decimal}f}".strip()]
+        for key, coef in mo.coef_dict.items():
+            percentage = coef / mo.norm_const_sum * 100
+            atom_num_label = f"({key.atom_idx})" if key.need_identifier else ""
+            row.append(f"{key.symmetry_label}{key.atom_label}{key.azimuthal_label}{key.magnetic_label}{atom_num_label}")
+            row.append(f"{percentage:.{args.decimal}f}")
+        result.rows.append(row)
+    return result
+
+
+def kill_executor(executor: "ProcessPoolExecutor") -> None:
+    """Shut down the executor and kill its workers, so that the running tasks are stopped.
+    The futures of the tasks which are not finished become BrokenProcessPool or canceled."""
+    if hasattr(executor, "kill_workers"):  # Python 3.14+
+        executor.kill_workers()
+        return
+    # Older Pythons cannot stop a running task through the public API, so kill the worker processes directly
+    processes = list((getattr(executor, "_processes", None) or {}).values())
+    executor.shutdown(wait=False)
+    for process in processes:
+        process.kill()
+
+
+class SumDiracDfcoefPool:
+    """A process pool that is started lazily at the first use and kept warm until shutdown is called.
+    The version check is called from the threads of the GUI, so the executor is created under the lock.
+
+    submit returns a future owned by the pool, not the future of the executor.
+    A task which is already running in a worker cannot be canceled,
+    so cancel kills the workers and submits the other unfinished tasks again to new workers,
+    and their futures are kept."""
+
+    def __init__(self, max_workers: int):
+        self.max_workers = max(1, max_workers)
+        self.executor: Optional[ProcessPoolExecutor] = None
+        # The callbacks of the executor futures take the lock in the thread of the executor
+        self.lock = threading.RLock()
+        # Unfinished tasks: the future returned by submit -> (the future of the executor, DIRAC output)
+        self.tasks: Dict[Future[SumDiracDfcoefRows], Tuple[Future[SumDiracDfcoefRows], str]] = {}
+
+    def get_executor(self) -> "ProcessPoolExecutor":
+        with self.lock:
+            return self.get_executor_locked()
+
+    def get_executor_locked(self) -> "ProcessPoolExecutor":
+        if self.executor is None:
+            # multiprocessing is imported at the first use to reduce the startup time of the application
+            import multiprocessing
+            from concurrent.futures import ProcessPoolExecutor
+
+            # Use spawn, because forking the GUI process (Qt) is not safe
+            self.executor = ProcessPoolExecutor(
+                max_workers=self.max_workers,
+                mp_context=multiprocessing.get_context("spawn"),
+                initializer=init_worker,
+            )
+        return self.executor
+
+    @lru_cache(maxsize=None)  # noqa: B019 (the pool lives for the whole session)
+    def check_version(self) -> str:
+        """Return the version of sum_dirac_dfcoef in the worker. The version is checked only once per session.
+
+        Raises:
+            Exception: If the version of sum_dirac_dfcoef is too old or not tested with the pool.
+        """
+        # The first call includes the startup of the worker processes
+        with trace_span("version check", mode="pool"):
+            version = self.get_executor().submit(get_version).result()
+        validate_sum_dirac_dfcoef_version(version)
+        validate_pool_version(version)
+        return version
+
+    def submit(self, dirac_output: Path) -> "Future[SumDiracDfcoefRows]":
+        from concurrent.futures import Future
+
+        future: Future[SumDiracDfcoefRows] = Future()
+        with self.lock:
+            self.submit_locked(future, str(dirac_output))
+        return future
+
+    def submit_locked(self, future: "Future[SumDiracDfcoefRows]", dirac_output: str) -> None:
+        executor_future = self.get_executor_locked().submit(analyse_dirac_output, dirac_output)
+        self.tasks[future] = (executor_future, dirac_output)
+        executor_future.add_done_callback(lambda done: self.on_executor_future_done(future, done))
+
+    def on_executor_future_done(
+        self, future: "Future[SumDiracDfcoefRows]", executor_future: "Future[SumDiracDfcoefRows]"
+    ) -> None:
+        with self.lock:
+            task = self.tasks.get(future)
+            if task is None or task[0] is not executor_future:
+                return  # canceled, or submitted again after the workers were killed
+            del self.tasks[future]
+            # Set the result under the lock, so that cancel does not cancel the future at the same time
+            if executor_future.cancelled():
+                future.cancel()
+            elif executor_future.exception() is not None:
+                future.set_exception(executor_future.exception())
+            else:
+                future.set_result(executor_future.result())
+
+    def cancel(self, future: "Future[SumDiracDfcoefRows]") -> None:
+        """Cancel the task of the future. If it is running, the workers are killed and recreated."""
+        with self.lock:
+            task = self.tasks.pop(future, None)
+            future.cancel()
+            if task is None or task[0].cancel():
+                return  # finished or not started yet
+            executor = self.executor
+            self.executor = None
+            if executor is not None:
+                with trace_span("sum_dirac_dfcoef pool kill", tasks=len(self.tasks)):
+                    kill_executor(executor)
+            # The other tasks lost their workers, run them again
+            for other_future, (_, dirac_output) in list(self.tasks.items()):
+                self.submit_locked(other_future, dirac_output)
+
+    def shutdown(self) -> None:
+        """Cancel the unfinished tasks and stop the workers. Running tasks are killed, not waited for."""
+        with self.lock:
+            tasks = list(self.tasks.items())
+            self.tasks.clear()
+            for future, (executor_future, _) in tasks:
+                executor_future.cancel()
+                future.cancel()
+            if self.executor is not None:
+                if any(executor_future.running() for _, (executor_future, _) in tasks):
+                    kill_executor(self.executor)
+                else:
+                    # cancel_futures of shutdown is not available before Python 3.9,
+                    # the pending tasks have been canceled above
+                    self.executor.shutdown(wait=False)
+                self.executor = None
+
+
+_sum_dirac_dfcoef_pool: Optional[SumDiracDfcoefPool] = None
+
+
+def get_sum_dirac_dfcoef_pool(max_workers: int) -> SumDiracDfcoefPool:
+    """Return the pool shared in this session. max_workers is used only when the pool is created."""
+    global _sum_dirac_dfcoef_pool  # noqa: PLW0603
+    if _sum_dirac_dfcoef_pool is None:
+        _sum_dirac_dfcoef_pool = SumDiracDfcoefPool(max_workers)
+    return _sum_dirac_dfcoef_pool
+
+
+def shutdown_sum_dirac_dfcoef_pool() -> None:
+    global _sum_dirac_dfcoef_pool  # noqa: PLW0603
+    if _sum_dirac_dfcoef_pool is not None:
+        _sum_dirac_dfcoef_pool.shutdown()
+        _sum_dirac_dfcoef_pool = None
@@ -0,0 +1,76 @@
+# This script runs the sum_dirac_dfcoef program without the GUI.
+import subprocess
+import sys
+from functools import lru_cache
+from pathlib import Path
+from typing import List
+
+from dcaspt2_input_generator.utils.tracing import trace_span
+
+# The options that change the result of sum_dirac_dfcoef. (-j only changes the number of processes)
+SUM_DIRAC_DFCOEF_ANALYSIS_OPTIONS = ["-d", "3", "-c"]
+# The oldest major version of sum_dirac_dfcoef that writes the output for dcaspt2_input_generator
+MIN_SUM_DIRAC_DFCOEF_MAJOR_VERSION = 4
+
+
+def create_sum_dirac_dfcoef_command(options: List[str]) -> List[str]:
+    # Use the same python interpreter as this application if possible
+    if sys.executable:
+        return [sys.executable, "-m", "sum_dirac_dfcoef", *options]
+    return ["sum_dirac_dfcoef", *options]
+
+
+def create_sum_dirac_dfcoef_options(dirac_output: Path, output_path: Path, num_process: int) -> List[str]:
+    return [
+        "-i",
+        str(dirac_output),
+        *SUM_DIRAC_DFCOEF_ANALYSIS_OPTIONS,
+        "-o",
+        str(output_path),
+        "-j",
+        str(max(1, num_process)),
+    ]
+
+
+def validate_sum_dirac_dfcoef_version(version: str) -> None:
+    """v4.0.0 or later is required.
+
+    Raises:
+        Exception: If the version of sum_dirac_dfcoef is too old.
+    """
+    major_version = int(version.split(".", maxsplit=1)[0])
+    if major_version < MIN_SUM_DIRAC_DFCOEF_MAJOR_VERSION:
+        msg = f"The version of sum_dirac_dfcoef is too old.\n\
+sum_dirac_dfcoef version: {version}\n\
+Please update sum_dirac_dfcoef to v4.0.0 or later with `pip install -U sum_dirac_dfcoef`"
+        raise Exception(msg)
+
+
+@lru_cache(maxsize=None)
+def check_sum_dirac_dfcoef_version() -> str:
+    """Return the version of sum_dirac_dfcoef. v4.0.0 or later is required.
+    The version is checked only once per session because the result is cached.
+
+    Raises:
+        Exception: If the version of sum_dirac_dfcoef is too old.
+    """
+    with trace_span("version check", mode="subprocess"):
+        p = subprocess.run(  # noqa: S603 (runs sum_dirac_dfcoef with fixed arguments)
+            create_sum_dirac_dfcoef_command(["-v"]),
+            check=True,
+            stdout=subprocess.PIPE,
+        )
+    output = p.stdout.decode("utf-8").strip()
+    validate_sum_dirac_dfcoef_version(output)
+    return output
+
+
+def run_sum_dirac_dfcoef(dirac_output: Path, output_path: Path, num_process: int) -> None:
+    """Run sum_dirac_dfcoef and write the result to output_path.
+
+    Raises:
+        subprocess.CalledProcessError: If sum_dirac_dfcoef exits with non-zero status.
+    """
+    command = create_sum_dirac_dfcoef_command(create_sum_dirac_dfcoef_options(dirac_output, output_path, num_process))
+    with trace_span("sum_dirac_dfcoef run", dirac_output=str(dirac_output), mode="subprocess"):
+        subprocess.run(command, check=True, capture_output=True)  # noqa: S603 (the command is built from fixed options)
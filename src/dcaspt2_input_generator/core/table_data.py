@@ -0,0 +1,696 @@
+from array import array
+from dataclasses import dataclass, field
+from enum import IntEnum
+from pathlib import Path
+from typing import Dict, Iterable, Iterator, List, Set, TextIO, Tuple, Union
+
+from dcaspt2_input_generator.core.interval_set import IntervalSet
+from dcaspt2_input_generator.utils.tracing import trace_span
+
+
+class OrbitalSpace(IntEnum):
+    """Orbital space of a row (Kramers pair) in the DIRAC-CASPT2 calculation."""
+
+    not_used = 0
+    inactive = 1
+    ras1 = 2
+    active = 3
+    ras3 = 4
+    secondary = 5
+
+    @classmethod
+    def from_name(cls, name: str) -> "OrbitalSpace":
+        """(e.g.) "inactive" -> OrbitalSpace.inactive, "ras2" -> OrbitalSpace.active"""
+        key = name.strip().lower().replace("-", "_")
+        if key == "ras2":
+            return cls.active
+        try:
+            return cls[key]
+        except KeyError as e:
+            msg = f"Invalid orbital space name: {name}. Valid names: {', '.join(s.name for s in cls)}, ras2"
+            raise ValueError(msg) from e
+
+
+@dataclass
+class MOData:
+    mo_number: int = 0
+    mo_symmetry: str = ""
+    energy: float = 0.0
+    ao_type: List[str] = field(default_factory=list)
+    percentage: List[float] = field(default_factory=list)
+    ao_len: int = 0
+
+    def update_mo_data(
+        self, mo_number: int, mo_symmetry: str, energy: float, ao_type: List[str], percentage: List[float], ao_len: int
+    ) -> None:
+        self.mo_number = mo_number
+        self.mo_symmetry = mo_symmetry
+        self.energy = energy
+        self.ao_type = ao_type
+        self.percentage = percentage
+        self.ao_len = ao_len
+
+    def create_mo_data(self, row: List[str]) -> None:
+        mo_symmetry = row[0]
+        mo_number_dirac = int(row[1])
+        mo_energy = float(row[2])
+        ao_type = [row[i] for i in range(3, len(row), 2)]
+        ao_percentage = [float(row[i]) for i in range(4, len(row), 2)]
+        self.update_mo_data(mo_number_dirac, mo_symmetry, mo_energy, ao_type, ao_percentage, len(ao_type))
+
+
+# The names of the arrays of MODataColumns
+MO_DATA_COLUMNS = ("mo_symmetry_code", "mo_number", "energy", "ao_offsets", "ao_type_ids", "percentage")
+
+
+class MODataColumns:
+    """This class stores all MOData in contiguous arrays instead of a list of MOData objects.
+
+    mo_number, energy and the irrep code of each row are stored in fixed-width arrays.
+    AO types and percentages are stored in CSR style, i.e. the AO data of the row idx is
+    ao_type_ids[ao_offsets[idx]:ao_offsets[idx + 1]] and percentage[ao_offsets[idx]:ao_offsets[idx + 1]].
+    AO types and irreps are interned to integer ids, so each label string is stored only once.
+    """
+
+    mo_symmetry_code: "array[int]"
+    mo_number: "array[int]"
+    energy: "array[float]"
+    ao_offsets: "array[int]"
+    ao_type_ids: "array[int]"
+    percentage: "array[float]"
+    symmetry_labels: List[str]
+    ao_labels: List[str]
+
+    def __init__(self):
+        self.mo_symmetry_code = array("B")
+        self.mo_number = array("i")
+        self.energy = array("d")
+        self.ao_offsets = array("q", [0])
+        self.ao_type_ids = array("i")
+        self.percentage = array("d")
+        self.symmetry_labels = []
+        self.ao_labels = []
+        self._symmetry_ids: Dict[str, int] = {}
+        self._ao_label_ids: Dict[str, int] = {}
+
+    def __len__(self) -> int:
+        return len(self.energy)
+
+    def __getitem__(self, idx: int) -> MOData:
+        """Create a MOData object of the row idx (only for the code that needs a MOData object)"""
+        start, end = self.ao_range(idx)
+        ao_type = [self.ao_labels[ao_id] for ao_id in self.ao_type_ids[start:end]]
+        return MOData(
+            self.mo_number[idx],
+            self.get_mo_symmetry(idx),
+            self.energy[idx],
+            ao_type,
+            self.percentage[start:end].tolist(),
+            end - start,
+        )
+
+    def __iter__(self) -> Iterator[MOData]:
+        return (self[idx] for idx in range(len(self)))
+
+    def intern_symmetry(self, mo_symmetry: str) -> int:
+        code = self._symmetry_ids.get(mo_symmetry)
+        if code is None:
+            code = len(self.symmetry_labels)
+            self._symmetry_ids[mo_symmetry] = code
+            self.symmetry_labels.append(mo_symmetry)
+        return code
+
+    def intern_ao_label(self, ao_type: str) -> int:
+        ao_id = self._ao_label_ids.get(ao_type)
+        if ao_id is None:
+            ao_id = len(self.ao_labels)
+            self._ao_label_ids[ao_type] = ao_id
+            self.ao_labels.append(ao_type)
+        return ao_id
+
+    def append_row(self, row: List[str]) -> None:
+        """Append a row of the sum_dirac_dfcoef output.
+        (e.g.) ["E1u", "1", "-9.631", "B3uArpx", "33.333", "B2uArpy", "33.333"]"""
+        mo_number = int(row[1])
+        energy = float(row[2])
+        ao_type_ids = [self.intern_ao_label(ao_type) for ao_type in row[3::2]]
+        percentage = [float(p) for p in row[4::2]]
+        if len(ao_type_ids) != len(percentage):
+            msg = f"The number of AO types and percentages are not same. row: {row}"
+            raise IndexError(msg)
+        # Append after all values are converted, so that a broken row is never stored partially.
+        self.mo_symmetry_code.append(self.intern_symmetry(row[0]))
+        self.mo_number.append(mo_number)
+        self.energy.append(energy)
+        self.ao_type_ids.extend(ao_type_ids)
+        self.percentage.extend(percentage)
+        self.ao_offsets.append(len(self.ao_type_ids))
+
+    def set_columns(self, columns: Dict[str, "array"], symmetry_labels: List[str], ao_labels: List[str]) -> None:
+        """Replace all rows with the given columns (e.g. read from the binary table file).
+        columns has the arrays of MO_DATA_COLUMNS with the same typecodes as this class."""
+        for name in MO_DATA_COLUMNS:
+            if columns[name].typecode != getattr(self, name).typecode:
+                msg = f"The typecode of {name} must be {getattr(self, name).typecode}, but got {columns[name].typecode}"
+                raise ValueError(msg)
+        num_rows = len(columns["energy"])
+        ao_offsets = columns["ao_offsets"]
+        if (
+            len(columns["mo_symmetry_code"]) != num_rows
+            or len(columns["mo_number"]) != num_rows
+            or len(ao_offsets) != num_rows + 1
+            or ao_offsets[0] != 0
+            or ao_offsets[-1] != len(columns["ao_type_ids"])
+            or len(columns["ao_type_ids"]) != len(columns["percentage"])
+        ):
+            msg = "The lengths of the MO data columns are not consistent."
+            raise ValueError(msg)
+        if max(columns["mo_symmetry_code"], default=-1) >= len(symmetry_labels) or max(
+            columns["ao_type_ids"], default=-1
+        ) >= len(ao_labels):
+            msg = "The MO data columns refer to undefined labels."
+            raise ValueError(msg)
+        for name in MO_DATA_COLUMNS:
+            setattr(self, name, columns[name])
+        self.symmetry_labels = list(symmetry_labels)
+        self.ao_labels = list(ao_labels)
+        self._symmetry_ids = {label: idx for idx, label in enumerate(self.symmetry_labels)}
+        self._ao_label_ids = {label: idx for idx, label in enumerate(self.ao_labels)}
+
+    def get_mo_symmetry(self, idx: int) -> str:
+        return self.symmetry_labels[self.mo_symmetry_code[idx]]
+
+    def ao_range(self, idx: int) -> "tuple[int, int]":
+        return self.ao_offsets[idx], self.ao_offsets[idx + 1]
+
+    def ao_len(self, idx: int) -> int:
+        return self.ao_offsets[idx + 1] - self.ao_offsets[idx]
+
+    def get_ao_type(self, idx: int, ao_idx: int) -> str:
+        return self.ao_labels[self.ao_type_ids[self.ao_offsets[idx] + ao_idx]]
+
+    def get_percentage(self, idx: int, ao_idx: int) -> float:
+        return self.percentage[self.ao_offsets[idx] + ao_idx]
+
+    def max_ao_len(self) -> int:
+        offsets = self.ao_offsets
+        return max((offsets[idx + 1] - offsets[idx] for idx in range(len(self))), default=0)
+
+    def min_mo_number_per_symmetry(self) -> Dict[str, int]:
+        min_idx: Dict[str, int] = {}
+        for code, mo_number in zip(self.mo_symmetry_code, self.mo_number):
+            label = self.symmetry_labels[code]
+            if mo_number < min_idx.get(label, mo_number + 1):
+                min_idx[label] = mo_number
+        return min_idx
+
+    def sort_by_energy(self) -> List[int]:
+        """Sort all rows by energy. The order of the rows with the same energy is kept (stable sort).
+        Return the order (the new row idx is the old row order[idx]).
+        The rows are not copied if they are already sorted (e.g. read from the binary table file)."""
+        order = sorted(range(len(self)), key=self.energy.__getitem__)
+        if any(old_idx != idx for idx, old_idx in enumerate(order)):
+            self.reorder(order)
+        return order
+
+    def reorder(self, order: List[int]) -> None:
+        """Rearrange the rows, so that the new row idx is the old row order[idx]"""
+        self.mo_symmetry_code = array("B", (self.mo_symmetry_code[idx] for idx in order))
+        self.mo_number = array("i", (self.mo_number[idx] for idx in order))
+        self.energy = array("d", (self.energy[idx] for idx in order))
+        ao_offsets = array("q", [0])
+        ao_type_ids = array("i")
+        percentage = array("d")
+        for idx in order:
+            start, end = self.ao_offsets[idx], self.ao_offsets[idx + 1]
+            ao_type_ids.extend(self.ao_type_ids[start:end])
+            percentage.extend(self.percentage[start:end])
+            ao_offsets.append(len(ao_type_ids))
+        self.ao_offsets = ao_offsets
+        self.ao_type_ids = ao_type_ids
+        self.percentage = percentage
+
+
+@dataclass
+class SpinorNumber:
+    closed_shell: int = 0
+    open_shell: int = 0
+    virtual_orbitals: int = 0
+    sum_of_orbitals: int = 0
+
+    def __add__(self, other: "SpinorNumber") -> "SpinorNumber":
+        if not isinstance(other, SpinorNumber):
+            msg = f"unsupported operand type(s) for +: {type(self)} and {type(other)}"
+            raise TypeError(msg)
+        return SpinorNumber(
+            self.closed_shell + other.closed_shell,
+            self.open_shell + other.open_shell,
+            self.virtual_orbitals + other.virtual_orbitals,
+            self.sum_of_orbitals + other.sum_of_orbitals,
+        )
+
+
+class MoltraInfo(Dict[str, IntervalSet]):
+    """MOLTRA range (mo_number of the used spinors) per irrep"""
+
+
+class SpinorNumInfo(Dict[str, SpinorNumber]):
+    pass
+
+
+@dataclass
+class HeaderInfo:
+    spinor_num_info: SpinorNumInfo = field(default_factory=SpinorNumInfo)
+    moltra_info: MoltraInfo = field(default_factory=MoltraInfo)
+    point_group: str = ""
+    moltra_scheme: Union[int, None] = None
+    electron_number: int = 0
+
+    def read_spinor_num_info(self, row: List[str]) -> None:
+        # spinor_num info is following the format:
+        # spinor_num_type1 closed int open int virtual int ...
+        # (e.g.) E1g closed 6 open 0 virtual 30 E1u closed 10 open 0 virtual 40 point_group C2v
+        # => self.spinor_num_info = {"E1g": SpinorNumber(6, 0, 30, 36),
+        #                                              "E1u": SpinorNumber(10, 0, 40, 50)}
+        if len(row) < 7:
+            msg = f"spinor_num info is not correct: {row},\
+spinor_num_type1 closed int open int virtual int spinor_num_type2 closed int open int virtual int ... point_group str\n\
+is the correct format"
+            raise ValueError(msg)
+        idx = 0
+        while idx + 7 <= len(row):
+            spinor_num_type = row[idx]
+            closed_shell = int(row[idx + 2])
+            open_shell = int(row[idx + 4])
+            virtual_orbitals = int(row[idx + 6])
+            sum_of_orbitals = closed_shell + open_shell + virtual_orbitals
+            self.spinor_num_info[spinor_num_type] = SpinorNumber(
+                closed_shell, open_shell, virtual_orbitals, sum_of_orbitals
+            )
+            idx += 7
+
+    def read_moltra_info(self, row: List[str]) -> None:
+        # (e.g.) ["E1g", "16..85", "E1u", "11..91"]
+        idx = 0
+        while idx + 2 <= len(row):
+            moltra_type = row[idx]
+            moltra_range_str = row[idx + 1]
+            self.moltra_info[moltra_type] = IntervalSet.from_range_str(moltra_range_str)
+            idx += 2
+
+    def read_header(self, rows: List[List[str]]) -> None:
+        """Read the header of the sum_dirac_dfcoef output.
+
+        (e.g.)
+        electron_num 18 point_group D2h moltra_scheme default
+        E1g 1..33 E1u 1..33
+        E1g closed 6 open 0 virtual 60 E1u closed 12 open 0 virtual 54
+        """
+        try:
+            for idx, row in enumerate(rows):
+                if idx == 0:
+                    # 1st line: Read key-value info
+                    # (e.g.) electron_num 18 point_group D2h moltra_scheme default
+                    if len(row) % 2 != 0:
+                        msg = f"1st header line must be even elements because this line is for key-value info.\
+len(1st header)={len(row)}"
+                        raise IndexError(msg)
+
+                    for key_idx in range(0, len(row), 2):  # loop only key
+                        key = row[key_idx]
+                        value = row[key_idx + 1]
+                        if key == "electron_num":
+                            self.update_electron_number(int(value))
+                        elif key == "point_group":
+                            self.update_point_group(value)
+                        elif key == "moltra_scheme":
+                            self.update_moltra_scheme(value)
+                elif idx == 1:
+                    # 2nd line: MOLTRA range
+                    # (e.g.) E1g 16..85 E1u 11..91
+                    self.read_moltra_info(row)
+                elif idx == 2:
+                    # 3rd line: Eigenvalue info
+                    # (e.g.) E1g closed 6 open 0 virtual 30 E1u closed 10 open 0 virtual 40
+                    # => self.spinor_num_info = {"E1g": SpinorNumber(6, 0, 30, 36),
+                    #                            "E1u": SpinorNumber(10, 0, 40, 50)}
+                    self.read_spinor_num_info(row)
+                else:
+                    # Skip unknown header info line
+                    continue
+        except ValueError as e:
+            msg = "The output file is not correct, ValueError"
+            raise ValueError(msg) from e
+        except IndexError as e:
+            msg = "The output file is not correct, IndexError"
+            raise IndexError(msg) from e
+
+    def update_electron_number(self, number: int) -> None:
+        self.electron_number = number
+
+    def update_point_group(self, value: str) -> None:
+        self.point_group = value
+
+    def update_moltra_scheme(self, value: str) -> None:
+        if value == "default":
+            self.moltra_scheme = None
+        else:
+            self.moltra_scheme = int(value)
+
+
+class SumDiracDfcoefReader:
+    """This class reads the sum_dirac_dfcoef output line by line.
+
+    The header is the lines before the first empty line and is returned at once by read_header.
+    After that, read_rows yields the MO data one row at a time,
+    so the whole file is never stored in memory.
+    """
+
+    def __init__(self, file: TextIO):
+        self.file = file
+
+    def read_header(self) -> List[List[str]]:
+        rows: List[List[str]] = []
+        for line in self.file:
+            row = line.split()
+            if len(row) <= 1:  # Empty line, end of header
+                break
+            rows.append(row)
+        return rows
+
+    def read_rows(self) -> Iterator[List[str]]:
+        for line in self.file:
+            row = line.split()
+            if len(row) == 0:
+                continue
+            yield row
+
+
+class OrbitalSpaceData:
+    found: bool
+    first: int
+    last: int
+
+    def __init__(self):
+        self.reset()
+
+    def reset(self) -> None:
+        self.found = False
+        self.first = -1
+        self.last = -1
+
+    def add_rows(self, top_row: int, bottom_row: int) -> None:
+        """Rows from top_row to bottom_row (not necessarily all of them) are added to this orbital space."""
+        if not self.found:
+            self.found = True
+            self.first = top_row
+            self.last = bottom_row
+        else:
+            self.first = min(self.first, top_row)
+            self.last = max(self.last, bottom_row)
+
+    def update_after_removal(self, spaces: bytearray, space: "OrbitalSpace") -> None:
+        """Some rows were removed from this orbital space. Only if the first or last row was removed,
+        search the new first or last row from the old one (bytearray.find and rfind run in C)."""
+        if not self.found:
+            return
+        if spaces[self.first] != space:
+            self.first = spaces.find(space, self.first, self.last + 1)
+            if self.first == -1:
+                self.reset()
+                return
+        if spaces[self.last] != space:
+            self.last = spaces.rfind(space, self.first, self.last + 1)
+
+
+class TableIdxInfo:
+    """This class stores the first and last indexes for inactive and secondary
+    to determine if the context menu (right-click menu) should be displayed.
+    """
+
+    inactive: OrbitalSpaceData
+    secondary: OrbitalSpaceData
+
+    def __init__(self):
+        self.inactive = OrbitalSpaceData()
+        self.secondary = OrbitalSpaceData()
+
+    def reset(self) -> None:
+        self.inactive.reset()
+        self.secondary.reset()
+
+    def update_idx_info(self, row_idx: int, space: OrbitalSpace) -> None:
+        if space not in (OrbitalSpace.inactive, OrbitalSpace.secondary):
+            # active, ras1, ras3 are not included because their context menu (right click menu) is always shown
+            # and they are not needed to store the index information
+            # therefore, skip them
+            return
+        elif space == OrbitalSpace.inactive:
+            if not self.inactive.found:
+                # First time to find inactive
+                self.inactive.found = True
+                self.inactive.first = row_idx
+            # Always update the last idx
+            self.inactive.last = row_idx
+        else:  # secondary
+            if not self.secondary.found:
+                # First time to find secondary
+                self.secondary.found = True
+                self.secondary.first = row_idx
+            # Always update the last idx
+            self.secondary.last = row_idx
+
+    def should_show_inactive_action_menu(self, top_row: int) -> bool:
+        if self.secondary.found and top_row > self.secondary.first:
+            # secondary starts from the row before top_row.
+            # All inactive are before secondary, so it is guaranteed that there are no inactive in the selection range.
+            return False
+        return True
+
+    def should_show_secondary_action_menu(self, bottom_row: int) -> bool:
+        if self.inactive.found and bottom_row < self.inactive.last:
+            # inactive ends on the row after bottom_row.
+            # All inactive are before secondary, so it is guaranteed that there are no secondary in the selection range.
+            return False
+        return True
+
+
+# The ranges shorter than this are written row by row in TableData.set_space_ranges
+MIN_SLICE_ROWS = 8
+
+
+class TableData:
+    """mo_data, header_info and the orbital space of each row.
+
+    spaces[row] is the OrbitalSpace value of the row of mo_data.
+    This is the only place where the orbital space of each row is stored,
+    and the GUI colors are derived from it.
+    space_counts, idx_info and the used flags in header_info.moltra_info are
+    updated only for the changed rows when set_spaces is called.
+    header_rows are the header tokens as read (before validate changes header_info),
+    so that header_info can be written and read again in the same way.
+    """
+
+    mo_data: MODataColumns
+    column_max_len: int
+    header_rows: List[List[str]]
+    header_info: HeaderInfo
+    idx_info: TableIdxInfo
+    spaces: bytearray
+    space_counts: List[int]
+
+    def __init__(self):
+        self.reset()
+
+    def reset(self):
+        self.mo_data = MODataColumns()
+        self.column_max_len = 0
+        self.header_rows = []
+        self.header_info = HeaderInfo()
+        self.idx_info = TableIdxInfo()
+        self.spaces = bytearray()
+        self.space_counts = [0] * len(OrbitalSpace)
+
+    def get_space(self, row: int) -> OrbitalSpace:
+        return OrbitalSpace(self.spaces[row])
+
+    def reset_spaces(self, spaces: Iterable[int]) -> None:
+        """Replace the orbital space (OrbitalSpace value) of all rows and rebuild all information derived from it
+        (e.g.) the bytearray returned by create_active_space"""
+        self.spaces = bytearray(spaces)
+        if len(self.spaces) != len(self.mo_data):
+            msg = f"The number of orbital spaces ({len(self.spaces)}) and rows ({len(self.mo_data)}) are not same."
+            raise ValueError(msg)
+        self.space_counts = [self.spaces.count(space) for space in OrbitalSpace]
+        self.idx_info.reset()
+        for row, space in enumerate(self.spaces):
+            self.idx_info.update_idx_info(row, OrbitalSpace(space))
+            self.update_moltra_info(row, is_used=space != OrbitalSpace.not_used)
+
+    def set_spaces(self, rows: Iterable[int], space: OrbitalSpace) -> None:
+        """Change the orbital space of the given rows.
+        This method costs O(number of the given rows)."""
+        removed_spaces: Set[int] = set()
+        top_row, bottom_row = self.write_rows_space(rows, space, removed_spaces)
+        if bottom_row == -1:
+            return  # Nothing is changed
+        self.update_idx_info(top_row, bottom_row, space, removed_spaces)
+
+    def set_space_ranges(self, ranges: Iterable[Tuple[int, int]], space: OrbitalSpace) -> None:
+        """Change the orbital space of the rows in the ranges ((top_row, bottom_row), both rows are included).
+        Each range is counted and written by slice operations of self.spaces,
+        so this method costs O(number of ranges) Python operations,
+        except for the rows changed from or to not_used (their MOLTRA range is updated row by row).
+        The rows of short ranges are written one by one, because it is faster than the slice operations."""
+        removed_spaces: Set[int] = set()
+        short_range_rows: List[int] = []
+        top_row, bottom_row = len(self.spaces), -1
+        for start, end in ranges:
+            if end - start + 1 < MIN_SLICE_ROWS:
+                short_range_rows.extend(range(start, end + 1))
+                continue
+            old_spaces = self.spaces[start : end + 1]
+            counts = [old_spaces.count(old_space) for old_space in OrbitalSpace]
+            if counts[space] == len(old_spaces):
+                continue
+            for old_space, count in enumerate(counts):
+                if count > 0 and old_space != space:
+                    self.space_counts[old_space] -= count
+                    removed_spaces.add(old_space)
+            self.space_counts[space] += len(old_spaces) - counts[space]
+            self.spaces[start : end + 1] = bytes([space]) * len(old_spaces)
+            if space == OrbitalSpace.not_used:
+                for offset, old_space in enumerate(old_spaces):
+                    if old_space != OrbitalSpace.not_used:
+                        self.update_moltra_info(start + offset, is_used=False)
+            else:
+                offset = old_spaces.find(OrbitalSpace.not_used)
+                while offset != -1:
+                    self.update_moltra_info(start + offset, is_used=True)
+                    offset = old_spaces.find(OrbitalSpace.not_used, offset + 1)
+            top_row, bottom_row = min(top_row, start), max(bottom_row, end)
+        short_top_row, short_bottom_row = self.write_rows_space(short_range_rows, space, removed_spaces)
+        top_row, bottom_row = min(top_row, short_top_row), max(bottom_row, short_bottom_row)
+        if bottom_row == -1:
+            return  # Nothing is changed
+        self.update_idx_info(top_row, bottom_row, space, removed_spaces)
+
+    def write_rows_space(self, rows: Iterable[int], space: OrbitalSpace, removed_spaces: Set[int]) -> Tuple[int, int]:
+        """Write the orbital space of the rows one by one and add the replaced spaces to removed_spaces.
+        Return the first and last changed rows ((len(self.spaces), -1) if nothing is changed)."""
+        top_row, bottom_row = len(self.spaces), -1
+        for row in rows:
+            old_space = self.spaces[row]
+            if old_space == space:
+                continue
+            self.spaces[row] = space
+            self.space_counts[old_space] -= 1
+            self.space_counts[space] += 1
+            removed_spaces.add(old_space)
+            top_row, bottom_row = min(top_row, row), max(bottom_row, row)
+            if (old_space == OrbitalSpace.not_used) != (space == OrbitalSpace.not_used):
+                self.update_moltra_info(row, is_used=space != OrbitalSpace.not_used)
+        return top_row, bottom_row
+
+    def update_idx_info(self, top_row: int, bottom_row: int, space: OrbitalSpace, removed_spaces: Set[int]) -> None:
+        # Update the first and last indexes of inactive and secondary
+        for idx_space, space_data in (
+            (OrbitalSpace.inactive, self.idx_info.inactive),
+            (OrbitalSpace.secondary, self.idx_info.secondary),
+        ):
+            if space == idx_space:
+                space_data.add_rows(top_row, bottom_row)
+            elif idx_space in removed_spaces:
+                space_data.update_after_removal(self.spaces, idx_space)
+
+    def update_moltra_info(self, row: int, *, is_used: bool) -> None:
+        self.header_info.moltra_info[self.mo_data.get_mo_symmetry(row)].set_value(
+            self.mo_data.mo_number[row], is_included=is_used
+        )
+
+    def get_spaces_by_mo(self) -> Dict[Tuple[str, int], OrbitalSpace]:
+        """Return the orbital space of each row keyed by (mo_symmetry, mo_number),
+        so that the spaces can be restored after the rows are reloaded."""
+        rows = self.mo_data
+        return {
+            (rows.get_mo_symmetry(row), rows.mo_number[row]): OrbitalSpace(space)
+            for row, space in enumerate(self.spaces)
+        }
+
+    def restore_spaces_by_mo(self, spaces_by_mo: Dict[Tuple[str, int], OrbitalSpace]) -> bool:
+        """Set the orbital spaces returned by get_spaces_by_mo.
+        Return False and change nothing if the rows are not the same MOs."""
+        rows = self.mo_data
+        keys = [(rows.get_mo_symmetry(row), rows.mo_number[row]) for row in range(len(rows))]
+        if len(keys) != len(spaces_by_mo) or any(key not in spaces_by_mo for key in keys):
+            return False
+        self.reset_spaces(spaces_by_mo[key] for key in keys)
+        return True
+
+    def count_spaces(self) -> Dict[OrbitalSpace, int]:
+        """Return the number of rows per orbital space"""
+        return {space: self.space_counts[space] for space in OrbitalSpace}
+
+    def add_mo_data(self, row: List[str]) -> None:
+        """Add a row of the sum_dirac_dfcoef output to self.mo_data"""
+        self.mo_data.append_row(row)
+
+    def load_sum_dirac_dfcoef(self, file_path: Path) -> None:
+        """Reset self and read the sum_dirac_dfcoef output in a single pass.
+        The header is read and checked before any MO data is read."""
+        with open(file_path) as f:
+            reader = SumDiracDfcoefReader(f)
+            with trace_span("file read", path=str(file_path)):
+                header_rows = reader.read_header()
+            # The rows are read while they are parsed, so "row parse" includes reading the rest of the file
+            self.load_sum_dirac_dfcoef_rows(header_rows, reader.read_rows())
+
+    def load_sum_dirac_dfcoef_rows(self, header_rows: List[List[str]], rows: Iterable[List[str]]) -> None:
+        """Reset self and read the tokens of the sum_dirac_dfcoef output.
+        (e.g.) The rows returned by sum_dirac_dfcoef running in the process pool."""
+        self.reset()
+        self.header_rows = [list(row) for row in header_rows]
+        with trace_span("header parse"):
+            self.header_info.read_header(self.header_rows)
+        try:
+            with trace_span("row parse") as span:
+                for row in rows:
+                    self.add_mo_data(row)
+                    self.column_max_len = max(self.column_max_len, len(row))
+                span.end(rows=len(self.mo_data))
+        except ValueError as e:
+            msg = "The output file is not correct, ValueError"
+            raise ValueError(msg) from e
+        except IndexError as e:
+            msg = "The output file is not correct, IndexError"
+            raise IndexError(msg) from e
+
+    def validate(self) -> None:
+        """Check TableData values consistency.
+        In addition, decrease header_info.electron_number
+        by the number of electrons that are not included in the sum_dirac_dfcoef output.
+
+        Raises:
+            KeyError: _description_
+            KeyError: _description_
+        """
+        with trace_span("validate"):
+            # Check whether header_info.moltra_info and header_info.spinor_num_info have same keys or not.
+            if self.header_info.spinor_num_info.keys() != self.header_info.moltra_info.keys():
+                msg = "Keys of spinor_num_info.keys() and moltra_info.keys() are not same."
+                raise KeyError(msg)
+
+            # Get the minimum mo_number index per mo_symmetry
+            keys = self.header_info.spinor_num_info.keys()
+            max_int = 10**10
+            min_idx = dict.fromkeys(keys, max_int)
+            for key, mo_number in self.mo_data.min_mo_number_per_symmetry().items():
+                if key not in keys:
+                    msg = f"mo_symmetry {key} is not found in the eigenvalues data"
+                    raise KeyError(msg)
+                min_idx[key] = mo_number
+
+            # Decrease the 2*(min_idx[key]-1) from header_info.electron_number
+            # Because min_idx[key] stores the first orbitals mo_number included in the output,
+            # we need to decrease the electron number that is not included in the output.
+            self.header_info.electron_number -= sum(first_mo_idx - 1 for first_mo_idx in min_idx.values()) * 2
@@ -0,0 +1,182 @@
+# This script writes and reads TableData as a binary table file.
+# Re-opening a text sum_dirac_dfcoef output means tokenizing every line again,
+# while the binary table file is memory-mapped and the MO data columns are copied as they are.
+#
+# File layout (all offsets are in bytes):
+#   [fixed header]  magic (8 bytes), format version (uint16), reserved (uint16), metadata length (uint32)
+#   [metadata]      UTF-8 JSON: byteorder, header_rows, column_max_len, symmetry_labels, ao_labels
+#                   and the typecode, itemsize, offset and length of each column
+#   [columns]       the arrays of MODataColumns (fixed-width columns and the CSR style AO columns),
+#                   each column starts at a multiple of COLUMN_ALIGNMENT from the start of the columns
+# The header is stored as the header tokens of the sum_dirac_dfcoef output (TableData.header_rows),
+# so HeaderInfo is read in the same way as the text format.
+# Other files (e.g. the session file) use the same layout with their own magic, metadata and columns.
+# It does not depend on PySide6, so it can be used without the GUI.
+import json
+import mmap
+import struct
+import sys
+from array import array
+from pathlib import Path
+from typing import Any, Dict, List, Optional, Tuple
+
+from dcaspt2_input_generator.core.dirac_output_preview import ENERGY_DECIMAL
+from dcaspt2_input_generator.core.sum_dirac_dfcoef_pool import SumDiracDfcoefRows
+from dcaspt2_input_generator.core.table_data import MO_DATA_COLUMNS, TableData
+from dcaspt2_input_generator.utils.tracing import trace_span
+
+TABLE_DATA_BINARY_MAGIC = b"DC2TABLE"
+TABLE_DATA_BINARY_VERSION = 1
+TABLE_DATA_BINARY_SUFFIX = ".dcaspt2tbl"
+HEADER_FORMAT = "<8sHHI"
+HEADER_SIZE = struct.calcsize(HEADER_FORMAT)
+COLUMN_ALIGNMENT = 8
+# The keys of the metadata read by load_table_data_binary and of each column in the metadata
+REQUIRED_METADATA_KEYS = ("byteorder", "header_rows", "column_max_len", "symmetry_labels", "ao_labels", "columns")
+REQUIRED_COLUMN_KEYS = ("name", "typecode", "itemsize", "offset", "length")
+
+
+def align(size: int) -> int:
+    return (size + COLUMN_ALIGNMENT - 1) // COLUMN_ALIGNMENT * COLUMN_ALIGNMENT
+
+
+def write_table_data_binary(
+    table_data: TableData,
+    file_path: Path,
+    *,
+    magic: bytes = TABLE_DATA_BINARY_MAGIC,
+    extra_metadata: Optional[Dict[str, Any]] = None,
+    extra_columns: Optional[Dict[str, array]] = None,
+) -> None:
+    """Write table_data (header and MO data in the current row order) as the binary table file.
+    The orbital spaces are not written, the session file writes them as an extra column."""
+    mo_data = table_data.mo_data
+    all_columns = {name: getattr(mo_data, name) for name in MO_DATA_COLUMNS}
+    all_columns.update(extra_columns or {})
+    columns: List[Dict[str, Any]] = []
+    offset = 0
+    for name, values in all_columns.items():
+        columns.append(
+            {
+                "name": name,
+                "typecode": values.typecode,
+                "itemsize": values.itemsize,
+                "offset": offset,
+                "length": len(values),
+            }
+        )
+        offset = align(offset + len(values) * values.itemsize)
+    metadata = json.dumps(
+        {
+            "byteorder": sys.byteorder,
+            "header_rows": table_data.header_rows,
+            "column_max_len": table_data.column_max_len,
+            "symmetry_labels": mo_data.symmetry_labels,
+            "ao_labels": mo_data.ao_labels,
+            "columns": columns,
+            **(extra_metadata or {}),
+        }
+    ).encode("utf-8")
+    with trace_span("binary write", path=str(file_path)), open(file_path, "wb") as f:
+        f.write(struct.pack(HEADER_FORMAT, magic, TABLE_DATA_BINARY_VERSION, 0, len(metadata)))
+        f.write(metadata)
+        data_start = align(HEADER_SIZE + len(metadata))
+        f.write(b"\0" * (data_start - HEADER_SIZE - len(metadata)))
+        for column in columns:
+            f.write(b"\0" * (data_start + column["offset"] - f.tell()))
+            all_columns[column["name"]].tofile(f)
+
+
+def load_table_data_binary(
+    table_data: TableData, file_path: Path, *, magic: bytes = TABLE_DATA_BINARY_MAGIC
+) -> Tuple[Dict[str, Any], Dict[str, array]]:
+    """Reset table_data and read the binary table file.
+    Return the metadata and the extra columns (the columns that are not MODataColumns).
+
+    Raises:
+        ValueError: If the file is not a correct binary table file.
+    """
+    table_data.reset()
+    with trace_span("binary read", path=str(file_path)), open(file_path, "rb") as f:
+        try:
+            mm = mmap.mmap(f.fileno(), 0, access=mmap.ACCESS_READ)
+        except ValueError as e:  # empty file
+            msg = f"The binary table file is empty. path: {file_path}"
+            raise ValueError(msg) from e
+        with mm:
+            metadata, columns = read_columns(mm, file_path, magic)
+    with trace_span("header parse"):
+        table_data.header_rows = metadata["header_rows"]
+        table_data.header_info.read_header(table_data.header_rows)
+    table_data.mo_data.set_columns(columns, metadata["symmetry_labels"], metadata["ao_labels"])
+    table_data.column_max_len = metadata["column_max_len"]
+    return metadata, {name: values for name, values in columns.items() if name not in MO_DATA_COLUMNS}
+
+
+def read_columns(mm: mmap.mmap, file_path: Path, magic: bytes) -> Tuple[Dict[str, Any], Dict[str, array]]:
+    if len(mm) < HEADER_SIZE:
+        msg = f"The file is too short for the binary table file. path: {file_path}"
+        raise ValueError(msg)
+    file_magic, version, _, metadata_len = struct.unpack_from(HEADER_FORMAT, mm, 0)
+    if file_magic != magic:
+        msg = f"The file is not the binary table file. path: {file_path}"
+        raise ValueError(msg)
+    if version != TABLE_DATA_BINARY_VERSION:
+        msg = f"The version of the binary table file is not supported: {version}. path: {file_path}"
+        raise ValueError(msg)
+    metadata = json.loads(mm[HEADER_SIZE : HEADER_SIZE + metadata_len].decode("utf-8"))
+    validate_metadata(metadata, file_path)
+    data_start = align(HEADER_SIZE + metadata_len)
+    columns: Dict[str, array] = {}
+    with memoryview(mm) as view:
+        for column in metadata["columns"]:
+            values = array(column["typecode"])
+            if values.itemsize != column["itemsize"]:
+                msg = f"The item size of {column['name']} is {column['itemsize']}, but {values.itemsize} is expected."
+                raise ValueError(msg)
+            start = data_start + column["offset"]
+            end = start + column["length"] * values.itemsize
+            if end > len(mm):
+                msg = f"The binary table file is truncated. path: {file_path}"
+                raise ValueError(msg)
+            # The only copy of the column: from the mapped file to the array
+            values.frombytes(view[start:end])
+            if metadata["byteorder"] != sys.byteorder:
+                values.byteswap()
+            columns[column["name"]] = values
+    return metadata, columns
+
+
+def validate_metadata(metadata: Any, file_path: Path) -> None:
+    if not isinstance(metadata, dict):
+        msg = f"The metadata of the binary table file is not a JSON object. path: {file_path}"
+        raise ValueError(msg)
+    missing_keys = [key for key in REQUIRED_METADATA_KEYS if key not in metadata]
+    if missing_keys:
+        msg = f"The metadata of the binary table file does not have {', '.join(missing_keys)}. path: {file_path}"
+        raise ValueError(msg)
+    names = set()
+    for column in metadata["columns"]:
+        if not isinstance(column, dict) or any(key not in column for key in REQUIRED_COLUMN_KEYS):
+            msg = f"The column metadata must have {', '.join(REQUIRED_COLUMN_KEYS)}: {column}. path: {file_path}"
+            raise ValueError(msg)
+        names.add(column["name"])
+    missing_columns = [name for name in MO_DATA_COLUMNS if name not in names]
+    if missing_columns:
+        msg = f"The binary table file does not have the columns {', '.join(missing_columns)}. path: {file_path}"
+        raise ValueError(msg)
+
+
+def create_sum_dirac_dfcoef_rows(table_data: TableData) -> SumDiracDfcoefRows:
+    """Return the tokens of the sum_dirac_dfcoef output of table_data (e.g. to save it as the text format)
+    The energies and the percentages are written with the same decimal places as sum_dirac_dfcoef (-d 3),
+    so the text written from the binary table file has the same tokens as the original output."""
+    mo_data = table_data.mo_data
+    result = SumDiracDfcoefRows(header_rows=[list(row) for row in table_data.header_rows])
+    for idx in range(len(mo_data)):
+        row = [mo_data.get_mo_symmetry(idx), str(mo_data.mo_number[idx]), f"{mo_data.energy[idx]:.{ENERGY_DECIMAL}f}"]
+        for ao_idx in range(mo_data.ao_len(idx)):
+            percentage = mo_data.get_percentage(idx, ao_idx)
+            row.extend([mo_data.get_ao_type(idx, ao_idx), f"{percentage:.{ENERGY_DECIMAL}f}"])
+        result.rows.append(row)
+    return result
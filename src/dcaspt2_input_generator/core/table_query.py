@@ -0,0 +1,327 @@
+# This script finds the rows of TableData with a small query language, (e.g.) "U 5f > 30% and -1.0 < energy < 0.5"
+# TableQueryIndex is built once per table: an inverted index from the AO type to its (row, percentage) pairs
+# and the rows sorted by energy. The postings of a prefix key (atom, angular momentum or both) are merged
+# and sorted by percentage the first time the key is used, so a comparison is two binary searches.
+#
+# query      := and_query ("or" and_query)*
+# and_query  := not_query ("and" not_query)*
+# not_query  := "not" not_query | "(" query ")" | comparison
+# comparison := [NUMBER OP] subject [OP NUMBER]   (OP: <, <=, > or >=, a percentage may end with %)
+# subject    := "energy" | AO key
+# AO key     := AO type (e.g. B3uUfxxx) | atom (e.g. U) | angular momentum (e.g. 5f) | atom and angular momentum
+#               (e.g. U 5f or U:f). The percentage of the key is the sum over the matching AO types of the row.
+#               The principal quantum number is ignored, because the AO types do not have it.
+# It does not depend on PySide6, so it can be used without the GUI.
+import re
+from bisect import bisect_left, bisect_right
+from dataclasses import dataclass
+from typing import Dict, List, Optional, Set, Tuple
+from weakref import WeakKeyDictionary
+
+from dcaspt2_input_generator.core.table_data import TableData
+from dcaspt2_input_generator.utils.tracing import trace_span
+
+# AO type = irrep + atom + angular momentum and cartesian components + (index of the equivalent atom)
+# (e.g.) AgArs, B3uArpx, AgN2pz(1), AuUfxyz, B1uOpz(2)
+AO_TYPE = re.compile(r"^(?:[AB][123]?[gu]?|A'|A\")(?P<atom>[A-Z].*?)(?P<shell>[spdfghi])[xyz]*(?:\(\d+\))?$")
+SHELL = re.compile(r"^\d*(?P<shell>[spdfghi])$")
+TOKEN = re.compile(
+    r"""\s*(?:
+    (?P<number>[-+]?(?:\d+\.?\d*|\.\d+)(?:[eE][-+]?\d+)?)(?![A-Za-z])
+    |(?P<op><=|>=|<|>)
+    |(?P<word>\d*[A-Za-z][A-Za-z0-9:'"]*(?:\(\d+\))?)
+    |(?P<symbol>[()%])
+    )""",
+    re.VERBOSE,
+)
+FLIPPED_OP = {"<": ">", "<=": ">=", ">": "<", ">=": "<="}
+
+
+class TableQueryError(ValueError):
+    pass
+
+
+def parse_ao_type(ao_type: str) -> Optional[Tuple[str, str]]:
+    """(e.g.) "B3uUfxxx" -> ("U", "f"), "AgN2pz(1)" -> ("N2", "p"), None if ao_type is not the AO type format"""
+    match = AO_TYPE.match(ao_type)
+    return None if match is None else (match.group("atom"), match.group("shell"))
+
+
+def is_same_atom(atom: str, query_atom: str) -> bool:
+    # The atom label may end with a number (e.g.) N2 in AgN2pz(1), "N" matches it
+    return atom == query_atom or atom.rstrip("0123456789") == query_atom
+
+
+@dataclass(frozen=True)
+class AOKey:
+    """label: the AO type, otherwise the AO types are matched by atom and/or shell (angular momentum)"""
+
+    label: Optional[str] = None
+    atom: Optional[str] = None
+    shell: Optional[str] = None
+
+    def __str__(self) -> str:
+        if self.label is not None:
+            return self.label
+        return " ".join(value for value in (self.atom, self.shell) if value is not None)
+
+
+@dataclass
+class Postings:
+    """The rows having the AO key sorted by the percentage of the key (rows without the key are not included)"""
+
+    percentages: List[float]
+    rows: List[int]
+
+
+class TableQueryIndex:
+    def __init__(self, table_data: TableData):
+        mo_data = table_data.mo_data
+        # Keep the columns the index is built from, to detect that the table is reloaded or reordered
+        self.columns = (mo_data.energy, mo_data.ao_type_ids)
+        self.row_count = len(mo_data)
+        self.ao_labels = list(mo_data.ao_labels)
+        self.label_ids = {label: label_id for label_id, label in enumerate(self.ao_labels)}
+        self.parsed_labels = [parse_ao_type(label) for label in self.ao_labels]
+        with trace_span("query index", rows=self.row_count):
+            self.rows_by_label: List[List[int]] = [[] for _ in self.ao_labels]
+            self.percentages_by_label: List[List[float]] = [[] for _ in self.ao_labels]
+            offsets, ao_type_ids, percentage = mo_data.ao_offsets, mo_data.ao_type_ids, mo_data.percentage
+            for row in range(self.row_count):
+                for entry in range(offsets[row], offsets[row + 1]):
+                    label_id = ao_type_ids[entry]
+                    self.rows_by_label[label_id].append(row)
+                    self.percentages_by_label[label_id].append(percentage[entry])
+            self.energy_order = sorted(range(self.row_count), key=mo_data.energy.__getitem__)
+            self.sorted_energies = [mo_data.energy[row] for row in self.energy_order]
+        self.postings: Dict[AOKey, Postings] = {}
+
+    def is_built_from(self, table_data: TableData) -> bool:
+        mo_data = table_data.mo_data
+        return self.columns[0] is mo_data.energy and self.columns[1] is mo_data.ao_type_ids
+
+    def find_label_ids(self, key: AOKey) -> List[int]:
+        if key.label is not None:
+            return [self.label_ids[key.label]] if key.label in self.label_ids else []
+        return [
+            label_id
+            for label_id, parsed in enumerate(self.parsed_labels)
+            if parsed is not None
+            and (key.atom is None or is_same_atom(parsed[0], key.atom))
+            and (key.shell is None or parsed[1] == key.shell)
+        ]
+
+    def get_postings(self, key: AOKey) -> Postings:
+        """Raises:
+        TableQueryError: If no AO type matches the key.
+        """
+        if key in self.postings:
+            return self.postings[key]
+        label_ids = self.find_label_ids(key)
+        if not label_ids:
+            msg = f"No AO type matches {key}"
+            raise TableQueryError(msg)
+        sums: Dict[int, float] = {}
+        for label_id in label_ids:
+            for row, value in zip(self.rows_by_label[label_id], self.percentages_by_label[label_id]):
+                sums[row] = sums.get(row, 0.0) + value
+        items = sorted(sums.items(), key=lambda item: item[1])
+        postings = Postings([value for _, value in items], [row for row, _ in items])
+        self.postings[key] = postings
+        return postings
+
+    def energy_rows(self, bounds: "Bounds") -> Set[int]:
+        start, end = bounds.search(self.sorted_energies)
+        return set(self.energy_order[start:end])
+
+    def ao_rows(self, key: AOKey, bounds: "Bounds") -> Set[int]:
+        postings = self.get_postings(key)
+        start, end = bounds.search(postings.percentages)
+        rows = set(postings.rows[start:end])
+        if bounds.contains(0.0):  # The rows without the key have 0 %
+            rows |= set(range(self.row_count)).difference(postings.rows)
+        return rows
+
+
+@dataclass
+class Bounds:
+    lower: Optional[float] = None
+    lower_inclusive: bool = False
+    upper: Optional[float] = None
+    upper_inclusive: bool = False
+
+    def add(self, op: str, value: float) -> None:
+        # subject OP value
+        if op in (">", ">="):
+            self.lower, self.lower_inclusive = value, op == ">="
+        else:
+            self.upper, self.upper_inclusive = value, op == "<="
+
+    def search(self, sorted_values: List[float]) -> Tuple[int, int]:
+        """Return the range of the indexes of sorted_values in the bounds"""
+        start, end = 0, len(sorted_values)
+        if self.lower is not None:
+            start = (bisect_left if self.lower_inclusive else bisect_right)(sorted_values, self.lower)
+        if self.upper is not None:
+            end = (bisect_right if self.upper_inclusive else bisect_left)(sorted_values, self.upper)
+        return start, max(start, end)
+
+    def contains(self, value: float) -> bool:
+        if self.lower is not None and (value < self.lower or (value == self.lower and not self.lower_inclusive)):
+            return False
+        return self.upper is None or value < self.upper or (value == self.upper and self.upper_inclusive)
+
+
+class QueryParser:
+    """Parse the query and evaluate it with the index at the same time (recursive descent)"""
+
+    def __init__(self, query: str, index: TableQueryIndex):
+        self.query = query
+        self.index = index
+        self.tokens = tokenize(query)
+        self.pos = 0
+
+    def peek(self) -> Tuple[str, str, int]:
+        return self.tokens[self.pos] if self.pos < len(self.tokens) else ("end", "", len(self.query))
+
+    def take(self) -> Tuple[str, str, int]:
+        token = self.peek()
+        self.pos += 1
+        return token
+
+    def is_keyword(self, keyword: str) -> bool:
+        kind, value, _ = self.peek()
+        return kind == "word" and value.lower() == keyword
+
+    def error(self, message: str) -> TableQueryError:
+        return TableQueryError(f"{message} at column {self.peek()[2] + 1}: {self.query}")
+
+    def parse(self) -> Set[int]:
+        if not self.tokens:
+            msg = "The query is empty"
+            raise TableQueryError(msg)
+        rows = self.parse_or()
+        if self.pos < len(self.tokens):
+            msg = f"Unexpected {self.peek()[1]}"
+            raise self.error(msg)
+        return rows
+
+    def parse_or(self) -> Set[int]:
+        rows = self.parse_and()
+        while self.is_keyword("or"):
+            self.take()
+            rows = rows | self.parse_and()
+        return rows
+
+    def parse_and(self) -> Set[int]:
+        rows = self.parse_not()
+        while self.is_keyword("and"):
+            self.take()
+            rows = rows & self.parse_not()
+        return rows
+
+    def parse_not(self) -> Set[int]:
+        if self.is_keyword("not"):
+            self.take()
+            return set(range(self.index.row_count)) - self.parse_not()
+        if self.peek()[:2] == ("symbol", "("):
+            self.take()
+            rows = self.parse_or()
+            if self.take()[:2] != ("symbol", ")"):
+                self.pos -= 1
+                msg = "Expected )"
+                raise self.error(msg)
+            return rows
+        return self.parse_comparison()
+
+    def parse_number(self) -> float:
+        kind, value, _ = self.peek()
+        if kind != "number":
+            msg = "Expected a number"
+            raise self.error(msg)
+        self.take()
+        if self.peek()[:2] == ("symbol", "%"):
+            self.take()
+        return float(value)
+
+    def parse_op(self) -> str:
+        kind, value, _ = self.peek()
+        if kind != "op":
+            msg = "Expected <, <=, > or >="
+            raise self.error(msg)
+        self.take()
+        return value
+
+    def parse_comparison(self) -> Set[int]:
+        bounds = Bounds()
+        if self.peek()[0] == "number":
+            value = self.parse_number()
+            bounds.add(FLIPPED_OP[self.parse_op()], value)
+        words: List[str] = []
+        while self.peek()[0] == "word" and self.peek()[1].lower() not in ("and", "or", "not"):
+            words.append(self.take()[1])
+        if not words:
+            msg = "Expected energy or an AO key"
+            raise self.error(msg)
+        if self.peek()[0] == "op":
+            bounds.add(self.parse_op(), self.parse_number())
+        elif bounds.lower is None and bounds.upper is None:
+            msg = "Expected <, <=, > or >="
+            raise self.error(msg)
+        if len(words) == 1 and words[0].lower() == "energy":
+            return self.index.energy_rows(bounds)
+        return self.index.ao_rows(self.create_ao_key(words), bounds)
+
+    def create_ao_key(self, words: List[str]) -> AOKey:
+        if len(words) == 1 and ":" in words[0]:
+            words = words[0].split(":", 1)
+        if len(words) == 1:
+            word = words[0]
+            shell = SHELL.match(word)
+            if word in self.index.label_ids:
+                return AOKey(label=word)
+            if shell is not None:
+                return AOKey(shell=shell.group("shell"))
+            return AOKey(atom=word)
+        shell = SHELL.match(words[1]) if len(words) == 2 else None  # noqa: PLR2004
+        if shell is None:
+            msg = f"Invalid AO key: {' '.join(words)}. (e.g.) U 5f, U:f, U, 5f or B3uUfxxx"
+            raise TableQueryError(msg)
+        return AOKey(atom=words[0], shell=shell.group("shell"))
+
+
+def tokenize(query: str) -> List[Tuple[str, str, int]]:
+    tokens: List[Tuple[str, str, int]] = []
+    pos = 0
+    while query[pos:].strip():
+        match = TOKEN.match(query, pos)
+        if match is None or match.lastgroup is None:
+            start = len(query) - len(query[pos:].lstrip())
+            msg = f"Invalid character {query[start]} at column {start + 1}: {query}"
+            raise TableQueryError(msg)
+        tokens.append((match.lastgroup, match.group(match.lastgroup), match.start(match.lastgroup)))
+        pos = match.end()
+    return tokens
+
+
+_table_query_indexes: "WeakKeyDictionary[TableData, TableQueryIndex]" = WeakKeyDictionary()
+
+
+def get_table_query_index(table_data: TableData) -> TableQueryIndex:
+    """Return the index of table_data, it is built again only if the rows are reloaded or reordered"""
+    index = _table_query_indexes.get(table_data)
+    if index is None or not index.is_built_from(table_data):
+        index = TableQueryIndex(table_data)
+        _table_query_indexes[table_data] = index
+    return index
+
+
+def run_table_query(table_data: TableData, query: str) -> List[int]:
+    """Return the rows (0-based, ascending) of table_data matching the query.
+
+    Raises:
+        TableQueryError: If the query is invalid.
+    """
+    index = get_table_query_index(table_data)
+    with trace_span("query", query=query):
+        return sorted(QueryParser(query, index).parse())
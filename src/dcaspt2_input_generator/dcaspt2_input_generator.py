@@ -1,15 +1,14 @@
-import os
+# The GUI (PySide6) and the commands are imported when they are used, so that each command starts fast.
+# ruff: noqa: PLC0415
 import sys
 
-from PySide6.QtWidgets import QApplication
-
-from dcaspt2_input_generator.utils.dir_info import dir_info
-
 # import qt_material
 
 
 class MainApp:
     def __init__(self):
+        from PySide6.QtWidgets import QApplication
+
         self.app = QApplication(sys.argv)
         self.init_gui()
 
@@ -21,8 +20,8 @@ class MainApp:
         self.window.show()
 
     def delete_unneeded_files(self):
-        if dir_info.sum_dirac_dfcoef_path.exists():
-            os.remove(dir_info.sum_dirac_dfcoef_path)
+        # Remove the scratch files of the documents
+        self.window.close_all_documents()
 
     def run(self):
         try:
@@ -32,5 +31,36 @@ class MainApp:
 
 
 def main():
+    from dcaspt2_input_generator.utils.args import get_args
+    from dcaspt2_input_generator.utils.utils import enable_debug
+
+    args = get_args()
+    if args.debug:
+        enable_debug()
+    if args.trace is not None:
+        from pathlib import Path
+
+        from dcaspt2_input_generator.utils.tracing import enable_tracing
+
+        enable_tracing(Path(args.trace).expanduser())
+
+    if args.command == "generate":
+        # Create the input file without GUI. Never import PySide6 in this path.
+        from dcaspt2_input_generator.cli import generate
+
+        return generate(args)
+    elif args.command == "estimate":
+        from dcaspt2_input_generator.cli import estimate
+
+        return estimate(args)
+    elif args.command == "calibrate":
+        from dcaspt2_input_generator.cli import calibrate
+
+        return calibrate(args)
+    elif args.command == "sweep":
+        from dcaspt2_input_generator.cli import sweep
+
+        return sweep(args)
+
     app = MainApp()
     app.run()
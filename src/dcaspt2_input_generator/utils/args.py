@@ -1,5 +1,6 @@
 import argparse
 import sys
+from typing import Optional
 
 
 class PrintVersionExitAction(argparse.Action):
@@ -30,8 +31,217 @@ def parse_args() -> "argparse.Namespace":
         help="print debug output (Normalization constant, Sum of MO coefficient)",
         dest="debug",
     )
+    parser.add_argument(
+        "--trace",
+        metavar="FILE",
+        help="Write the time spent in each stage (e.g. sum_dirac_dfcoef run, row parse) to FILE as a Chrome trace.\
+ Open FILE with https://ui.perfetto.dev or chrome://tracing. Use before the subcommand: --trace FILE generate ...",
+        dest="trace",
+    )
+    subparsers = parser.add_subparsers(
+        title="subcommands", description="If no subcommand is given, the GUI is started.", dest="command"
+    )
+    add_generate_parser(subparsers)
+    add_estimate_parser(subparsers)
+    add_calibrate_parser(subparsers)
+    add_sweep_parser(subparsers)
     # If -v or --version option is used, print version and exit
     return parser.parse_args()
 
 
-args = parse_args()
+def add_generate_parser(subparsers: "argparse._SubParsersAction") -> None:
+    parser = subparsers.add_parser(
+        "generate",
+        help="Create the DIRAC-CASPT2 input file without GUI",
+        description="Create the DIRAC-CASPT2 input file from DIRAC output or sum_dirac_dfcoef output without GUI.\
+ The rows of the table are sorted by energy and numbered from 1 (1 row = 1 Kramers pair = 2 spinors).\
+ The orbital space of each row is determined by --strategy (default: --cas) first, then the rows given by --inactive,\
+ --ras1, --active, --ras3, --secondary and --not-used options are overwritten. (e.g.) --ras1 10..12 --ras3 20,22..25",
+    )
+    parser.add_argument(
+        "-o",
+        "--output",
+        type=str,
+        help="file path of the DIRAC-CASPT2 input. Default: print to stdout",
+        dest="output",
+    )
+    parser.add_argument("--totsym", type=int, help="total symmetry number. Default: settings.json", dest="totsym")
+    parser.add_argument("--diracver", type=int, help="DIRAC major version. Default: settings.json", dest="diracver")
+    add_table_arguments(parser)
+
+
+def add_estimate_parser(subparsers: "argparse._SubParsersAction") -> None:
+    parser = subparsers.add_parser(
+        "estimate",
+        help="Estimate the memory, the integral file size and the cost of each DIRAC-CASPT2 subprogram",
+        description="Estimate the peak memory, the size of the integral files and the relative cost of IVO, CASCI\
+ and CASPT2 for the orbital spaces given by the same options as generate.\
+ The exit status is 2 if the estimated peak memory exceeds --node-memory.",
+    )
+    parser.add_argument(
+        "--node-memory",
+        type=str,
+        metavar="SIZE",
+        help="memory of the compute node (e.g.) 192G, 512M",
+        dest="node_memory",
+    )
+    parser.add_argument(
+        "--calibration",
+        type=str,
+        metavar="FILE",
+        help="calibration file created by the calibrate subcommand.\
+ Default: resource_calibration.json in the settings directory (if it exists)",
+        dest="calibration",
+    )
+    add_table_arguments(parser)
+
+
+def add_calibrate_parser(subparsers: "argparse._SubParsersAction") -> None:
+    parser = subparsers.add_parser(
+        "calibrate",
+        help="Fit the cost parameters of the resource estimate to the timing logs",
+        description="Fit the seconds per relative cost and the memory scale of each subprogram to the timing log (CSV)\
+ and write them to the calibration file used by the GUI and the estimate subcommand.\
+ The columns of the timing log are subprogram (IVO, CASCI or CASPT2), seconds, peak_memory (bytes, can be empty),\
+ point_group, ninact, nras1, nras2, nras3, nsec, nelec and optionally ras1_max_hole, ras3_max_electron,\
+ ivo_occupied and ivo_virtual (the numbers of spinors).",
+    )
+    parser.add_argument(
+        "-i",
+        "--input",
+        type=str,
+        required=True,
+        help="(required) file path of the timing log (CSV)",
+        dest="input",
+    )
+    parser.add_argument(
+        "-o",
+        "--output",
+        type=str,
+        help="file path of the calibration file. Default: resource_calibration.json in the settings directory",
+        dest="output",
+    )
+
+
+def add_sweep_parser(subparsers: "argparse._SubParsersAction") -> None:
+    parser = subparsers.add_parser(
+        "sweep",
+        help="Create the DIRAC-CASPT2 inputs of many active spaces and a manifest of their estimated resources",
+        description='Create the DIRAC-CASPT2 input of every combination of the sweep grid (JSON) in OUTPUT_DIR,\
+ and write OUTPUT_DIR/manifest.csv with the number of CI determinants and the estimated memory of each input.\
+ (e.g.) {"active_spaces": [{"strategy": "count", "electrons": [4, 6], "spinors": [8, 10, 12]},\
+ {"strategy": "energy_window", "below": [0.3, 0.5], "above": 0.5}], "ras1_rows": [0, 2], "ras3_rows": [0, 2],\
+ "ras1_max_hole": [1, 2], "ras3_max_electron": [1, 2], "totsym": [1, 2, 3]}\
+ ras1_rows (ras3_rows) is the number of the first (last) active rows changed to ras1 (ras3).\
+ ras1_max_hole, ras3_max_electron and totsym can be omitted (Default: settings.json).',
+    )
+    parser.add_argument(
+        "-i",
+        "--input",
+        type=str,
+        required=True,
+        help="(required) file path of DIRAC output or sum_dirac_dfcoef output",
+        dest="input",
+    )
+    parser.add_argument(
+        "-g", "--grid", type=str, required=True, help="(required) file path of the sweep grid (JSON)", dest="grid"
+    )
+    parser.add_argument(
+        "-o", "--output-dir", type=str, required=True, help="(required) directory of the inputs", dest="output_dir"
+    )
+    parser.add_argument("--diracver", type=int, help="DIRAC major version. Default: settings.json", dest="diracver")
+    parser.add_argument(
+        "--node-memory",
+        type=str,
+        metavar="SIZE",
+        help="memory of the compute node (e.g.) 192G. The manifest shows whether each input fits in it",
+        dest="node_memory",
+    )
+    parser.add_argument(
+        "--calibration",
+        type=str,
+        metavar="FILE",
+        help="calibration file created by the calibrate subcommand.\
+ Default: resource_calibration.json in the settings directory (if it exists)",
+        dest="calibration",
+    )
+    parser.add_argument(
+        "-j",
+        "--parallel",
+        type=int,
+        help="Number of processes for sum_dirac_dfcoef calculation and the sweep. Default: settings.json",
+        dest="parallel",
+    )
+
+
+def add_table_arguments(parser: "argparse.ArgumentParser") -> None:
+    # The options to load the table and to determine the orbital space of each row
+    parser.add_argument(
+        "-i",
+        "--input",
+        type=str,
+        required=True,
+        help="(required) file path of DIRAC output or sum_dirac_dfcoef output",
+        dest="input",
+    )
+    parser.add_argument(
+        "--cas",
+        type=int,
+        nargs=2,
+        default=[4, 8],
+        metavar=("ELECTRONS", "SPINORS"),
+        help="Default CAS configuration (the parameters of the count strategy). Default: 4 8 (CAS(4,8))",
+        dest="cas",
+    )
+    parser.add_argument(
+        "--strategy",
+        type=str,
+        default="count",
+        metavar="NAME",
+        help="Active space strategy. count: CAS(ELECTRONS, SPINORS) given by --cas,\
+ energy_window: the rows within below/above a.u. of HOMO/LUMO, largest_gap: the rows between the largest energy gaps\
+ in occupied_rows below HOMO and virtual_rows above LUMO, ao_character: the rows with more than threshold %% of the\
+ AO types given by ao (e.g. U:f,U:d,O:p), query: the rows matching query\
+ (e.g. 'U 5f > 30%% and -1.0 < energy < 0.5'). Default: count",
+        dest="strategy",
+    )
+    parser.add_argument(
+        "--strategy-param",
+        type=str,
+        action="append",
+        metavar="KEY=VALUE",
+        help="parameter of the active space strategy, can be given more than once.\
+ (e.g.) --strategy ao_character --strategy-param ao=U:f,U:d,O:p --strategy-param threshold=40",
+        dest="strategy_params",
+    )
+    for space in ("inactive", "ras1", "active", "ras3", "secondary", "not-used"):
+        parser.add_argument(
+            f"--{space}",
+            type=str,
+            metavar="ROWS",
+            help=f"rows to be {space} (e.g.) 1..10,12",
+            dest=space.replace("-", "_"),
+        )
+    parser.add_argument("--ras1-max-hole", type=int, help="ras1 max hole. Default: settings.json", dest="ras1_max_hole")
+    parser.add_argument(
+        "--ras3-max-electron", type=int, help="ras3 max electron. Default: settings.json", dest="ras3_max_electron"
+    )
+    parser.add_argument(
+        "-j",
+        "--parallel",
+        type=int,
+        help="Number of processes for sum_dirac_dfcoef calculation. Default: settings.json",
+        dest="parallel",
+    )
+
+
+_args: Optional[argparse.Namespace] = None
+
+
+def get_args() -> "argparse.Namespace":
+    """Parse the command line arguments at the first call instead of at import time,
+    so that importing this package does not depend on sys.argv."""
+    global _args  # noqa: PLW0603
+    if _args is None:
+        _args = parse_args()
+    return _args
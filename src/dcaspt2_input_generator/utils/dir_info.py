@@ -13,11 +13,16 @@ class DirInfo:
         )
         self.app_rootdir = Path(__file__).parent.parent.expanduser().resolve()  # src/dcaspt2_input_generator
         self.setting_file_path = self.app_default_save_dir / "settings.json"
-        self.sum_dirac_dfcoef_path = self.app_default_save_dir / "sum_dirac_dfcoef.out"
+        # The sum_dirac_dfcoef outputs of the opened documents (unique file per job)
+        self.scratch_dir = self.app_default_save_dir / "scratch"
+        self.sum_dirac_dfcoef_cache_dir = self.app_default_save_dir / "sum_dirac_dfcoef_cache"
+        # The cost parameters of the resource estimate fitted to the timing logs
+        self.resource_calibration_path = self.app_default_save_dir / "resource_calibration.json"
         self.__init_mkdir()
 
     def __init_mkdir(self):
         self.app_default_save_dir.mkdir(parents=True, exist_ok=True)
+        self.scratch_dir.mkdir(parents=True, exist_ok=True)
 
 
 dir_info = DirInfo()
@@ -3,7 +3,7 @@
 import json
 import os
 from pathlib import Path
-from typing import Dict, Union
+from typing import Dict, Optional, Union
 
 from dcaspt2_input_generator.utils.dir_info import dir_info
 
@@ -69,6 +69,46 @@ class MultiProcess:
         return num_process
 
 
+class SumDiracDfcoefCacheSettings:
+    def __init__(self, json_dict: SettingsDict) -> None:
+        self.json_dict = json_dict
+        self.cache_dir = self.__init_cache_dir__()
+        self.max_size_mb = self.__init_max_size_mb__()
+
+    def __init_cache_dir__(self) -> Path:
+        # An empty string means the default cache directory.
+        # Set the path of a shared directory to share the cache between several users.
+        key = "sum_dirac_dfcoef_cache_dir"
+        if self.json_dict.get(key):
+            return Path(str(self.json_dict[key])).expanduser()
+        return dir_info.sum_dirac_dfcoef_cache_dir
+
+    def __init_max_size_mb__(self) -> int:
+        max_size_mb = 1024  # default
+        key = "sum_dirac_dfcoef_cache_max_mb"
+        if key in self.json_dict:
+            max_size_mb = int(self.json_dict[key])
+        return max(0, max_size_mb)
+
+
+class SumDiracDfcoefRunMode:
+    def __init__(self, json_dict: SettingsDict) -> None:
+        self.json_dict = json_dict
+        # subprocess: run `python -m sum_dirac_dfcoef` for each DIRAC output
+        # pool: call sum_dirac_dfcoef in a process pool that is kept warm during the session
+        self.mode_list = ["subprocess", "pool"]
+        self.mode = self.get_run_mode()
+
+    def get_run_mode(self) -> str:
+        key = "sum_dirac_dfcoef_run_mode"
+        if key in self.json_dict and self.json_dict[key] in self.mode_list:
+            return str(self.json_dict[key])
+        return "subprocess"
+
+    def use_pool(self) -> bool:
+        return self.mode == "pool"
+
+
 class Settings:
     def __init__(self):
         # Application Default Settings
@@ -80,6 +120,9 @@ class Settings:
                 "dirac_ver": 23,
                 "color_theme": "default",
                 "multi_process_num": 4,
+                "sum_dirac_dfcoef_cache_dir": "",
+                "sum_dirac_dfcoef_cache_max_mb": 1024,
+                "sum_dirac_dfcoef_run_mode": "subprocess",
             }
         )
         if not dir_info.setting_file_path.exists():
@@ -91,10 +134,20 @@ class Settings:
         self.input = UserInput(self.json_dict, self.default_settings)
         self.color_theme = ColorTheme(self.json_dict)
         self.multi_process_input = MultiProcess(self.json_dict)
+        self.sum_dirac_dfcoef_cache = SumDiracDfcoefCacheSettings(self.json_dict)
+        self.sum_dirac_dfcoef_run_mode = SumDiracDfcoefRunMode(self.json_dict)
 
     def create_default_settings_file(self):
         with open(dir_info.setting_file_path, mode="w") as f:
             json.dump(self.default_settings, f, indent=4)
 
 
-settings = Settings()
+_settings: Optional[Settings] = None
+
+
+def get_settings() -> Settings:
+    """Read settings.json at the first call instead of at import time."""
+    global _settings  # noqa: PLW0603
+    if _settings is None:
+        _settings = Settings()
+    return _settings
@@ -0,0 +1,126 @@
+# This script records the time spent in each stage of the application (span)
+# and writes it as a Chrome trace file (Trace Event Format).
+# The trace file can be opened with https://ui.perfetto.dev or chrome://tracing.
+# Tracing is disabled by default. Then trace_span returns a shared span that does nothing,
+# so the cost of a span is only a function call.
+import atexit
+import itertools
+import json
+import os
+import threading
+import time
+from pathlib import Path
+from typing import Any, Dict, List, Optional, Union
+
+TRACE_CATEGORY = "dcaspt2_input_generator"
+
+
+class Tracer:
+    """Collect the trace events and write them to output_path."""
+
+    def __init__(self, output_path: Path):
+        self.output_path = output_path
+        self.events: List[Dict[str, Any]] = []
+        self.lock = threading.Lock()
+        self.pid = os.getpid()
+        self.async_ids = itertools.count(1)
+        self.origin = time.perf_counter()
+
+    def now_us(self) -> float:
+        return (time.perf_counter() - self.origin) * 1e6
+
+    def add_event(self, event: Dict[str, Any]) -> None:
+        event.update(cat=TRACE_CATEGORY, pid=self.pid, tid=threading.get_ident())
+        with self.lock:
+            self.events.append(event)
+
+    def write(self) -> None:
+        with self.lock:
+            events = list(self.events)
+        metadata = {"name": "process_name", "ph": "M", "pid": self.pid, "args": {"name": TRACE_CATEGORY}}
+        with open(self.output_path, mode="w", encoding="utf-8") as f:
+            json.dump({"traceEvents": [metadata, *events], "displayTimeUnit": "ms"}, f)
+
+
+class TraceSpan:
+    """A span starts when it is created and ends at end() or at the end of the with statement.
+
+    A synchronous span is written as a complete event (ph: X).
+    An asynchronous span (e.g. sum_dirac_dfcoef running in the background) is written as
+    a pair of async events (ph: b, e), because it can overlap with the other spans of the same thread.
+    """
+
+    def __init__(self, tracer: Tracer, name: str, args: Dict[str, Any], *, is_async: bool):
+        self.tracer = tracer
+        self.name = name
+        self.args = args
+        self.async_id = next(tracer.async_ids) if is_async else None
+        self.start_us = tracer.now_us()
+        self.is_ended = False
+
+    def __enter__(self) -> "TraceSpan":
+        return self
+
+    def __exit__(self, exc_type, exc_value, traceback) -> None:
+        if exc_value is not None:
+            self.args["error"] = repr(exc_value)
+        self.end()
+
+    def end(self, **args: Any) -> None:
+        if self.is_ended:
+            return
+        self.is_ended = True
+        end_us = self.tracer.now_us()
+        self.args.update(args)
+        if self.async_id is None:
+            event = {"name": self.name, "ph": "X", "ts": self.start_us, "dur": end_us - self.start_us}
+            self.tracer.add_event({**event, "args": self.args})
+        else:
+            self.tracer.add_event({"name": self.name, "ph": "b", "ts": self.start_us, "id": self.async_id})
+            self.tracer.add_event({"name": self.name, "ph": "e", "ts": end_us, "id": self.async_id, "args": self.args})
+
+
+class NullSpan:
+    """The span used while tracing is disabled"""
+
+    def __enter__(self) -> "NullSpan":
+        return self
+
+    def __exit__(self, exc_type, exc_value, traceback) -> None:
+        pass
+
+    def end(self, **args: Any) -> None:
+        pass
+
+
+_tracer: Optional[Tracer] = None
+_null_span = NullSpan()
+
+
+def enable_tracing(output_path: Path) -> Tracer:
+    """Start tracing. The trace is written to output_path when the application exits."""
+    global _tracer  # noqa: PLW0603
+    if _tracer is None:
+        _tracer = Tracer(output_path)
+        atexit.register(write_trace)
+    return _tracer
+
+
+def write_trace() -> None:
+    if _tracer is not None:
+        _tracer.write()
+
+
+def trace_span(name: str, **args: Any) -> Union[TraceSpan, NullSpan]:
+    """Return a span to be used in a with statement.
+    (e.g.) with trace_span("validate", rows=len(rows)):"""
+    if _tracer is None:
+        return _null_span
+    return TraceSpan(_tracer, name, args, is_async=False)
+
+
+def trace_async_span(name: str, **args: Any) -> Union[TraceSpan, NullSpan]:
+    """Return a span that is ended by calling end() from another callback."""
+    if _tracer is None:
+        return _null_span
+    return TraceSpan(_tracer, name, args, is_async=True)
@@ -8,7 +8,7 @@ def create_ras_str(ras_list: "list[int]") -> str:
     if any(i <= 0 for i in ras_list):
         msg = "ras_list must contain only positive integers"
         raise ValueError(msg)
-    ranges: "list[str]" = []
+    ranges: list[str] = []
     start = ras_list[0]
     end = ras_list[0]
 
@@ -27,8 +27,39 @@ def create_ras_str(ras_list: "list[int]") -> str:
     return ",".join(ranges)
 
 
-def debug_print(s: str):
-    from dcaspt2_input_generator.utils.args import args
+def parse_ras_str(ras_str: str) -> "list[int]":
+    # Inverse of create_ras_str
+    # (e.g.) "1..8, 11..12" -> [1, 2, 3, 4, 5, 6, 7, 8, 11, 12]
+    ras_list: list[int] = []
+    for range_str in ras_str.split(","):
+        elem = range_str.strip()
+        if not elem:
+            continue
+        if ".." in elem:
+            start_str, end_str = elem.split("..")
+            start, end = int(start_str), int(end_str)
+            if start > end:
+                msg = f"The start of the range must be less than or equal to the end. range: {elem}"
+                raise ValueError(msg)
+            ras_list.extend(range(start, end + 1))
+        else:
+            ras_list.append(int(elem))
+    if any(i <= 0 for i in ras_list):
+        msg = "ras_str must contain only positive integers"
+        raise ValueError(msg)
+    return ras_list
+
+
+# Set from the --debug option by main. The command line is not parsed here,
+# so that the core modules can be used from scripts which have their own command line arguments.
+debug_enabled = False
 
-    if args.debug:
+
+def enable_debug() -> None:
+    global debug_enabled  # noqa: PLW0603
+    debug_enabled = True
+
+
+def debug_print(s: str):
+    if debug_enabled:
         print(s)